@@ -1,16 +1,12 @@
 import pandas as pd
-import pytz
-import os
-import datetime
+import sys
+from pathlib import Path
 
-def unixToDayOfWeek(unix_time):
-    dt = datetime.datetime.fromtimestamp(unix_time, tz=datetime.timezone.utc)
-    return dt.strftime('%A')
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.cube import load_cube, rollup
+from Common.sketch import ZERO_KEY
 
 rootPath = "/Users/tommoore/Documents/GitHub/Research/"
-ouraRingPath = "/OuraRing/HeartRate/"
-fileName = "OrHrLabeled"
-rawDataName = "OrHrRAW.csv"
 savePath = "/Users/tommoore/Documents/GitHub/Research/Averages/OrHrAvgs.csv"
 
 participants = ['P001', 'P002', 'P003', 'P004', 'P005', 'P006', 'P007', 'P008', 'P009', 'P012', 'P014', 'P016']
@@ -25,31 +21,22 @@ heartRateAverages = pd.DataFrame({
     'Total avg': 0.0,
 })
 
-for idx, participant in enumerate(participants):
-    dataPath = rootPath + participant + ouraRingPath
-    allBPM = []
-
-    for file in os.listdir(dataPath):
-        filePath = os.path.join(dataPath, file)
-        if file != participant + rawDataName:
-            dataFrame = pd.read_csv(filePath)
-            avgBPM = dataFrame['bpm'].mean()
-            allBPM.extend(dataFrame['bpm'].tolist())
-            dayOfWeek = unixToDayOfWeek(dataFrame['time'].iloc[0])
-
-            if dayOfWeek == 'Monday':
-                heartRateAverages.at[idx, 'Monday avg'] = avgBPM
-            elif dayOfWeek == 'Tuesday':
-                heartRateAverages.at[idx, 'Tuesday avg'] = avgBPM
-            elif dayOfWeek == 'Wednesday':
-                heartRateAverages.at[idx, 'Wednesday avg'] = avgBPM
-            elif dayOfWeek == 'Thursday':
-                heartRateAverages.at[idx, 'Thursday avg'] = avgBPM
-            elif dayOfWeek == 'Friday':
-                heartRateAverages.at[idx, 'Friday avg'] = avgBPM
-
-    nonZeroBPMs = [bpm for bpm in allBPM if bpm != 0]
-    heartRateAverages.at[idx, 'Total avg'] = sum(nonZeroBPMs) / len(nonZeroBPMs)
+dayColumns = ['Monday avg', 'Tuesday avg', 'Wednesday avg', 'Thursday avg', 'Friday avg']
+
+# Every labeled day's bpm cells from the aggregate cube; a weekday's average is
+# over all of that weekday's samples (0 if the participant has none)
+cube = load_cube(rootPath, "OuraRing", participants=participants)
+dayAverages = rollup(cube, ['participant', 'weekday'], sketches=False)
+totals = rollup(cube, ['participant'])
+
+for participant, weekday, avgBPM in zip(dayAverages['participant'], dayAverages['weekday'], dayAverages['mean']):
+    if weekday < len(dayColumns):
+        heartRateAverages.loc[heartRateAverages['participant'] == participant, dayColumns[weekday]] = avgBPM
+
+# Total average leaves out the 0 bpm samples (the sketch's zero bucket)
+for participant, bpmSum, count, keys, counts in zip(totals['participant'], totals['sum'], totals['count'], totals['sketch_keys'], totals['sketch_counts']):
+    nonZero = count - counts[keys == ZERO_KEY].sum()
+    heartRateAverages.loc[heartRateAverages['participant'] == participant, 'Total avg'] = bpmSum / nonZero
 
 print(heartRateAverages)
 heartRateAverages.to_csv(savePath, index=False)
\ No newline at end of file
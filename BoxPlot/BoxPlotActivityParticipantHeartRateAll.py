@@ -1,87 +1,59 @@
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-import numpy as np
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.cube import load_cube, rollup
+from Common.distplots import box_plot
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
+modality = "OuraRing"  # or "Mocopi" / "SensorLogger" (acceleration magnitude)
+value_name = "Heart Rate" if modality == "OuraRing" else "Acceleration Magnitude"
+value_label = f"{value_name} (bpm)" if modality == "OuraRing" else value_name
 output_folder = os.path.join(root_path, "1_visualization/BoxPlots")
-timestamp_column = "time"
 activity_column = "class"
-heart_rate_column = "bpm"
 output_filename = "participant_activity_heartRate.png"
 
 os.makedirs(output_folder, exist_ok=True)
 
-# Get all participant folders
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-
-for participant in participant_folders:
-    participant_number = participant
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-
-    csv_files = [
-        f for f in os.listdir(heart_rate_folder)
-        if f.endswith(".csv") and "RAW" not in f
-    ]
-
-    for file in csv_files:
-        # Extract date string
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            continue
-
-        # Skip Fridays
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-
-        df['class'] = df['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
-
-        df['participant'] = participant_number
-        all_data.append(df[[activity_column, heart_rate_column, 'participant']])
-
+# Cube cells of every participant, Fridays skipped: one quantile sketch per
+# participant and activity instead of every labeled row
+cube = load_cube(root_path, modality, skip_weekdays=(4,))
 
-# Combine all data
-if not all_data:
+if cube.empty:
     print("No labeled CSV files with activities found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
+cube['class'] = cube['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
 
-# Count number of data points per activity per participant
-counts = combined_df.groupby(['participant', activity_column]).size().reset_index(name='count')
+# Activities in the order they first appear, participants sorted
+activities = list(pd.unique(cube[activity_column].dropna()))
+summaries = rollup(cube, ['participant', activity_column])
 
 # --- BOX PLOT ---
 plt.figure(figsize=(14, 7))
 
 # High-contrast palette for participants
-num_participants = combined_df['participant'].nunique()
+num_participants = summaries['participant'].nunique()
 palette = sns.color_palette("tab20", num_participants)
 
-# Create a boxplot of counts per participant/activity
-# Using the raw combined_df instead of aggregated counts
-ax = sns.boxplot(
-    data=combined_df,
+# One box per participant/activity, drawn from its sketch
+ax = box_plot(
+    plt.gca(),
+    summaries,
     x=activity_column,
-    y=heart_rate_column,   # boxplots show distribution of a numeric variable
     hue="participant",
-    palette=palette
+    order=activities,
+    palette=palette,
+    value_label=value_label
 )
 
-plt.title("Heart Rate Distribution per Activity per Participant", fontsize=16)
+plt.title(f"{value_name} Distribution per Activity per Participant", fontsize=16)
 plt.xlabel("Activity", fontsize=12)
-plt.ylabel("Heart Rate (bpm)", fontsize=12)
+plt.ylabel(value_label, fontsize=12)
 plt.xticks(rotation=45)
 
 # Legend
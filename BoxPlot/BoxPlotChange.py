@@ -1,16 +1,21 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from datetime import datetime
 from matplotlib.colors import to_hex
 import colorsys
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.cube import load_cube, rollup
+from Common.distplots import box_plot
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
+modality = "OuraRing"  # or "Mocopi" / "SensorLogger" (acceleration magnitude)
+value_label = "Heart Rate (bpm)" if modality == "OuraRing" else "Acceleration Magnitude"
 output_folder = os.path.join(root_path, "1_visualization/BoxPlots")
 activity_column = "class"
-heart_rate_column = "bpm"
 output_filename = "HR per activity per participant.png"
 
 os.makedirs(output_folder, exist_ok=True)
@@ -26,53 +31,24 @@ def create_gradient(base_color, n_colors=5, min_lightness=0.6, max_lightness=0.9
         gradient.append((ri, gi, bi))
     return gradient
 
-# --- Load all participant data ---
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-
-for participant in participant_folders:
-    participant_number = participant
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-
-    csv_files = [
-        f for f in os.listdir(heart_rate_folder)
-        if f.endswith(".csv") and "RAW" not in f
-    ]
-
-    for file in csv_files:
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            continue
+# Cube cells of every participant, Fridays skipped: one quantile sketch per
+# participant and activity instead of every labeled row
+cube = load_cube(root_path, modality, skip_weekdays=(4,))
 
-        # Skip Fridays
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-
-        df['class'] = df['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
-        df['participant'] = participant_number
-        all_data.append(df[[activity_column, heart_rate_column, 'participant']])
-
-if not all_data:
+if cube.empty:
     print("No labeled CSV files with activities found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
+cube['class'] = cube['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
+
+summaries = rollup(cube, ['participant', activity_column])
 
 # --- Compute global y-axis bounds ---
-y_min = combined_df[heart_rate_column].min()
-y_max = combined_df[heart_rate_column].max()
+y_min = summaries['min'].min()
+y_max = summaries['max'].max()
 
-participants = sorted(combined_df['participant'].unique())
-activities = sorted(combined_df[activity_column].unique())
+participants = sorted(summaries['participant'].unique())
+activities = sorted(summaries[activity_column].unique())
 
 # --- FACETED BOX PLOTS (per activity) ---
 num = len(activities)
@@ -87,28 +63,25 @@ base_colors = sns.color_palette("Set2", len(activities))
 
 for i, activity in enumerate(activities):
     ax = axes[i]
-    subset = combined_df[combined_df[activity_column] == activity]
+    subset = summaries[summaries[activity_column] == activity]
 
     # Gradient across participants
     gradient_palette = create_gradient(base_colors[i], n_colors=len(participants), min_lightness=0.6, max_lightness=0.9)
     activity_color_map = dict(zip(participants, [to_hex(c) for c in gradient_palette]))
 
-    # Draw boxplots per participant
-    for j, participant in enumerate(participants):
-        participant_data = subset[subset['participant'] == participant]
-        sns.boxplot(
-            x=[participant]*len(participant_data),
-            y=heart_rate_column,
-            data=participant_data,
-            ax=ax,
-            color=activity_color_map[participant],
-            order=participants,
-            showfliers=False
-        )
+    # Draw a box per participant
+    box_plot(
+        ax,
+        subset,
+        x='participant',
+        palette=activity_color_map,
+        order=participants,
+        showfliers=False
+    )
 
     ax.set_title(f"{activity}", fontsize=12)
     ax.set_xlabel("Participant", fontsize=10)
-    ax.set_ylabel("Heart Rate (bpm)", fontsize=10)
+    ax.set_ylabel(value_label, fontsize=10)
     ax.set_ylim(y_min, y_max)
 
     # Rotate x-axis labels for readability
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the WorkScripts pipelines.
+
+Scripts in this repo are run directly (``python DataLabeling/OuraRingHR_All.py``),
+so each one puts the repo root on ``sys.path`` before importing from here.
+"""
@@ -0,0 +1,322 @@
+"""
+Catalog of the participant data files under the research root.
+
+The plotting scripts used to find their inputs by listing the root for P0XX
+folders and walking OuraRing/HeartRate, SensorLogger or Mocopi/Labeled in
+every participant, then parsing the date out of each file name. On the
+network share that listing is most of a script's run time, and every script
+repeats it. The catalog is one SQLite table,
+
+    {root}/FileCatalog.sqlite
+
+with a row per CSV below a participant folder: relative path, participant,
+modality (OuraRing, Mocopi, SensorLogger, HealthApp), kind (Raw/Labeled),
+sensor, date, weekday, byte size and mtime. Nothing is read from the files
+themselves, so building it costs a walk of the tree and a stat per file.
+
+refresh_catalog() keeps it current. Every catalogued file is stat'ed again,
+so a file rewritten in place (a labeling script's to_csv over an existing
+Labeled CSV) gets its new size and mtime. The mtime of every directory that
+was listed is stored too: a directory whose mtime is unchanged has the same
+entries, so only new or changed directories are listed again to find added
+and removed files. A full refresh (full=True, or `python Common/catalog.py
+--full ROOT`) lists every directory, for file systems whose directory
+mtimes cannot be trusted. catalog_files() refreshes before it answers unless
+told not to.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+
+CATALOG_FILENAME = "FileCatalog.sqlite"
+CATALOG_VERSION = 2
+
+MODALITIES = ("OuraRing", "Mocopi", "SensorLogger", "HealthApp")
+
+_DATE_RE = re.compile(r"(?<!\d)(\d{4})[-_](\d{2})[-_](\d{2})(?!\d)|(?<!\d)(20\d{6})(?!\d)")
+_MOCOPI_LABELED_RE = re.compile(r"Mocopi(.+?)\d{4}-\d{2}-\d{2}\.csv$")
+_MOCOPI_RAW_RE = re.compile(r"mocopi_([0-9A-Fa-f]+)_")
+_SENSORLOGGER_RE = re.compile(r"SensorLog_(?:TRUE_)?([A-Za-z]+)_")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    participant TEXT NOT NULL,
+    modality TEXT,
+    kind TEXT,
+    sensor TEXT,
+    date TEXT,
+    weekday INTEGER,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_query ON files (modality, kind, participant);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+def catalog_path(root_path):
+    return os.path.join(root_path, CATALOG_FILENAME)
+
+
+def _connect(root_path):
+    con = sqlite3.connect(catalog_path(root_path))
+    if con.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+        con.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS dirs;")
+        con.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    con.executescript(_SCHEMA)
+    return con
+
+
+# === Describing one file ===
+
+def file_date(file_name):
+    """Date in a file name (YYYY-MM-DD, YYYY_MM_DD or YYYYMMDD; the last one wins), or None."""
+    matches = _DATE_RE.findall(file_name)
+    if not matches:
+        return None
+    y, m, d, compact = matches[-1]
+    try:
+        if compact:
+            return datetime.strptime(compact, "%Y%m%d").date()
+        return date(int(y), int(m), int(d))
+    except ValueError:
+        return None
+
+
+def describe(rel_path):
+    """
+    {participant, modality, kind, sensor, date} for a CSV's path relative to
+    the root (P0XX/<modality>/...). Parts that do not apply are None.
+    """
+    parts = rel_path.split('/')
+    name = parts[-1]
+    modality = parts[1] if len(parts) > 2 and parts[1] in MODALITIES else None
+    kind = sensor = None
+
+    if modality in ("Mocopi", "HealthApp"):
+        kind = parts[2] if parts[2] in ("Raw", "Labeled") else None
+        if modality == "Mocopi":
+            match = (_MOCOPI_LABELED_RE if kind == "Labeled" else _MOCOPI_RAW_RE).search(name)
+            sensor = match.group(1) if match else None
+        elif "Record" in parts[2:-1]:
+            sensor = name[:-4].rsplit('_', 1)[-1]
+    elif modality == "OuraRing":
+        kind = "Raw" if "RAW" in name else "Labeled"
+        sensor = parts[2] if len(parts) > 3 else None
+    elif modality == "SensorLogger":
+        kind = "Labeled" if "TRUE" in name else "Raw"
+        match = _SENSORLOGGER_RE.search(name)
+        sensor = match.group(1) if match else (parts[-2] if len(parts) > 3 else None)
+
+    return {
+        'participant': parts[0],
+        'modality': modality,
+        'kind': kind,
+        'sensor': sensor,
+        'date': file_date(name),
+    }
+
+
+# === Refresh ===
+
+def _forget_dir(con, rel_dir):
+    """Drop a directory and everything catalogued below it."""
+    like = rel_dir.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%'
+    con.execute("DELETE FROM files WHERE dir = ? OR dir LIKE ? ESCAPE '\\'", (rel_dir, like))
+    con.execute("DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'", (rel_dir, like))
+
+
+def _scan_dir(con, rel_dir, entries, known_files, stats):
+    """Re-list one directory: upsert new/changed CSVs, drop vanished ones. Returns its subdirectories."""
+    subdirs = []
+    seen = set()
+    for entry in entries:
+        if entry.is_dir():
+            subdirs.append(entry.name)
+            continue
+        if not entry.name.endswith(".csv") or not entry.is_file():
+            continue
+        rel = f"{rel_dir}/{entry.name}"
+        seen.add(rel)
+        st = entry.stat()
+        if known_files.get(rel) == (st.st_size, st.st_mtime_ns):
+            continue
+        info = describe(rel)
+        day = info['date']
+        con.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel, rel_dir, info['participant'], info['modality'], info['kind'], info['sensor'],
+             day.isoformat() if day else None, day.weekday() if day else None,
+             st.st_size, st.st_mtime_ns),
+        )
+        stats['updated'] += 1
+
+    for rel in set(known_files) - seen:
+        con.execute("DELETE FROM files WHERE path = ?", (rel,))
+        stats['removed'] += 1
+    return subdirs
+
+
+def _restat_dir(con, root_path, known_files, stats):
+    """Update the size/mtime of the catalogued files of a directory that was not re-listed."""
+    for rel, known in known_files.items():
+        try:
+            st = os.stat(os.path.join(root_path, *rel.split('/')))
+        except FileNotFoundError:
+            con.execute("DELETE FROM files WHERE path = ?", (rel,))
+            stats['removed'] += 1
+            continue
+        if known != (st.st_size, st.st_mtime_ns):
+            con.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (st.st_size, st.st_mtime_ns, rel))
+            stats['updated'] += 1
+
+
+def refresh_catalog(root_path, full=False):
+    """
+    Bring the catalog in line with the participant folders of root_path.
+    Returns {'listed': directories re-listed, 'updated': files added or
+    changed, 'removed': files dropped}.
+    """
+    stats = {'listed': 0, 'updated': 0, 'removed': 0}
+    con = _connect(root_path)
+    try:
+        dir_mtimes = dict(con.execute("SELECT path, mtime_ns FROM dirs"))
+        children = {}
+        for path, parent in con.execute("SELECT path, parent FROM dirs"):
+            children.setdefault(parent, []).append(path)
+        files_by_dir = {}
+        for rel, rel_dir, size, mtime_ns in con.execute("SELECT path, dir, size, mtime_ns FROM files"):
+            files_by_dir.setdefault(rel_dir, {})[rel] = (size, mtime_ns)
+
+        participants = sorted(
+            d for d in os.listdir(root_path)
+            if d.startswith("P") and os.path.isdir(os.path.join(root_path, d))
+        )
+        for gone in set(children.get(None, [])) - set(participants):
+            _forget_dir(con, gone)
+
+        stack = [(p, None) for p in reversed(participants)]
+        while stack:
+            rel_dir, parent = stack.pop()
+            path = os.path.join(root_path, rel_dir)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                _forget_dir(con, rel_dir)
+                continue
+
+            known_files = files_by_dir.get(rel_dir, {})
+            if not full and dir_mtimes.get(rel_dir) == mtime_ns:
+                # Same entries as last time; their contents may still have been rewritten
+                _restat_dir(con, root_path, known_files, stats)
+                subdirs = [c.rsplit('/', 1)[-1] for c in children.get(rel_dir, [])]
+            else:
+                with os.scandir(path) as entries:
+                    subdirs = _scan_dir(con, rel_dir, entries, known_files, stats)
+                for gone in set(children.get(rel_dir, [])) - {f"{rel_dir}/{d}" for d in subdirs}:
+                    _forget_dir(con, gone)
+                con.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (rel_dir, parent, mtime_ns))
+                stats['listed'] += 1
+
+            for d in sorted(subdirs, reverse=True):
+                stack.append((f"{rel_dir}/{d}", rel_dir))
+        con.commit()
+    finally:
+        con.close()
+    return stats
+
+
+# === Queries ===
+
+def catalog_participants(root_path, refresh=True):
+    """Participant folders (P0XX) in the catalog, sorted."""
+    if refresh or not os.path.exists(catalog_path(root_path)):
+        refresh_catalog(root_path)
+    con = _connect(root_path)
+    try:
+        return [row[0] for row in con.execute("SELECT path FROM dirs WHERE parent IS NULL ORDER BY path")]
+    finally:
+        con.close()
+
+
+def catalog_files(root_path, modality=None, kind=None, sensor=None, participants=None,
+                  skip_weekdays=(), dated=True, refresh=True):
+    """
+    Catalogued files as dicts (path (absolute), participant, modality, kind,
+    sensor, date (datetime.date or None), weekday (Monday=0), size, mtime_ns), ordered by participant and path. `sensor` matches as a
+    substring, like the scripts' `"WristMotion" in file` checks. With
+    `dated`, files without a date in their name are left out, as the
+    scripts skipped names they could not parse a date from.
+    """
+    if refresh or not os.path.exists(catalog_path(root_path)):
+        refresh_catalog(root_path)
+
+    where, args = [], []
+    for col, value in (('modality', modality), ('kind', kind)):
+        if value is not None:
+            where.append(f"{col} = ?")
+            args.append(value)
+    if sensor is not None:
+        where.append("instr(sensor, ?) > 0")
+        args.append(sensor)
+    if participants is not None:
+        participants = list(participants)
+        where.append(f"participant IN ({', '.join('?' * len(participants))})")
+        args.extend(participants)
+    if dated:
+        where.append("date IS NOT NULL")
+    skip_weekdays = list(skip_weekdays)
+    if skip_weekdays:
+        where.append(f"(weekday IS NULL OR weekday NOT IN ({', '.join('?' * len(skip_weekdays))}))")
+        args.extend(skip_weekdays)
+
+    query = "SELECT path, participant, modality, kind, sensor, date, weekday, size, mtime_ns FROM files"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY participant, path"
+
+    con = _connect(root_path)
+    try:
+        rows = con.execute(query, args).fetchall()
+    finally:
+        con.close()
+
+    return [
+        {
+            'path': os.path.join(root_path, *rel.split('/')),
+            'participant': participant,
+            'modality': modality_,
+            'kind': kind_,
+            'sensor': sensor_,
+            'date': date.fromisoformat(day) if day else None,
+            'weekday': weekday,
+            'size': size,
+            'mtime_ns': mtime_ns,
+        }
+        for rel, participant, modality_, kind_, sensor_, day, weekday, size, mtime_ns in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the data file catalog of a research root.")
+    parser.add_argument("root", help="Research root folder (the one holding the P0XX folders)")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-list every directory, not only the ones whose mtime changed")
+    args = parser.parse_args()
+
+    stats = refresh_catalog(args.root, full=args.full)
+    print(f"{catalog_path(args.root)}: {stats['listed']} directories listed, "
+          f"{stats['updated']} files added or changed, {stats['removed']} removed")
+
+
+if __name__ == "__main__":
+    main()
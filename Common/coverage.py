@@ -0,0 +1,149 @@
+"""
+Per-bin sample counts for the coverage / data-point heatmaps.
+
+The heatmap scripts used to find the samples of each time bin with
+df[df['TimeObj'].between(bin_start, bin_end)], one full scan of the frame per
+bin. bin_counts() converts the seconds-of-day to integer microseconds once and
+gets every bin's count from a single np.bincount. Bins keep between()'s rule of
+being closed on both ends: a sample exactly on the edge between two bins is
+counted in both, and one exactly on the last bin's end is counted in it.
+
+split_edges() / interval_counts() are for bins laid over schedule rows
+instead (TimeCheck/SizeSweep.py): each bin is (start, end] like the labeling
+rule, and the counts for any bin width come from one np.searchsorted over
+samples that were sorted once.
+
+second_bins() / coverage_bitset() / any_all_counts() are the 1-second
+"does this second have enough samples" coverage of Counting/MocopiAnyAll.py:
+a bool array per (device, date) instead of a {epoch_second: bool} dict, OR-ed
+into one bit-packed array per sensor location, so the any/all comparison
+across locations is a bitwise OR / AND reduction and a popcount.
+"""
+
+import numpy as np
+
+from Common.schedules import time_to_seconds
+
+US_PER_SECOND = 1_000_000
+
+
+def bin_spec(time_bins):
+    """
+    (start_us, width_us, n_bins) for a contiguous list of equal-width
+    (bin_start, bin_end) datetime.time tuples, as the heatmap scripts build them.
+    """
+    starts = [round(time_to_seconds(s) * US_PER_SECOND) for s, _ in time_bins]
+    ends = [round(time_to_seconds(e) * US_PER_SECOND) for _, e in time_bins]
+    width_us = ends[0] - starts[0]
+    if any(e - s != width_us for s, e in zip(starts, ends)) or starts[1:] != ends[:-1]:
+        raise ValueError("time bins must be contiguous and of equal width")
+    return starts[0], width_us, len(time_bins)
+
+
+def bin_counts(seconds, spec, codes=None, n_codes=None, weights=None):
+    """
+    Samples per bin for float seconds-of-day (NaN is ignored).
+
+    With `codes` (small non-negative ints, e.g. class indices; negative means
+    "skip this sample") the result is an (n_codes, n_bins) array of counts per
+    code and bin. `weights` sums a value per bin instead of counting samples.
+    """
+    start_us, width_us, n_bins = spec
+    seconds = np.asarray(seconds, dtype=np.float64)
+
+    keep = ~np.isnan(seconds)
+    if codes is not None:
+        codes = np.asarray(codes, dtype=np.int64)
+        keep &= codes >= 0
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[keep]
+
+    offset = np.rint(seconds[keep] * US_PER_SECOND).astype(np.int64) - start_us
+    idx, rem = np.divmod(offset, width_us)
+
+    # Home bin, plus the previous bin for samples sitting exactly on its end.
+    home = (idx >= 0) & (idx < n_bins)
+    edge = (rem == 0) & (idx >= 1) & (idx <= n_bins)
+
+    n_rows = 1 if codes is None else n_codes
+    positions = idx if codes is None else codes[keep] * n_bins + idx
+    total = np.zeros(n_rows * n_bins, dtype=np.int64 if weights is None else np.float64)
+    for mask, shift in ((home, 0), (edge, 1)):
+        total += np.bincount(
+            positions[mask] - shift,
+            weights=None if weights is None else weights[mask],
+            minlength=n_rows * n_bins,
+        ).astype(total.dtype)
+
+    return total if codes is None else total.reshape(n_rows, n_bins)
+
+
+def occupied(counts, min_samples=1):
+    """Bins with at least `min_samples` samples (min_samples=1 is "any sample")."""
+    return np.asarray(counts) >= min_samples
+
+
+def sorted_sample_us(seconds):
+    """Integer microseconds-of-day of the non-NaN samples, sorted, for interval_counts()."""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    return np.sort(np.rint(seconds[~np.isnan(seconds)] * US_PER_SECOND).astype(np.int64))
+
+
+def split_edges(start_us, end_us, width_us):
+    """
+    Edges of consecutive width_us bins over (start_us, end_us], the last one
+    cut short at end_us (generate_bins() in the TimeCheck scripts). No bins,
+    i.e. a single edge, when end_us <= start_us.
+    """
+    n_bins = max(0, -(-(end_us - start_us) // width_us))
+    return np.minimum(start_us + width_us * np.arange(n_bins + 1, dtype=np.int64), max(end_us, start_us))
+
+
+def interval_counts(sorted_us, edges_us):
+    """Samples in each (edges_us[k], edges_us[k + 1]] bin."""
+    return np.diff(np.searchsorted(sorted_us, edges_us, side='right'))
+
+
+def second_bins(epoch_seconds, start_sec, end_sec, threshold=1):
+    """
+    bool array over the 1-second bins start_sec..end_sec (both included): True
+    where a bin has at least `threshold` samples. Samples outside the range
+    are ignored.
+    """
+    n_bins = max(0, int(end_sec) - int(start_sec) + 1)
+    offsets = np.asarray(epoch_seconds, dtype=np.int64) - int(start_sec)
+    offsets = offsets[(offsets >= 0) & (offsets < n_bins)]
+    return np.bincount(offsets, minlength=n_bins) >= threshold
+
+
+def segment_span(segments):
+    """(first_second, n_bins) covering every (start_sec, bins) segment; (0, 0) if there are none."""
+    if not segments:
+        return 0, 0
+    first = min(start for start, _ in segments)
+    last = max(start + len(bins) for start, bins in segments)
+    return first, last - first
+
+
+def coverage_bitset(segments, first_second, n_bins):
+    """
+    OR of (start_sec, bool bins) segments laid over n_bins seconds from
+    first_second, bit-packed (np.packbits, 8 seconds per byte, zero padded).
+    """
+    dense = np.zeros(n_bins, dtype=bool)
+    for start, bins in segments:
+        offset = start - first_second
+        dense[offset:offset + len(bins)] |= bins
+    return np.packbits(dense)
+
+
+def count_bits(bitset):
+    return int(np.count_nonzero(np.unpackbits(bitset)))
+
+
+def any_all_counts(bitsets):
+    """(bits set in any bitset, bits set in all of them) for equal-length bitsets."""
+    if not bitsets:
+        return 0, 0
+    stacked = np.stack(bitsets)
+    return count_bits(np.bitwise_or.reduce(stacked)), count_bits(np.bitwise_and.reduce(stacked))
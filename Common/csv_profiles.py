@@ -0,0 +1,126 @@
+"""
+Typed, column-pruned reading profiles for the repo's CSV formats.
+
+The plotting and heatmap scripts read their CSVs with a bare pd.read_csv():
+every column is parsed, sensor values come back as float64 and `class` and
+the clock-time strings as Python objects. A profile lists the columns one
+file format can have and what each is read as:
+
+  - float32 for sensor values (IMU channels, bpm, SensorLogger axes)
+  - int64 for the epoch `time` column (unix seconds; ns for SensorLogger)
+  - category for `class` and other repeated labels
+  - str for clock times and timestamp text, which stays text
+  - None: left to the parser (HealthApp `Value` is not always a number)
+
+read_profile() reads only the columns a caller asks for, and only those the
+file actually has, so `if col not in df.columns` checks keep working. The
+pyarrow engine is used when it is installed, the file is at least
+PYARROW_MIN_BYTES and every column asked for has a numeric or category dtype:
+turning text into Python strings (and inferring types) is where it is slower
+than, or differs from, the C engine, and on the small per-day files its
+start-up cost is more than the whole read.
+
+Scripts that average bpm ask for it as float64 (dtype={'bpm': 'float64'}),
+so the means they print and annotate are the ones a float64 read gives.
+Labeling scripts keep reading with plain pd.read_csv(): their outputs are
+written back as text and must not pick up float32 rounding.
+"""
+
+import csv
+import os
+
+import pandas as pd
+
+from Common.mocopi import IMU_COLUMNS
+
+_IMU_FLOAT32 = {col: 'float32' for col in IMU_COLUMNS}
+
+PROFILES = {
+    'mocopi_raw': {
+        'Timestamp': str,
+        **_IMU_FLOAT32,
+    },
+    'mocopi_labeled': {
+        'class': 'category',
+        'Time_In_PST': str,
+        'time': 'int64',
+        'Old Timestamp': str,
+        **_IMU_FLOAT32,
+    },
+    'oura_hr_raw': {
+        'timestamp': str,
+        'bpm': 'float32',
+        'source': 'category',
+    },
+    'oura_hr_labeled': {
+        'class': 'category',
+        'Time_In_PST': str,
+        'time': 'int64',
+        'Time_In_ISO': str,
+        'bpm': 'float32',
+        'source': 'category',
+    },
+    'sensorlogger_true': {
+        'class': 'category',
+        'Time_In_PST': str,
+        'time': 'int64',
+        'seconds_elapsed': 'float32',
+        'x': 'float32',
+        'y': 'float32',
+        'z': 'float32',
+    },
+    'healthapp_record': {
+        'class': 'category',
+        'Time_In_PST': str,
+        'time': 'int64',
+        'CreationDate': str,
+        'EndDate': str,
+        'StartDate': str,
+        'Type': 'category',
+        'Unit': 'category',
+        'Value': None,
+        'ID': None,
+    },
+}
+
+
+def _pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+PYARROW_CSV = _pyarrow_available()
+PYARROW_MIN_BYTES = 1 << 20
+
+
+def _header(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+
+def read_profile(path, profile, columns=None, dtype=None):
+    """
+    Read a CSV with one of PROFILES. Only `columns` (default: every column of
+    the profile) that the file has are read, in file order, with the
+    profile's dtypes; `dtype` overrides some of them (e.g. {'class': object}
+    when frames with different classes are concatenated and grouped later).
+    """
+    spec = PROFILES[profile]
+    wanted = set(spec if columns is None else columns)
+    usecols = [col for col in _header(path) if col in wanted]
+    if not usecols:
+        return pd.DataFrame()
+
+    dtypes = {col: spec.get(col) for col in usecols}
+    dtypes.update({col: dt for col, dt in (dtype or {}).items() if col in dtypes})
+
+    # Inferred columns go through the C engine too: pyarrow infers differently
+    # (dates, clock times)
+    typed = all(dtypes.get(col) not in (None, str, object) for col in usecols)
+    engine = 'pyarrow' if PYARROW_CSV and typed and os.path.getsize(path) >= PYARROW_MIN_BYTES else 'c'
+    dtypes = {col: dt for col, dt in dtypes.items() if dt is not None}
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes, engine=engine)
+    return df[usecols] if engine == 'pyarrow' else df
@@ -0,0 +1,384 @@
+"""
+Pre-aggregated cube of the labeled data for the plotting scripts.
+
+The bar graph, averages and data-point / heart-rate heatmaps read every
+Labeled row of every participant only to count rows or average bpm per
+participant, class, weekday or time bin. The cube holds those aggregates at
+one fine grain,
+
+    participant x date x class x sensor x 5-minute bin of the Pacific clock
+
+one Parquet file per modality and participant,
+
+    {root}/Cube_Parquet/{modality}/P0XX.parquet
+
+with, per cell: `rows` (labeled rows), `count` / `sum` / `min` / `max` of
+the cell's value, `m2` (the sum of squared deviations from the cell's mean)
+and a Common.sketch quantile sketch of it (`sketch_keys`, `sketch_counts`).
+The value is bpm for OuraRing and the acceleration magnitude for Mocopi
+(Acceleration X/Y/Z) and SensorLogger (whichever of x, y, z the file has). `bin` is the 5-minute slot of
+Time_In_PST (0 = 00:00-00:05), -1 for rows without a clock time; `date` and
+`weekday` are the file's date, the one the scripts skip Fridays by. Rows
+without a class keep a null `class`, and rows without a value count in
+`rows` only.
+
+rollup() sums cells to any coarser grain (30-minute bins, per class, per
+weekday, ...); counts, sums and sketches add and m2 merges (Chan et al.'s
+pairwise update), so a rolled-up mean, std or quantile is the one the raw
+rows would give, except that time bins are half-open. m2 is kept instead of
+a sum of squares: sumsq - sum**2 / n cancels catastrophically for cells of
+many similar values (a day of bpm around 80).
+
+The inputs are the Labeled CSVs from Common.catalog (Mocopi: the
+Mocopi_Parquet parts when cached, as Common.mocopi_store reads them). They
+are fingerprinted through Common.manifest (LabelingManifest/Cube_Parquet.json)
+and load_cube() re-aggregates only the files that changed since the cube was
+written, so the first load after a labeling run rebuilds what that run
+relabeled and later loads only read the cube. A load reads the manifest once
+and writes it back only when an entry changed, so a load that finds every
+cube current writes nothing. `python Common/cube.py ROOT` brings every
+participant's cube up to date. Without pyarrow nothing is
+cached and the cube is aggregated in memory on every load.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+if __name__ == "__main__":
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from Common.catalog import catalog_files, catalog_participants, refresh_catalog
+from Common.csv_profiles import read_profile
+from Common.manifest import fingerprint_inputs, load_manifest, manifest_path, record, save_manifest
+from Common.mocopi import ACCELERATION_COLUMNS
+from Common.mocopi_store import labeled_parts, parquet_available, read_part
+from Common.schedules import seconds_of_day, time_to_seconds
+from Common.sketch import grouped_sketches, value_keys
+
+CUBE_DIRNAME = "Cube_Parquet"
+CUBE_VERSION = 2
+BIN_MINUTES = 5
+BIN_SECONDS = BIN_MINUTES * 60
+N_BINS = 24 * 60 // BIN_MINUTES
+
+MODALITIES = ("OuraRing", "Mocopi", "SensorLogger")
+
+KEY_COLUMNS = ['participant', 'date', 'weekday', 'modality', 'sensor', 'class', 'bin']
+SUM_COLUMNS = ['rows', 'count', 'sum', 'm2']
+SKETCH_COLUMNS = ['sketch_keys', 'sketch_counts']
+CUBE_COLUMNS = KEY_COLUMNS + SUM_COLUMNS + ['min', 'max'] + SKETCH_COLUMNS
+
+
+def cube_path(root_path, modality, participant):
+    return os.path.join(root_path, CUBE_DIRNAME, modality, f"{participant}.parquet")
+
+
+# === Inputs ===
+
+def _sources(root_path, modality, participant):
+    """[(date, sensor, path)] the participant's cube for `modality` is aggregated from."""
+    if modality == "Mocopi":
+        return labeled_parts(root_path, participant)
+    sensor = "HeartRate" if modality == "OuraRing" else None
+    return [
+        (entry['date'], entry['sensor'], entry['path'])
+        for entry in catalog_files(root_path, modality=modality, kind="Labeled", sensor=sensor,
+                                   participants=[participant], refresh=False)
+    ]
+
+
+def _magnitude(df, columns):
+    present = [col for col in columns if col in df.columns]
+    if not present:
+        return np.full(len(df), np.nan)
+    squares = sum(df[col].to_numpy(dtype=np.float64) ** 2 for col in present)
+    return np.sqrt(squares)
+
+
+def _read_source(modality, path):
+    """(classes, seconds of day, values) of one input file, or None if it has no rows to add."""
+    if modality == "Mocopi":
+        df = read_part(path, ['class', 'Seconds_In_PST'] + ACCELERATION_COLUMNS)
+        if df is None:
+            return None
+        return df['class'].astype(object), df['Seconds_In_PST'].to_numpy(dtype=np.float64), _magnitude(df, ACCELERATION_COLUMNS)
+
+    if modality == "OuraRing":
+        df = read_profile(path, 'oura_hr_labeled', columns=['class', 'Time_In_PST', 'bpm'],
+                          dtype={'class': object, 'bpm': 'float64'})
+        values = df['bpm'].to_numpy(dtype=np.float64) if 'bpm' in df.columns else np.full(len(df), np.nan)
+    else:
+        df = read_profile(path, 'sensorlogger_true', columns=['class', 'Time_In_PST', 'x', 'y', 'z'],
+                          dtype={'class': object})
+        values = _magnitude(df, ['x', 'y', 'z'])
+
+    if df.empty:
+        return None
+    classes = df['class'] if 'class' in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+    if 'Time_In_PST' in df.columns:
+        seconds = seconds_of_day(df['Time_In_PST'].astype(str))
+    else:
+        seconds = np.full(len(df), np.nan)
+    return classes, seconds, values
+
+
+# === Aggregation ===
+
+def summarize(classes, seconds, values):
+    """
+    Cube cells (class, bin and the aggregate columns) of one file's rows:
+    class labels (NaN = no class), seconds since Pacific midnight and values.
+    """
+    class_codes, class_names = pd.factorize(pd.Series(classes, dtype=object))
+    seconds = np.asarray(seconds, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+
+    bins = np.full(len(seconds), -1, dtype=np.int64)
+    timed = ~np.isnan(seconds)
+    bins[timed] = np.clip(seconds[timed] // BIN_SECONDS, 0, N_BINS - 1)
+
+    # One cell per (class, bin); class code -1 (no class) and bin -1 (no time) included
+    cells, inverse = np.unique((class_codes + 1) * (N_BINS + 1) + (bins + 1), return_inverse=True)
+    n_cells = len(cells)
+    valid = ~np.isnan(values)
+    owner, v = inverse[valid], values[valid]
+
+    mins = np.full(n_cells, np.nan)
+    maxs = np.full(n_cells, np.nan)
+    if len(v):
+        order = np.lexsort((v, owner))
+        starts = np.flatnonzero(np.r_[True, np.diff(owner[order]) != 0])
+        ends = np.r_[starts[1:], len(order)] - 1
+        mins[owner[order][starts]] = v[order][starts]
+        maxs[owner[order][starts]] = v[order][ends]
+
+    counts = np.bincount(owner, minlength=n_cells)
+    sums = np.bincount(owner, weights=v, minlength=n_cells)
+    means = sums / np.maximum(counts, 1)
+    m2 = np.bincount(owner, weights=(v - means[owner]) ** 2, minlength=n_cells)
+
+    sketches = grouped_sketches(owner, n_cells, value_keys(v))
+    class_index = cells // (N_BINS + 1) - 1
+    names = np.asarray(class_names, dtype=object)
+    return pd.DataFrame({
+        'class': np.where(class_index >= 0, names[np.maximum(class_index, 0)] if len(names) else None, None),
+        'bin': (cells % (N_BINS + 1) - 1).astype(np.int16),
+        'rows': np.bincount(inverse, minlength=n_cells).astype(np.int64),
+        'count': counts.astype(np.int64),
+        'sum': sums,
+        'm2': m2,
+        'min': mins,
+        'max': maxs,
+        'sketch_keys': [k for k, _ in sketches],
+        'sketch_counts': [c for _, c in sketches],
+    })
+
+
+def _source_cells(root_path, modality, participant, file_date, sensor, path):
+    read = _read_source(modality, path)
+    if read is None:
+        return None
+    cells = summarize(*read)
+    cells.insert(0, 'participant', participant)
+    cells.insert(1, 'date', file_date)
+    cells.insert(2, 'weekday', np.int8(file_date.weekday()))
+    cells.insert(3, 'modality', modality)
+    cells.insert(4, 'sensor', sensor)
+    cells['source'] = os.path.relpath(path, root_path)
+    return cells
+
+
+def _concat(frames):
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return pd.DataFrame(columns=CUBE_COLUMNS + ['source'])
+    cube = pd.concat(frames, ignore_index=True)
+    cube['class'] = cube['class'].astype(object)
+    cube['source'] = cube['source'].astype(object)
+    return cube
+
+
+def _participant_cube(root_path, modality, participant, manifest):
+    """
+    (cube cells, whether the manifest entry changed) of one participant and
+    modality: from the cached cube, with the cells of new or changed input
+    files re-aggregated and those of removed files dropped.
+    """
+    sources = _sources(root_path, modality, participant)
+    key = f"{modality}/{participant}/v{CUBE_VERSION}"
+    inputs = fingerprint_inputs(manifest, key, [path for _, _, path in sources])
+    path = cube_path(root_path, modality, participant)
+
+    cached = key in manifest["groups"] and os.path.exists(path)
+    previous = manifest["groups"][key].get("inputs", {}) if cached else {}
+    stale = {
+        p for p in inputs
+        if p not in previous or previous[p]["sha256"] != inputs[p]["sha256"]
+    } | (set(previous) - set(inputs))
+
+    if cached and not stale:
+        cube = pd.read_parquet(path)
+        if inputs == previous:
+            return cube, False
+        # Touched but unchanged inputs: keep their new mtimes so they are not hashed again
+        record(manifest, key, inputs, [path])
+        return cube, True
+
+    kept = None
+    if previous:
+        kept = pd.read_parquet(path)
+        # By what is still current, not by what is stale: cells recorded
+        # under another spelling of the root (a symlink) match neither
+        unchanged = {os.path.relpath(p, root_path) for p in inputs if p not in stale}
+        kept = kept[kept['source'].isin(unchanged)]
+    fresh = [
+        _source_cells(root_path, modality, participant, file_date, sensor, source_path)
+        for file_date, sensor, source_path in sources
+        if source_path in stale
+    ]
+    cube = _concat([kept] + fresh)
+    cube = cube.sort_values(['date', 'sensor', 'source', 'bin'], kind='stable', ignore_index=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cube.astype({'class': 'category', 'source': 'category'}).to_parquet(path, index=False)
+
+    record(manifest, key, inputs, [path])
+    return cube, True
+
+
+def participant_cube(root_path, modality, participant):
+    """The up-to-date cube cells of one participant and modality (see load_cube())."""
+    if not parquet_available():
+        sources = _sources(root_path, modality, participant)
+        return _concat(_source_cells(root_path, modality, participant, *s) for s in sources)
+
+    mpath = manifest_path(root_path, CUBE_DIRNAME)
+    manifest = load_manifest(mpath)
+    cube, changed = _participant_cube(root_path, modality, participant, manifest)
+    if changed:
+        save_manifest(manifest, mpath)
+    return cube
+
+
+# === Queries ===
+
+def load_cube(root_path, modality, participants=None, sensor=None, skip_weekdays=(), refresh=True):
+    """
+    Cube cells of one modality ("OuraRing", "Mocopi" or "SensorLogger") for
+    `participants` (default: every participant folder), optionally only
+    sensors containing `sensor` and without the dates whose weekday() is in
+    skip_weekdays. Each participant's cube is brought up to date first.
+    """
+    if modality not in MODALITIES:
+        raise ValueError(f"unknown modality {modality!r}; expected one of {MODALITIES}")
+    if refresh:
+        refresh_catalog(root_path)
+    if participants is None:
+        participants = catalog_participants(root_path, refresh=False)
+
+    cached = parquet_available()
+    if cached:
+        mpath = manifest_path(root_path, CUBE_DIRNAME)
+        manifest = load_manifest(mpath)
+        changed = False
+
+    frames = []
+    for participant in participants:
+        if cached:
+            cube, updated = _participant_cube(root_path, modality, participant, manifest)
+            changed |= updated
+        else:
+            cube = participant_cube(root_path, modality, participant)
+        if sensor is not None:
+            cube = cube[cube['sensor'].astype(str).str.contains(sensor, regex=False)]
+        if skip_weekdays:
+            cube = cube[~cube['weekday'].isin(list(skip_weekdays))]
+        frames.append(cube)
+
+    if cached and changed:
+        save_manifest(manifest, mpath)
+    return _concat(frames).drop(columns='source')[CUBE_COLUMNS]
+
+
+def bin_of(t, bin_minutes=BIN_MINUTES):
+    """Index of the bin_minutes-wide bin that starts at or before clock time t."""
+    return int(time_to_seconds(t) // (bin_minutes * 60))
+
+
+def rollup(cube, by, bin_minutes=None, sketches=True):
+    """
+    Cells summed to the grain of the `by` columns, in sorted key order, with
+    `mean` and `std` (sample, as pandas computes it) of the value added. With
+    bin_minutes (a multiple of BIN_MINUTES) `bin` is first coarsened to
+    bin_minutes-wide bins: bin b then covers [b * bin_minutes, (b + 1) *
+    bin_minutes) minutes past midnight. Cells with a null key are left out,
+    as groupby() leaves out rows with a null key.
+    """
+    by = list(by)
+    if bin_minutes is not None:
+        if bin_minutes % BIN_MINUTES:
+            raise ValueError(f"bin_minutes must be a multiple of {BIN_MINUTES}")
+        factor = bin_minutes // BIN_MINUTES
+        cube = cube.assign(bin=np.where(cube['bin'] >= 0, cube['bin'] // factor, -1))
+
+    grouped = cube.groupby(by, sort=True)
+    out = grouped.agg(
+        rows=('rows', 'sum'),
+        count=('count', 'sum'),
+        sum=('sum', 'sum'),
+        m2=('m2', 'sum'),
+        min=('min', 'min'),
+        max=('max', 'max'),
+    ).reset_index()
+
+    count = out['count'].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, out['sum'] / count, np.nan)
+    out['mean'] = mean
+
+    # Chan's merge: M2 = sum of the cells' m2 + sum of n_i * (mean_i - mean)^2
+    group_ids = grouped.ngroup().to_numpy()
+    keep = ~pd.isna(group_ids)
+    cell_count = cube['count'].to_numpy(dtype=np.float64)
+    between = keep & (cell_count > 0)
+    gid = group_ids[between].astype(np.int64)
+    cell_mean = cube['sum'].to_numpy(dtype=np.float64)[between] / cell_count[between]
+    out['m2'] += np.bincount(gid, weights=cell_count[between] * (cell_mean - mean[gid]) ** 2, minlength=len(out))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['std'] = np.where(count > 1, np.sqrt(out['m2'] / (count - 1)), np.nan)
+
+    if sketches:
+        lengths = np.array([len(k) for k in cube['sketch_keys']], dtype=np.int64)
+        owner = np.repeat(group_ids[keep].astype(np.int64), lengths[keep])
+        keys = [k for k, use in zip(cube['sketch_keys'], keep) if use]
+        counts = [c for c, use in zip(cube['sketch_counts'], keep) if use]
+        merged = grouped_sketches(
+            owner, len(out),
+            np.concatenate(keys) if keys else np.empty(0, dtype=np.int64),
+            np.concatenate(counts).astype(np.float64) if counts else np.empty(0),
+        )
+        out['sketch_keys'] = [k for k, _ in merged]
+        out['sketch_counts'] = [c for _, c in merged]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bring the aggregate cube of a research root up to date.")
+    parser.add_argument("root", help="Research root folder (the one holding the P0XX folders)")
+    parser.add_argument("--modality", choices=MODALITIES, action="append",
+                        help="Only this modality (repeatable; default: all)")
+    args = parser.parse_args()
+
+    refresh_catalog(args.root)
+    for modality in args.modality or MODALITIES:
+        cube = load_cube(args.root, modality, refresh=False)
+        print(f"{modality}: {len(cube)} cells, {int(cube['rows'].sum())} rows "
+              f"-> {os.path.join(args.root, CUBE_DIRNAME, modality)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Box and violin plots drawn from quantile sketches instead of raw rows.
+
+The BoxPlot and ViolinPlot scripts used to pd.concat every labeled row of
+every participant and hand the frame to seaborn, which does not fit in
+memory for Mocopi or SensorLogger data at 50+ Hz. Here a distribution is one
+row of Common.cube.rollup(): exact count / sum / m2 / min / max and a
+Common.sketch quantile sketch, merged from the per-file cube cells, so the
+memory a plot needs grows with the number of boxes, not of samples.
+
+box_plot() and violin_plot() take such rows and draw what seaborn 0.13's
+boxplot() / violinplot() would (dodged hue levels, split violins, inner
+"box" / "quart", seaborn's gray line color), with:
+
+  - quartiles and median from the sketch (within RELATIVE_ACCURACY of the
+    exact ones), whiskers at the last bucket within 1.5 IQR, the exact
+    min / max where they are within it, one flier per bucket outside;
+  - the violin's Gaussian KDE evaluated on the sketch buckets, weighted by
+    their counts, with Scott's bandwidth from the exact std and count.
+"""
+
+import colorsys
+
+import matplotlib as mpl
+import numpy as np
+import seaborn as sns
+
+from Common.sketch import key_values, sketch_quantiles
+
+WHIS = 1.5
+GRIDSIZE = 100
+
+
+# === Summaries ===
+
+def box_stats(row, whis=WHIS):
+    """ax.bxp() stats (med, q1, q3, whislo, whishi, fliers, mean) for one rollup row."""
+    keys, counts = row['sketch_keys'], row['sketch_counts']
+    # Bucket values are clipped to the exact extremes the cube keeps
+    q1, med, q3 = np.clip(sketch_quantiles(keys, counts, [0.25, 0.5, 0.75]), row['min'], row['max'])
+    iqr = q3 - q1
+    lo, hi = q1 - whis * iqr, q3 + whis * iqr
+
+    values = np.clip(key_values(keys), row['min'], row['max'])
+    inside = values[(values >= lo) & (values <= hi)]
+    return {
+        'med': med,
+        'q1': q1,
+        'q3': q3,
+        'whislo': inside.min() if len(inside) else q1,
+        'whishi': inside.max() if len(inside) else q3,
+        'fliers': np.unique(values[(values < lo) | (values > hi)]),
+        'mean': row['mean'],
+    }
+
+
+def kde_grid(row, cut=2, gridsize=GRIDSIZE, bw_adjust=1):
+    """
+    (support, density) of a Gaussian KDE of one rollup row, over
+    [min - cut * bw, max + cut * bw]. None if the row has fewer than two
+    values or no spread (seaborn draws those as a line).
+    """
+    count, std = row['count'], row['std']
+    if count < 2 or not std > 0:
+        return None
+    bw = std * count ** (-1 / 5) * bw_adjust
+    support = np.linspace(row['min'] - cut * bw, row['max'] + cut * bw, gridsize)
+
+    values = key_values(row['sketch_keys'])
+    weights = np.asarray(row['sketch_counts'], dtype=np.float64) / count
+    z = (support[:, None] - values[None, :]) / bw
+    density = (np.exp(-0.5 * z * z) * weights).sum(axis=1) / (bw * np.sqrt(2 * np.pi))
+    return support, density
+
+
+# === Layout ===
+
+def _levels(summaries, column, order):
+    if order is not None:
+        return list(order)
+    return sorted(summaries[column].dropna().unique())
+
+
+def _colors(palette, levels, color):
+    if isinstance(palette, dict):
+        return [mpl.colors.to_rgb(palette[level]) for level in levels]
+    if palette is None and color is not None:
+        return [mpl.colors.to_rgb(color)] * len(levels)
+    return [mpl.colors.to_rgb(c) for c in sns.color_palette(palette, len(levels))]
+
+
+def _line_color(colors):
+    """seaborn's "auto" line color: a gray at 60% of the darkest fill's lightness."""
+    lightness = [colorsys.rgb_to_hls(*rgb)[1] for rgb in colors]
+    lum = min(lightness) * 0.6
+    return (lum, lum, lum)
+
+
+def _slots(summaries, x, hue, order, hue_order, width, split):
+    """[(row, position, slot width, side, color index)] and the category / hue levels."""
+    categories = _levels(summaries, x, order)
+    hues = _levels(summaries, hue, hue_order) if hue is not None else [None]
+    n_slots = int(np.ceil(len(hues) / 2)) if split and hue is not None else len(hues)
+    slot_width = width / n_slots
+
+    slots = []
+    for _, row in summaries.iterrows():
+        if row[x] not in categories or (hue is not None and row[hue] not in hues):
+            continue
+        h = hues.index(row[hue]) if hue is not None else 0
+        slot = h // 2 if split and hue is not None else h
+        side = (-1 if h % 2 == 0 else 1) if split and hue is not None else 0
+        position = categories.index(row[x]) - width / 2 + slot_width * (slot + 0.5)
+        slots.append((row, position, slot_width, side, h))
+    return slots, categories, hues
+
+
+def _categorical_axis(ax, categories, x, value_label, orient):
+    ticks = np.arange(len(categories))
+    if orient == 'h':
+        ax.set_yticks(ticks, categories)
+        ax.set_ylim(len(categories) - 0.5, -0.5)
+        ax.set_ylabel(x)
+        if value_label is not None:
+            ax.set_xlabel(value_label)
+    else:
+        ax.set_xticks(ticks, categories)
+        ax.set_xlim(-0.5, len(categories) - 0.5)
+        ax.set_xlabel(x)
+        if value_label is not None:
+            ax.set_ylabel(value_label)
+
+
+def _legend(ax, hue, hues):
+    """Legend of the hue levels, from the first artist drawn for each (labeled by the renderer)."""
+    handles, labels = ax.get_legend_handles_labels()
+    by_label = dict(zip(labels, handles))
+    levels = [str(level) for level in hues if str(level) in by_label]
+    ax.legend([by_label[level] for level in levels], levels, title=hue)
+
+
+# === Renderers ===
+
+def box_plot(ax, summaries, x, hue=None, order=None, hue_order=None, palette=None, color=None,
+             orient='v', width=0.8, showfliers=True, value_label=None, legend=True):
+    """
+    Box per (x, hue) rollup row of `summaries` on ax; categories are `order`
+    (default: sorted x values), hue levels are dodged within a category.
+    """
+    slots, categories, hues = _slots(summaries, x, hue, order, hue_order, width, split=False)
+    colors = _colors(palette, hues if hue is not None else categories, color)
+    line_color = _line_color(colors)
+    line = {'color': line_color, 'linewidth': mpl.rcParams['patch.linewidth']}
+    labeled = set()
+
+    for row, position, slot_width, _, h in slots:
+        if row['count'] == 0:
+            continue
+        fill = colors[h] if hue is not None else colors[categories.index(row[x])]
+        artists = ax.bxp(
+            [box_stats(row)], positions=[position], widths=[slot_width * 0.98],
+            vert=orient != 'h', patch_artist=True, showfliers=showfliers, manage_ticks=False,
+            boxprops={'facecolor': fill, 'edgecolor': line_color, 'linewidth': line['linewidth']},
+            medianprops=line, whiskerprops=line, capprops=line,
+            flierprops={'marker': 'o', 'markeredgecolor': line_color, 'markerfacecolor': 'none', 'markersize': 6},
+            capwidths=[slot_width * 0.49],
+        )
+        if hue is not None and h not in labeled:
+            artists['boxes'][0].set_label(str(row[hue]))
+            labeled.add(h)
+
+    _categorical_axis(ax, categories, x, value_label, orient)
+    if hue is not None and legend:
+        _legend(ax, hue, hues)
+    return ax
+
+
+def _draw_violin(ax, row, grid, position, half_width, side, fill, line_color, inner, orient, scale):
+    """Draw one (half) violin from its kde_grid(); returns its body's artist."""
+    linewidth = 1.25 * mpl.rcParams['patch.linewidth']
+    lower = -1 if side <= 0 else 0
+    upper = 1 if side >= 0 else 0
+
+    if grid is None:
+        # One distinct value: a line across the violin's width
+        value = row['min']
+        span = [position + lower * half_width, position + upper * half_width]
+        points = ([value, value], span) if orient == 'h' else (span, [value, value])
+        return ax.plot(*points, color=line_color, linewidth=linewidth)[0]
+
+    support, density = grid
+    extent = density / scale * half_width
+    fill_between = ax.fill_between if orient == 'h' else ax.fill_betweenx
+    body = fill_between(support, position + lower * extent, position + upper * extent,
+                        facecolor=fill, edgecolor=line_color, linewidth=linewidth)
+
+    stats = box_stats(row)
+    if inner is not None and inner.startswith('quart'):
+        for q, dashes in ((stats['q1'], (1.25, 0.75)), (stats['med'], (2.5, 1)), (stats['q3'], (1.25, 0.75))):
+            w = np.interp(q, support, extent)
+            span = [position + lower * w, position + upper * w]
+            points = ([q, q], span) if orient == 'h' else (span, [q, q])
+            ax.plot(*points, color=line_color, linewidth=linewidth, dashes=dashes)
+    elif inner is not None and inner.startswith('box'):
+        box_width = 4.5 * linewidth
+        for span, lw in (([stats['whislo'], stats['whishi']], box_width / 3), ([stats['q1'], stats['q3']], box_width)):
+            points = (span, [position, position]) if orient == 'h' else ([position, position], span)
+            ax.plot(*points, color=line_color, linewidth=lw, solid_capstyle='butt')
+        points = ([stats['med']], [position]) if orient == 'h' else ([position], [stats['med']])
+        ax.plot(*points, marker='|' if orient == 'h' else '_', markersize=box_width / 1.2,
+                markeredgewidth=linewidth, color='white', linestyle='none')
+    return body
+
+
+def violin_plot(ax, summaries, x, hue=None, order=None, hue_order=None, palette=None, color=None,
+                orient='v', width=0.8, split=False, inner='box', cut=2, value_label=None, legend=True):
+    """
+    Violin per (x, hue) rollup row of `summaries` on ax. Violins of one
+    color have the same area (seaborn's density_norm="area": widths are
+    scaled by the highest density of the hue level, or of the category when
+    there is no hue). With split and a hue, hue levels pair up: the first of
+    a pair on the left / upper half, the second on the right / lower half.
+    """
+    slots, categories, hues = _slots(summaries, x, hue, order, hue_order, width, split)
+    colors = _colors(palette, hues if hue is not None else categories, color)
+    line_color = _line_color(colors)
+
+    labeled = set()
+    grids = [kde_grid(row, cut=cut) for row, *_ in slots]
+    color_index = [h if hue is not None else categories.index(row[x]) for row, _, _, _, h in slots]
+    scales = {}
+    for c, grid in zip(color_index, grids):
+        if grid is not None:
+            scales[c] = max(scales.get(c, 0.0), grid[1].max())
+
+    for (row, position, slot_width, side, _), grid, c in zip(slots, grids, color_index):
+        if row['count'] == 0:
+            continue
+        body = _draw_violin(ax, row, grid, position, slot_width / 2 * 0.98, side, colors[c], line_color,
+                            inner, orient, scales.get(c, 1.0))
+        if hue is not None and c not in labeled:
+            body.set_label(str(row[hue]))
+            labeled.add(c)
+
+    _categorical_axis(ax, categories, x, value_label, orient)
+    if hue is not None and legend:
+        _legend(ax, hue, hues)
+    return ax
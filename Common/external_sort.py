@@ -0,0 +1,79 @@
+"""
+Sort CSVs that are too big to hold in memory at once.
+
+Mocopi_All.py used to pd.concat every raw file of a (sensor, date) group and
+sort the result, which holds the whole group in memory. Here the raw files are
+read `chunk_rows` rows at a time instead:
+
+  1. spill_sorted_runs() sorts each chunk and writes it to a run file. While
+     the chunks are already in order (a normal sensor recording), they all go
+     into the same run, so a sorted file becomes a single run.
+  2. merge_sorted_runs() does a k-way merge of the runs, holding only about
+     chunk_rows rows across all of them, and yields the merged rows as
+     sorted dataframes.
+
+Every chunk, of the raw files and of the runs, is read with the same fixed
+`dtype` table and float_precision='round_trip'. Run files are plain CSV
+written with float repr, so a value reads back as the float it was spilled
+as. Per-chunk type inference would make a column integer in one chunk and
+float in another (one NaN is enough), and the merged output would write
+"1" in one place and "1.0" in another. `dtype` should name every column;
+the key is always read as str.
+"""
+
+import os
+
+import pandas as pd
+
+
+def _read_chunks(path, key, chunk_rows, dtype):
+    return pd.read_csv(path, chunksize=chunk_rows, dtype={**dtype, key: str}, float_precision='round_trip')
+
+
+def spill_sorted_runs(paths, key, chunk_rows, run_dir, dtype):
+    """Write the rows of `paths` into sorted run files in run_dir. Returns the run paths."""
+    run_paths = []
+    last_key = None
+    for path in paths:
+        for chunk in _read_chunks(path, key, chunk_rows, dtype):
+            if chunk.empty:
+                continue
+            chunk = chunk.sort_values(by=key, kind='stable')
+            first = chunk[key].iloc[0]
+
+            if last_key is None or first < last_key:
+                run_paths.append(os.path.join(run_dir, f"run-{len(run_paths)}.csv"))
+                chunk.to_csv(run_paths[-1], index=False)
+            else:
+                chunk.to_csv(run_paths[-1], mode='a', header=False, index=False)
+            last_key = chunk[key].iloc[-1]
+    return run_paths
+
+
+def merge_sorted_runs(run_paths, key, chunk_rows, dtype):
+    """
+    Yield the rows of the sorted runs as sorted dataframes of about
+    chunk_rows rows. Each run is read chunk_rows / len(run_paths) rows at a
+    time; every step emits the rows up to the smallest "last key" among the
+    buffered blocks, which empties at least one block.
+    """
+    if not run_paths:
+        return
+    per_run = max(1, chunk_rows // len(run_paths))
+    readers = [_read_chunks(path, key, per_run, dtype) for path in run_paths]
+    buffers = [next(reader, None) for reader in readers]
+
+    while True:
+        live = [i for i, buf in enumerate(buffers) if buf is not None]
+        if not live:
+            return
+        cutoff = min(buffers[i][key].iloc[-1] for i in live)
+
+        parts = []
+        for i in live:
+            buf = buffers[i]
+            upto = buf[key].searchsorted(cutoff, side='right')
+            parts.append(buf.iloc[:upto])
+            buffers[i] = buf.iloc[upto:] if upto < len(buf) else next(readers[i], None)
+
+        yield pd.concat(parts, ignore_index=True).sort_values(by=key, kind='stable').reset_index(drop=True)
@@ -0,0 +1,144 @@
+"""
+Streaming reader for the Apple Health export.xml.
+
+HealthApp.py used to need export.xml flattened to a CSV first, with one
+column per attribute of every element type in the export (/Record/,
+/Workout/, /Me/, ...). It then read all of that and dropped most of it.
+read_export() streams export.xml with iterparse instead. It only keeps
+<Record> and <ActivitySummary> elements whose date is in `allowed_dates`,
+frees every element as soon as it has been read, and turns the kept rows
+into dataframes in batches. Memory grows with the rows kept, not with the
+size of the export.
+
+The frames use the flattened-CSV column names (/Record/@startDate, ...), so
+HealthApp's renaming and labeling code is the same for both inputs, and the
+columns get the types read_csv gave the flattened CSV. Every batch is built
+with the same fixed dtypes (ATTR_DTYPES: text, and float for the
+ActivitySummary quantities, which the CSV always read as float because other
+elements' rows leave them empty). The Record `value` column, which holds
+numbers or category text depending on the type, is parsed once over all the
+kept rows, as read_csv infers a column: float if every value is a number,
+the text otherwise. So a value's format never depends on where a batch
+boundary fell.
+
+Only <Record>s that are direct children of <HealthData> are read, as only
+those had /Record/ columns in the flattened CSV; the ones inside a
+<Correlation> are not, and are not counted in /Record/#id.
+"""
+
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+RECORD_ATTRS = [
+    'creationDate', 'device', 'endDate', 'sourceName', 'sourceVersion',
+    'startDate', 'type', 'unit', 'value',
+]
+ACTIVITY_ATTRS = [
+    'activeEnergyBurned', 'activeEnergyBurnedGoal', 'activeEnergyBurnedUnit',
+    'appleExerciseTime', 'appleExerciseTimeGoal',
+    'appleMoveTime', 'appleMoveTimeGoal',
+    'appleStandHours', 'appleStandHoursGoal',
+    'dateComponents',
+]
+
+# Attributes not listed stay text (object); `value` is parsed in read_export()
+ATTR_DTYPES = {
+    attr: 'float64'
+    for attr in ACTIVITY_ATTRS
+    if attr not in ('activeEnergyBurnedUnit', 'dateComponents')
+}
+
+RECORD_ID_COLUMN = '/Record/#id'
+RECORD_VALUE_COLUMN = '/Record/@value'
+
+
+def _to_frame(rows, prefix, attrs):
+    """Batch of attribute dicts -> dataframe with the ATTR_DTYPES types."""
+    df = pd.DataFrame.from_records(rows, columns=attrs)
+    for col in attrs:
+        if col in ATTR_DTYPES:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(ATTR_DTYPES[col])
+    return df.rename(columns={col: f"{prefix}/@{col}" for col in attrs})
+
+
+def _parse_values(values):
+    """Record values as read_csv reads the column: float if every value is a number, the text otherwise."""
+    numbers = pd.to_numeric(values, errors='coerce')
+    if numbers.notna().sum() == values.notna().sum():
+        return numbers.astype('float64')
+    return values
+
+
+def iter_export_batches(xml_path, allowed_dates, batch_rows=100_000):
+    """
+    Yield ("Record" | "ActivitySummary", dataframe) batches of at most
+    batch_rows rows, Record values still as text. A Record's date is the
+    date part of its startDate, an ActivitySummary's is its dateComponents.
+    Records get a /Record/#id column with their position among the
+    top-level Records of the export.
+    """
+    records, activities = [], []
+    record_index = 0
+    root = None
+    depth = 0
+
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = elem
+            continue
+        depth -= 1
+        # Direct children of the root only (a Correlation's Records are not)
+        if depth != 1:
+            continue
+
+        if elem.tag == "Record":
+            if elem.get('startDate', '')[:10] in allowed_dates:
+                row = {attr: elem.get(attr) for attr in RECORD_ATTRS}
+                row['#id'] = record_index
+                records.append(row)
+            record_index += 1
+        elif elem.tag == "ActivitySummary":
+            if elem.get('dateComponents') in allowed_dates:
+                activities.append({attr: elem.get(attr) for attr in ACTIVITY_ATTRS})
+
+        # Done with this element (and its children): drop it from the tree
+        elem.clear()
+        root.clear()
+
+        if len(records) >= batch_rows:
+            yield "Record", _record_frame(records)
+            records = []
+        if len(activities) >= batch_rows:
+            yield "ActivitySummary", _to_frame(activities, "/ActivitySummary", ACTIVITY_ATTRS)
+            activities = []
+
+    if records:
+        yield "Record", _record_frame(records)
+    if activities:
+        yield "ActivitySummary", _to_frame(activities, "/ActivitySummary", ACTIVITY_ATTRS)
+
+
+def _record_frame(rows):
+    df = _to_frame(rows, "/Record", RECORD_ATTRS)
+    df[RECORD_ID_COLUMN] = [row['#id'] for row in rows]
+    return df
+
+
+def read_export(xml_path, allowed_dates, batch_rows=100_000):
+    """(activityDF, recordDF) for the allowed dates, with flattened-CSV column names."""
+    batches = {"Record": [], "ActivitySummary": []}
+    for tag, df in iter_export_batches(xml_path, allowed_dates, batch_rows):
+        batches[tag].append(df)
+
+    def combine(frames, columns):
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    activityDF = combine(batches["ActivitySummary"], [f"/ActivitySummary/@{a}" for a in ACTIVITY_ATTRS])
+    recordDF = combine(batches["Record"], [f"/Record/@{a}" for a in RECORD_ATTRS] + [RECORD_ID_COLUMN])
+    recordDF[RECORD_VALUE_COLUMN] = _parse_values(recordDF[RECORD_VALUE_COLUMN])
+    return activityDF, recordDF
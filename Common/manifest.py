@@ -0,0 +1,135 @@
+"""
+Incremental-run manifest for the DataLabeling scripts.
+
+Each *_All.py script labels "groups" (a Mocopi (participant, sensor, date), a
+participant's Oura HR file, a SensorLogger file). The manifest is a JSON file
+that remembers, per group key, the size, mtime and (once it has been hashed)
+sha256 of every input it was labeled from (raw files and the schedule CSVs) and the outputs it wrote:
+
+    {"version": 1,
+     "groups": {"P001/HeadDeviceOne/2025-03-10": {
+         "inputs":  {"/.../mocopi_11CCD_20250310_0.csv": {"size": ..., "mtime_ns": ..., "sha256": "..."}, ...},
+         "outputs": ["/.../P001MocopiHeadDeviceOne2025-03-10.csv", ...]}}}
+
+With --incremental a group is skipped when it has the same set of inputs,
+unchanged, and all of its outputs still exist. An input whose size and mtime
+are the same as recorded is unchanged without being read; only one whose
+size or mtime differ is hashed, and it still counts as unchanged if its
+content is. Without --incremental nothing is hashed: a group is recorded
+after it is written, with the size and mtime of its inputs (stat_inputs()),
+which is enough for a later incremental run to skip it.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_DIRNAME = "LabelingManifest"
+MANIFEST_VERSION = 1
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def manifest_path(root_path, script_name):
+    return os.path.join(root_path, MANIFEST_DIRNAME, f"{script_name}.json")
+
+
+def load_manifest(path):
+    if not os.path.isfile(path):
+        return {"version": MANIFEST_VERSION, "groups": {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "groups": {}}
+    return manifest
+
+
+def save_manifest(manifest, path):
+    # Write-then-rename so an interrupted run never leaves a truncated manifest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _same_stat(a, b):
+    return a.get("size") == b.get("size") and a.get("mtime_ns") == b.get("mtime_ns")
+
+
+def stat_inputs(paths):
+    """{size, mtime_ns} of a group's input paths, keyed by str(path); nothing is read."""
+    inputs = {}
+    for p in paths:
+        st = os.stat(p)
+        inputs[str(p)] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return inputs
+
+
+def fingerprint(path, previous=None):
+    """{size, mtime_ns, sha256} of a file, reusing `previous` when it has a hash and size and mtime match."""
+    st = os.stat(path)
+    if previous and "sha256" in previous and _same_stat(previous, {"size": st.st_size, "mtime_ns": st.st_mtime_ns}):
+        return previous
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def fingerprint_inputs(manifest, key, paths):
+    """Fingerprints of a group's input paths, keyed by str(path)."""
+    previous = manifest["groups"].get(key, {}).get("inputs", {})
+    return {str(p): fingerprint(p, previous.get(str(p))) for p in paths}
+
+
+def is_current(manifest, key, inputs):
+    """
+    True if `key` was labeled from exactly these inputs and its outputs are
+    still there. `inputs` may be stat_inputs(): an input with the recorded
+    size and mtime is unchanged as it is, any other one is hashed and
+    compared with the recorded hash. Hashes known or computed are filled
+    into `inputs`, so record() keeps them.
+    """
+    entry = manifest["groups"].get(key)
+    if entry is None:
+        return False
+    old_inputs = entry["inputs"]
+    if set(old_inputs) != set(inputs):
+        return False
+    for p, new in inputs.items():
+        old = old_inputs[p]
+        if _same_stat(old, new):
+            if "sha256" in old:
+                new.setdefault("sha256", old["sha256"])
+            continue
+        if "sha256" not in old:
+            return False
+        if "sha256" not in new:
+            new.update(fingerprint(p))
+        if new["sha256"] != old["sha256"]:
+            return False
+    return all(os.path.exists(p) for p in entry["outputs"])
+
+
+def record(manifest, key, inputs, outputs):
+    manifest["groups"][key] = {"inputs": inputs, "outputs": [str(p) for p in outputs]}
+
+
+def refresh_inputs(manifest, key, inputs):
+    """
+    Store the inputs of a group is_current() skipped, so a touched but
+    unchanged file is not hashed again. True if the entry changed (and the
+    manifest needs saving).
+    """
+    entry = manifest["groups"][key]
+    if entry["inputs"] == inputs:
+        return False
+    entry["inputs"] = inputs
+    return True
+
+
+def recorded_outputs(manifest):
+    """Every output path any group has written (to tell outputs apart from raw inputs)."""
+    return {p for entry in manifest["groups"].values() for p in entry["outputs"]}
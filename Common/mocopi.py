@@ -0,0 +1,301 @@
+"""
+Mocopi device codes, raw file catalog, IMU row validation and 1-second bin
+counters.
+
+DataLabeling/Mocopi.py, Mocopi_All.py and the Counting/Mocopi*.py scripts each
+had their own copy of getSensorLocation(), find_invalid_rows() and the bin
+counting helpers. They live here now:
+
+  - sensor_location() finds the device code of a raw file with one
+    precompiled regex search instead of a substring scan over all 24 codes,
+    and normalize_sensor() collapses a device label to its body location.
+  - raw_catalog() learns every raw file's (sensor, date, first/last
+    Timestamp) from its header, first data line and a tail seek, so grouping
+    files no longer parses them. load_raw_group() reads one group's files
+    when that group is processed.
+  - validate_imu_rows() checks NaN, quaternion range and +/-ACCEL_MAX_G for
+    all seven IMU columns in one chunked pass, with per-reason row counts
+    next to the mask. find_invalid_rows() is the mask alone.
+  - compute_bin_array() / compute_bins_true_count() count samples per
+    unix-epoch second with one np.bincount (Common.coverage.second_bins).
+
+Importing this module only adds os/re/datetime and Common.coverage on top of
+numpy/pandas, which every script that uses it has loaded already.
+"""
+
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Common.coverage import second_bins
+
+DEVICE_LOCATIONS = {
+    "11CCD": "HeadDeviceOne",
+    "132D3": "HeadDeviceTwo",
+    "1092A": "HeadDeviceThree",
+    "13CF2": "HeadDeviceFour",
+    "12144": "HipDeviceOne",
+    "114C8": "HipDeviceTwo",
+    "10B1F": "HipDeviceThree",
+    "1211E": "HipDeviceFour",
+    "0E3E9": "WristRDeviceOne",
+    "0EE55": "WristRDeviceTwo",
+    "12801": "WristRDeviceThree",
+    "0EA70": "WristRDeviceFour",
+    "14A51": "WristLDeviceOne",
+    "134F5": "WristLDeviceTwo",
+    "1447A": "WristLDeviceThree",
+    "14A53": "WristLDeviceFour",
+    "1503C": "AnkleRDeviceOne",
+    "13B8F": "AnkleRDeviceTwo",
+    "13B06": "AnkleRDeviceThree",
+    "158A6": "AnkleRDeviceFour",
+    "16E17": "AnkleLDeviceOne",
+    "16FB1": "AnkleLDeviceTwo",
+    "142A8": "AnkleLDeviceThree",
+    "16CA7": "AnkleLDeviceFour",
+}
+
+_DEVICE_CODE_RE = re.compile("|".join(DEVICE_LOCATIONS))
+_DEVICE_NUMBER_RE = re.compile(r'(Device)(One|Two|Three|Four)$')
+
+ROTATION_COLUMNS = ['Rotation X', 'Rotation Y', 'Rotation Z', 'Rotation W']
+ACCELERATION_COLUMNS = ['Acceleration X', 'Acceleration Y', 'Acceleration Z']
+IMU_COLUMNS = ROTATION_COLUMNS + ACCELERATION_COLUMNS
+
+# How raw files are read for labeling, whole (load_raw_group) or streamed
+# (Common.external_sort): one dtype per column and correctly rounded floats,
+# so both write the same text and a value writes back as it was in the raw file
+RAW_DTYPES = {'Timestamp': str, **{col: 'float64' for col in IMU_COLUMNS}}
+
+# Quaternion components must fall within [-1, 1]. Adjust if your rotation
+# columns are not normalized quaternion components.
+ROTATION_MIN, ROTATION_MAX = -1.0, 1.0
+
+# Acceleration "impossible value" bound, in g's. Mocopi-style IMUs typically
+# report in the +/-16g range; tune this to your actual sensor spec.
+ACCEL_MAX_G = 16.0
+
+# Per-column bounds in IMU_COLUMNS order
+IMU_LOWER = np.array([ROTATION_MIN] * 4 + [-ACCEL_MAX_G] * 3)
+IMU_UPPER = np.array([ROTATION_MAX] * 4 + [ACCEL_MAX_G] * 3)
+
+# Rows per chunk of validate_imu_rows()'s range check
+VALIDATE_CHUNK_ROWS = 1 << 16
+
+MOCOPI_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Enough of the end of a raw file to hold its last line
+PEEK_TAIL_BYTES = 64 * 1024
+
+# Keys of validate_imu_rows()'s counts. A row can count under several reasons.
+INVALID_REASONS = ('timestamp', 'missing_column', 'not_numeric', 'rotation_range', 'acceleration_range')
+
+
+# === Device codes ===
+
+def sensor_location(file_name):
+    """
+    Device label (e.g. "HeadDeviceOne") for the first device code that
+    appears in a raw file name/path (mocopi_11CCD_20250310_0.csv), or "None".
+    """
+    match = _DEVICE_CODE_RE.search(str(file_name))
+    return DEVICE_LOCATIONS[match.group(0)] if match else "None"
+
+
+def normalize_sensor(label):
+    """Strip trailing device number suffix: AnkleLDeviceOne -> AnkleLDevice
+    This collapses the 24 raw device codes down to the 6 physical sensor
+    locations: HeadDevice, HipDevice, WristRDevice, WristLDevice,
+    AnkleRDevice, AnkleLDevice.
+    """
+    return _DEVICE_NUMBER_RE.sub(r'\1', label)
+
+
+# === Raw file catalog ===
+
+def _field(line, index):
+    """Field `index` of a CSV line (bytes), or None if the line has fewer fields."""
+    fields = line.decode('utf-8', errors='replace').rstrip('\r\n').split(',')
+    return fields[index].strip() if index < len(fields) else None
+
+
+def peek_raw_file(path, timestamp_col='Timestamp'):
+    """
+    (first, last) Timestamp strings of a raw Mocopi CSV, from its header, its
+    first data line and the last line of its last PEEK_TAIL_BYTES. (None, None)
+    if the file has no data rows; ValueError if it has no `timestamp_col`.
+    """
+    with open(path, 'rb') as f:
+        header = [c.strip() for c in f.readline().decode('utf-8', errors='replace').rstrip('\r\n').split(',')]
+        first_line = f.readline()
+        if not first_line.strip():
+            return None, None
+        f.seek(max(os.fstat(f.fileno()).st_size - PEEK_TAIL_BYTES, f.tell()))
+        tail = f.read().rstrip(b'\r\n')
+
+    if timestamp_col not in header:
+        raise ValueError(f"{path}: no {timestamp_col} column in the header")
+    index = header.index(timestamp_col)
+    last_line = tail.rsplit(b'\n', 1)[-1] if tail else first_line
+    return _field(first_line, index), _field(last_line, index)
+
+
+def raw_catalog(raw_parent_path):
+    """
+    One {path, sensor, date, first, last} entry per raw file in the day folders
+    of raw_parent_path (P0XX/Mocopi/Raw), in listing order. `date` is the date
+    of the file's first Timestamp; first/last are its Timestamp range. Files
+    without data rows are left out.
+    """
+    catalog = []
+    for dir_name in os.listdir(raw_parent_path):
+        folder_path = Path(raw_parent_path) / dir_name
+        if not folder_path.is_dir():
+            continue
+        for path in folder_path.iterdir():
+            first, last = peek_raw_file(path)
+            if first is None:
+                continue
+            catalog.append({
+                'path': path,
+                'sensor': sensor_location(path),
+                'date': datetime.strptime(first, MOCOPI_TIMESTAMP_FORMAT).strftime("%Y-%m-%d"),
+                'first': first,
+                'last': last,
+            })
+    return catalog
+
+
+def group_catalog(catalog):
+    """{(sensor, date): [paths]}, groups and paths in catalog order."""
+    groups = {}
+    for entry in catalog:
+        groups.setdefault((entry['sensor'], entry['date']), []).append(entry['path'])
+    return groups
+
+
+def load_raw_group(files):
+    """One (sensor, date) group's raw files as a single frame in Timestamp order."""
+    dfs = [pd.read_csv(file, dtype=RAW_DTYPES, float_precision='round_trip') for file in files]
+    return pd.concat(dfs, ignore_index=True).sort_values(by="Timestamp").reset_index(drop=True)
+
+
+# === Invalid-data detection ===
+
+def imu_arrays(df):
+    """
+    One float array per IMU column, in IMU_COLUMNS order, or None where df
+    lacks the column. Numeric columns are used as they are (no copy, float32
+    stays float32); text columns go through pd.to_numeric, so values that
+    are not numbers become NaN.
+    """
+    arrays = []
+    for col in IMU_COLUMNS:
+        if col not in df.columns:
+            arrays.append(None)
+        elif isinstance(df[col].dtype, np.dtype) and df[col].dtype.kind in 'biuf':
+            arrays.append(df[col].to_numpy())
+        else:
+            arrays.append(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan))
+    return arrays
+
+
+def validate_imu_rows(df, timestamp_col='Old Timestamp'):
+    """
+    (invalid, counts): a bool array that is True for rows where the
+    Timestamp does not parse or any of Rotation X/Y/Z/W, Acceleration X/Y/Z
+    is missing, not numeric or outside a physically plausible range, and
+    {reason: rows} for every reason in INVALID_REASONS. A missing column
+    makes every row invalid.
+
+    The range check fills one (7, VALIDATE_CHUNK_ROWS) "value is in range"
+    buffer per chunk straight from the columns and reduces it over the seven
+    columns, so no full-length temporary is made per column.
+    """
+    n_rows = len(df)
+    arrays = imu_arrays(df)
+    present = np.array([values is not None for values in arrays])
+
+    # NaN fails both comparisons, so this one pass finds every value that is
+    # missing, not numeric or out of range
+    invalid = np.empty(n_rows, dtype=bool)
+    width = min(n_rows, VALIDATE_CHUNK_ROWS)
+    in_range = np.zeros((len(IMU_COLUMNS), width), dtype=bool)
+    below_upper = np.empty(width, dtype=bool)
+    for start in range(0, n_rows, VALIDATE_CHUNK_ROWS):
+        stop = min(start + VALIDATE_CHUNK_ROWS, n_rows)
+        width = stop - start
+        for j, values in enumerate(arrays):
+            if values is None:
+                continue
+            np.greater_equal(values[start:stop], IMU_LOWER[j], out=in_range[j, :width])
+            np.less_equal(values[start:stop], IMU_UPPER[j], out=below_upper[:width])
+            in_range[j, :width] &= below_upper[:width]
+        np.logical_not(in_range[:, :width].all(axis=0), out=invalid[start:stop])
+
+    # Telling the reasons apart only needs the (few) rows that failed
+    failed_rows = np.flatnonzero(invalid)
+    failed = np.full((len(IMU_COLUMNS), len(failed_rows)), np.nan)
+    for j, values in enumerate(arrays):
+        if values is not None:
+            failed[j] = values[failed_rows]
+    nan = np.isnan(failed)
+    out_of_range = ~((failed >= IMU_LOWER[:, None]) & (failed <= IMU_UPPER[:, None])) & ~nan
+
+    counts = dict.fromkeys(INVALID_REASONS, 0)
+    counts['not_numeric'] = int(nan[present].any(axis=0).sum())
+    counts['rotation_range'] = int(out_of_range[:4].any(axis=0).sum())
+    counts['acceleration_range'] = int(out_of_range[4:].any(axis=0).sum())
+
+    if timestamp_col in df.columns:
+        bad_timestamp = pd.to_datetime(
+            df[timestamp_col], format=MOCOPI_TIMESTAMP_FORMAT, errors='coerce'
+        ).isna().to_numpy()
+        counts['timestamp'] = int(bad_timestamp.sum())
+        invalid |= bad_timestamp
+    if timestamp_col not in df.columns or not present.all():
+        counts['missing_column'] = n_rows
+        invalid[:] = True
+
+    return invalid, counts
+
+
+def find_invalid_rows(df, timestamp_col='Old Timestamp'):
+    """validate_imu_rows()'s mask as a boolean Series aligned to df's index."""
+    invalid, _ = validate_imu_rows(df, timestamp_col)
+    return pd.Series(invalid, index=df.index)
+
+
+# === 1-second bins ===
+
+def compute_bin_array(df, time_col='time', threshold=50, start_sec=None, end_sec=None):
+    """
+    Breaks [start_sec, end_sec] (inclusive) into 1-second bins and returns
+    (start_sec, bins), where bins[k] is True iff unix-epoch second
+    start_sec + k contains >= `threshold` datapoints.
+
+    Passing explicit start_sec/end_sec lets "before" and "after" invalid-row
+    removal be compared over the exact same bin range, so bins that lose all
+    their data due to invalid rows correctly become False rather than
+    disappearing from the comparison.
+    """
+    if start_sec is None or end_sec is None:
+        if df.empty:
+            return 0, np.zeros(0, dtype=bool)
+        start_sec = int(df[time_col].min())
+        end_sec = int(df[time_col].max())
+
+    return int(start_sec), second_bins(df[time_col].to_numpy(), start_sec, end_sec, threshold)
+
+
+def compute_bins_true_count(filtered_df, time_col='time', threshold=50,
+                            start_sec=None, end_sec=None):
+    """(true_bin_count, total_bin_count) of compute_bin_array()."""
+    _, bins = compute_bin_array(filtered_df, time_col=time_col, threshold=threshold,
+                                start_sec=start_sec, end_sec=end_sec)
+    return int(bins.sum()), len(bins)
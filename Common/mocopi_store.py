@@ -0,0 +1,224 @@
+"""
+Columnar cache of the Mocopi Labeled data.
+
+DataLabeling/Mocopi_All.py writes every labeled (sensor, date) group twice:
+the usual P0XX/Mocopi/Labeled/{date}/P0XXMocopi{Sensor}{date}.csv and a
+Parquet part under
+
+    {root}/Mocopi_Parquet/participant=P0XX/date=YYYY-MM-DD/sensor={Sensor}/part-0.parquet
+
+The Parquet part only holds typed columns: categorical `class`, int64 `time`,
+float64 `Seconds_In_PST` (seconds since midnight of the Time_In_PST wall
+clock) and the IMU channels as float32. No object-dtype time strings.
+
+The HeatMaps/Mocopi scripts read through iter_labeled()/load_labeled(), which
+prune partitions from the directory names (participant, weekday of the date,
+sensor substring) before opening anything and only read the columns asked
+for. Writing and reading Parquet needs pyarrow; without it, or for a
+participant that has no cache yet, the loader falls back to the Labeled CSVs
+and reads them with the cache's dtypes (Common.csv_profiles 'mocopi_labeled').
+Only Mocopi_All.py refreshes the cache, so after relabeling with another
+script delete Mocopi_Parquet (or re-run Mocopi_All.py) before making plots.
+"""
+
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from Common.catalog import catalog_files
+from Common.csv_profiles import read_profile
+from Common.mocopi import IMU_COLUMNS
+from Common.schedules import seconds_of_day
+
+PARQUET_DIRNAME = "Mocopi_Parquet"
+PART_FILENAME = "part-0.parquet"
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def labeled_parquet_path(root_path, participant, date_str, sensor_label):
+    return os.path.join(
+        root_path, PARQUET_DIRNAME,
+        f"participant={participant}", f"date={date_str}", f"sensor={sensor_label}",
+        PART_FILENAME,
+    )
+
+
+def to_typed_frame(df):
+    """Cache columns for one labeled Mocopi dataframe (as written to Labeled CSV)."""
+    typed = pd.DataFrame({
+        'class': df['class'].astype('category'),
+        'time': df['time'].astype('int64'),
+        'Seconds_In_PST': seconds_of_day(df['Time_In_PST']),
+    })
+    for col in IMU_COLUMNS:
+        if col in df.columns:
+            typed[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    return typed
+
+
+def write_labeled_parquet(df, root_path, participant, date_str, sensor_label):
+    path = labeled_parquet_path(root_path, participant, date_str, sensor_label)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    to_typed_frame(df).to_parquet(path, index=False)
+    return path
+
+
+def append_labeled_parquet(writer, df, root_path, participant, date_str, sensor_label):
+    """
+    Streaming version of write_labeled_parquet(): add `df` as a row group of
+    the part file. Pass writer=None for the first chunk, keep the returned
+    writer for the next ones and close() it at the end.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(to_typed_frame(df), preserve_index=False)
+    # Each chunk has its own set of classes, so pin the dictionary index type
+    table = table.set_column(
+        table.schema.get_field_index('class'), 'class',
+        table.column('class').cast(pa.dictionary(pa.int32(), pa.string())),
+    )
+    if writer is None:
+        path = labeled_parquet_path(root_path, participant, date_str, sensor_label)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer = pq.ParquetWriter(path, table.schema)
+    writer.write_table(table)
+    return writer
+
+
+def _partition_value(dir_name, key):
+    prefix = f"{key}="
+    return dir_name[len(prefix):] if dir_name.startswith(prefix) else None
+
+
+def _keep(file_date, sensor_label, sensor, skip_weekdays):
+    if skip_weekdays and file_date.weekday() in skip_weekdays:
+        return False
+    if sensor is not None and sensor not in sensor_label:
+        return False
+    return True
+
+
+def _parquet_parts(root_path, participant):
+    """(date, sensor_label, path) for every cached part of one participant."""
+    participant_dir = os.path.join(root_path, PARQUET_DIRNAME, f"participant={participant}")
+    for date_dir in sorted(os.listdir(participant_dir)):
+        date_str = _partition_value(date_dir, "date")
+        if date_str is None:
+            continue
+        for sensor_dir in sorted(os.listdir(os.path.join(participant_dir, date_dir))):
+            sensor_label = _partition_value(sensor_dir, "sensor")
+            path = os.path.join(participant_dir, date_dir, sensor_dir, PART_FILENAME)
+            if sensor_label is not None and os.path.isfile(path):
+                yield datetime.strptime(date_str, "%Y-%m-%d").date(), sensor_label, path
+
+
+def _csv_parts(root_path, participant):
+    """(date, sensor_label, path) for every Labeled CSV of one participant, from the file catalog."""
+    for entry in catalog_files(root_path, modality="Mocopi", kind="Labeled", participants=[participant]):
+        if entry['sensor'] is not None:
+            yield entry['date'], entry['sensor'], entry['path']
+
+
+def _read_csv_part(path, columns):
+    wanted = set(columns) if columns is not None else None
+    if wanted is not None and 'Seconds_In_PST' in wanted:
+        wanted = (wanted - {'Seconds_In_PST'}) | {'Time_In_PST'}
+
+    df = read_profile(path, 'mocopi_labeled', columns=wanted)
+    if wanted is not None and not wanted.issubset(df.columns):
+        return None
+
+    if columns is None or 'Seconds_In_PST' in columns:
+        df['Seconds_In_PST'] = seconds_of_day(df['Time_In_PST'].astype(str))
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def labeled_parts(root_path, participant):
+    """
+    [(date, sensor_label, path)] of one participant's labeled groups: the
+    Parquet parts when the participant is cached (and pyarrow is installed),
+    otherwise the Labeled CSVs.
+    """
+    cache_dir = os.path.join(root_path, PARQUET_DIRNAME, f"participant={participant}")
+    if parquet_available() and os.path.isdir(cache_dir):
+        return list(_parquet_parts(root_path, participant))
+    return list(_csv_parts(root_path, participant))
+
+
+def read_part(path, columns=None):
+    """
+    A group's rows from a path labeled_parts() gave, reading only `columns`;
+    None for a CSV that lacks one of them.
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return _read_csv_part(path, columns)
+
+
+def list_participants(root_path):
+    """Participant folders (P0XX) that have either a cache or Labeled CSVs."""
+    found = set()
+    cache_dir = os.path.join(root_path, PARQUET_DIRNAME)
+    if os.path.isdir(cache_dir):
+        for d in os.listdir(cache_dir):
+            value = _partition_value(d, "participant")
+            if value:
+                found.add(value)
+    if os.path.isdir(root_path):
+        found.update(entry['participant'] for entry in catalog_files(root_path, modality="Mocopi", kind="Labeled"))
+    return sorted(found)
+
+
+def iter_labeled(root_path, columns=None, participants=None, sensor=None, skip_weekdays=()):
+    """
+    Yield (participant, date, sensor_label, df) for each labeled (sensor, date)
+    group, one per Labeled CSV, reading only `columns`.
+
+    participants:  only these participant folders (default: all)
+    sensor:        substring the sensor label must contain, e.g. "Head"
+    skip_weekdays: date.weekday() values to leave out, e.g. (4,) for Fridays
+    """
+    if participants is None:
+        participants = list_participants(root_path)
+
+    for participant in participants:
+        for file_date, sensor_label, path in labeled_parts(root_path, participant):
+            if not _keep(file_date, sensor_label, sensor, skip_weekdays):
+                continue
+            df = read_part(path, columns)
+            if df is None:
+                continue
+            yield participant, file_date, sensor_label, df
+
+
+def load_labeled(root_path, columns=None, participants=None, sensor=None, skip_weekdays=()):
+    """
+    All matching groups concatenated into one dataframe, with `participant`,
+    `date` and `sensor` columns added from the partition keys.
+    """
+    frames = []
+    for participant, file_date, sensor_label, df in iter_labeled(
+        root_path, columns=columns, participants=participants,
+        sensor=sensor, skip_weekdays=skip_weekdays,
+    ):
+        df = df.copy()
+        df['participant'] = participant
+        df['date'] = file_date
+        df['sensor'] = sensor_label
+        frames.append(df)
+
+    if not frames:
+        empty_cols = list(columns or []) + ['participant', 'date', 'sensor']
+        return pd.DataFrame(columns=empty_cols)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,125 @@
+"""
+Cached labeled Oura Ring heart rate data for the TimeCheck scripts.
+
+TimeCheck/SizeSweep.py, bins.py and TimeOura.py all start from what
+DataLabeling/OuraRingHR_All.py computes: RAW file -> Pacific time and date of
+every sample -> schedule class of every sample. load_labeled() does that once
+per participant and keeps the result as
+
+    {root}/OuraHR_Parquet/P0XX.parquet
+
+with typed columns only: `date` (Pacific calendar date), categorical `class`
+(stripped, DELETE rows kept), int64 `time` (unix seconds), float64
+`Seconds_In_PST` (seconds since Pacific midnight) and the other RAW columns
+(bpm, source). No ISO or clock-time strings.
+
+The cache is keyed through Common.manifest (LabelingManifest/OuraHR_Parquet.json)
+by the sha256 of the RAW file and of every schedule file the participant
+uses, plus LABEL_VERSION, which must be bumped whenever the labeling itself
+changes. A changed RAW file or schedule relabels that participant on the next
+load; a load from the cache writes the manifest only when it refreshes the
+stat of a touched input. Without pyarrow the data is labeled in memory on every load.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from Common.manifest import (
+    fingerprint_inputs, is_current, load_manifest, manifest_path, record, refresh_inputs, save_manifest,
+)
+from Common.mocopi_store import parquet_available
+from Common.schedules import label_classes, participant_schedule_paths, schedule_for
+from Common.timestamps import parse_oura_timestamps, split_by_date
+
+CACHE_DIRNAME = "OuraHR_Parquet"
+LABEL_VERSION = 1
+
+
+def raw_hr_path(root_path, participant):
+    return os.path.join(root_path, participant, "OuraRing", "HeartRate", f"{participant}OrHrRAW.csv")
+
+
+def cache_path(root_path, participant):
+    return os.path.join(root_path, CACHE_DIRNAME, f"{participant}.parquet")
+
+
+def label_raw_hr(rawData, participant, schedules_dir):
+    """
+    Typed labeled frame for a RAW HR dataframe, in RAW row order. Classes are
+    the ones OuraRingHR_All.py assigns (first matching schedule row of the
+    sample's Pacific weekday, "NONE" outside the schedule).
+    """
+    stamps = parse_oura_timestamps(rawData['timestamp'])
+    seconds = stamps['seconds']
+
+    labels = np.full(len(rawData), "NONE", dtype=object)
+    for weekday in np.unique(stamps['weekday']):
+        schedule = schedule_for(schedules_dir, participant, int(weekday))
+        if schedule is None:
+            continue
+        rows = stamps['weekday'] == weekday
+        labels[rows] = label_classes(seconds[rows], schedule)
+
+    labeled = pd.DataFrame({
+        'date': stamps['date'],
+        'class': pd.Series(labels, dtype=object).str.strip().astype('category'),
+        'time': stamps['unix'],
+        'Seconds_In_PST': seconds,
+    })
+    for col in rawData.columns:
+        if col != 'timestamp':
+            labeled[col] = rawData[col].to_numpy()
+    return labeled
+
+
+def load_labeled(root_path, participant, schedules_dir=None):
+    """
+    Labeled rows (DELETE included) of a participant folder's (e.g. "P001")
+    RAW HR file: from the cache when it is current, otherwise labeled now and
+    cached. None if the participant has no RAW file.
+    """
+    raw_path = raw_hr_path(root_path, participant)
+    if not os.path.exists(raw_path):
+        return None
+    if schedules_dir is None:
+        schedules_dir = os.path.join(root_path, "Schedules")
+    if not parquet_available():
+        return label_raw_hr(pd.read_csv(raw_path), participant, schedules_dir)
+
+    mpath = manifest_path(root_path, CACHE_DIRNAME)
+    manifest = load_manifest(mpath)
+    key = f"{participant}/v{LABEL_VERSION}"
+    inputs = fingerprint_inputs(manifest, key, [raw_path] + participant_schedule_paths(schedules_dir, participant))
+
+    path = cache_path(root_path, participant)
+    if is_current(manifest, key, inputs):
+        # A hit writes the manifest only to keep the stat of touched inputs
+        if refresh_inputs(manifest, key, inputs):
+            save_manifest(manifest, mpath)
+        return pd.read_parquet(path)
+
+    labeled = label_raw_hr(pd.read_csv(raw_path), participant, schedules_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    labeled.to_parquet(path, index=False)
+    record(manifest, key, inputs, [path])
+    save_manifest(manifest, mpath)
+    return labeled
+
+
+def labeled_days(root_path, participant, drop_delete=True, schedules_dir=None):
+    """
+    {date: that Pacific date's labeled rows}, in date order, like the per-day
+    frames of OuraRingHR_All.py. With drop_delete the DELETE rows are removed
+    after the split, so a day that only had DELETE rows is still there, empty.
+    {} if the participant has no RAW file.
+    """
+    labeled = load_labeled(root_path, participant, schedules_dir)
+    if labeled is None:
+        return {}
+
+    days = split_by_date(labeled, labeled['date'].to_numpy().astype('datetime64[D]'))
+    if drop_delete:
+        days = {day: df[df['class'] != 'DELETE'].reset_index(drop=True) for day, df in days.items()}
+    return days
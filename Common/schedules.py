@@ -0,0 +1,193 @@
+"""
+Schedule-labeling engine.
+
+A schedData_*.csv file is a list of (TimeStart, TimeEnd, Class) rows, and a
+sample belongs to a row when TimeStart < Time_In_PST <= TimeEnd. Instead of
+checking every sample against every schedule row, a schedule is compiled once
+into a sorted array of boundary seconds plus one class code per segment
+between consecutive boundaries. Labeling a whole day is then a single
+np.searchsorted over the samples' seconds-of-day.
+
+The registry at the bottom (SCHEDULE_FILES, schedule_for(), ...) is the one
+place that knows which file applies to which participant on which weekday.
+Every schedule file is read and compiled at most once per process, so
+scripts that label many files or days just look the schedule up.
+"""
+
+import os
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+def time_to_seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
+
+
+def seconds_of_day(values):
+    """
+    Convert a column of clock times to float seconds since midnight.
+
+    Accepts datetime.time objects (what the labeling scripts store in
+    Time_In_PST) or "HH:MM:SS[.ffffff]" strings (what comes back when a
+    Labeled CSV is read).
+    """
+    values = pd.Series(values)
+    if values.empty:
+        return np.empty(0, dtype=np.float64)
+    if isinstance(values.iloc[0], time):
+        return np.fromiter((time_to_seconds(t) for t in values), dtype=np.float64, count=len(values))
+    return pd.to_timedelta(values.astype(str)).dt.total_seconds().to_numpy(dtype=np.float64)
+
+
+def compile_schedule(scheduleData, first_match=True):
+    """
+    Compile a schedule dataframe (TimeStart, TimeEnd, Class) for labeling.
+
+    Returns (boundaries, segment_codes, classes):
+      - boundaries:    sorted unique start/end seconds of every schedule row
+      - segment_codes: for each (boundaries[k], boundaries[k + 1]] segment,
+                       the index into `classes` of the row that labels it,
+                       or -1 if no row covers it
+      - classes:       the Class column, in file order
+
+    Every time inside one segment is covered by exactly the same set of rows,
+    so overlapping rows are resolved here once. first_match=True keeps the
+    first covering row in file order (the itertuples()/break loop used by the
+    Oura scripts); first_match=False keeps the last one (the np.where loop used
+    by the Mocopi/HealthApp scripts).
+    """
+    starts = seconds_of_day(scheduleData['TimeStart'].astype(str).str.strip())
+    ends = seconds_of_day(scheduleData['TimeEnd'].astype(str).str.strip())
+    classes = scheduleData['Class'].to_numpy(dtype=object)
+
+    boundaries = np.unique(np.concatenate([starts, ends]))
+    segment_codes = np.full(max(len(boundaries) - 1, 0), -1, dtype=np.int64)
+
+    row_order = range(len(classes)) if first_match else reversed(range(len(classes)))
+    for i in row_order:
+        covered = (boundaries[:-1] >= starts[i]) & (boundaries[1:] <= ends[i]) & (segment_codes == -1)
+        segment_codes[covered] = i
+
+    return boundaries, segment_codes, classes
+
+
+def lookup_codes(seconds, compiled):
+    """Row index of the schedule row covering each time, or -1 where none does."""
+    boundaries, segment_codes, _ = compiled
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if len(boundaries) < 2:
+        return np.full(len(seconds), -1, dtype=np.int64)
+
+    # side='left' puts t in the segment (boundaries[k], boundaries[k + 1]],
+    # matching the schedule's TimeStart < t <= TimeEnd rule.
+    segment = np.searchsorted(boundaries, seconds, side='left') - 1
+    inside = (segment >= 0) & (segment < len(segment_codes))
+    codes = np.full(len(seconds), -1, dtype=np.int64)
+    codes[inside] = segment_codes[segment[inside]]
+    return codes
+
+
+def label_classes(seconds, compiled, default="NONE"):
+    """
+    Class label for each seconds-of-day value, or `default` where no schedule
+    row covers it. Returns an object array ready to assign to df['class'].
+    """
+    _, _, classes = compiled
+    codes = lookup_codes(seconds, compiled)
+    labels = np.full(len(codes), default, dtype=object)
+    matched = codes >= 0
+    labels[matched] = classes[codes[matched]]
+    return labels
+
+
+# === Schedule registry ===
+
+# Which schedData file applies to which participants on which weekdays
+# (Monday=0). Later entries override earlier ones, which is how P14/P16 get
+# their own Tuesday. Weekends use the M-TH file, like the labeling scripts.
+SCHEDULE_FILES = {
+    'schedData_P(01,02,03,06,07,08,12)_FR.csv':   {'participants': ['01', '02', '03', '06', '07', '08', '12'], 'weekdays': [4]},
+    'schedData_P(01,02,03,06,07,08,12)_M-TH.csv': {'participants': ['01', '02', '03', '06', '07', '08', '12'], 'weekdays': [0, 1, 2, 3, 5, 6]},
+    'schedData_P(04,05,09,14,16)_FR.csv':          {'participants': ['04', '05', '09', '14', '16'], 'weekdays': [4]},
+    'schedData_P(04,05,09,14,16)_M-TH.csv':        {'participants': ['04', '05', '09', '14', '16'], 'weekdays': [0, 1, 2, 3, 5, 6]},
+    'schedData_P(14,16)TU.csv':                    {'participants': ['14', '16'], 'weekdays': [1]},
+}
+
+# (participant, weekday) -> schedule file name
+SCHEDULE_BY_DAY = {
+    (participant, weekday): fname
+    for fname, info in SCHEDULE_FILES.items()
+    for participant in info['participants']
+    for weekday in info['weekdays']
+}
+
+
+def participant_id(participant):
+    """Two-digit id used in the schedule file names: 'P004', 'P04', '04' and 4 all give '04'."""
+    return f"{int(str(participant).lstrip('Pp')):02d}"
+
+
+def scheduled_participants():
+    """Two-digit ids of every participant that has a schedule."""
+    return sorted({participant for participant, _ in SCHEDULE_BY_DAY})
+
+
+def schedule_path(schedules_dir, participant, weekday):
+    """Schedule CSV for a participant on a weekday (Monday=0), or None if they have none."""
+    fname = SCHEDULE_BY_DAY.get((participant_id(participant), weekday))
+    return None if fname is None else os.path.join(schedules_dir, fname)
+
+
+def participant_schedule_paths(schedules_dir, participant):
+    """Every schedule CSV a participant's labels depend on (e.g. as incremental-run inputs)."""
+    paths = {schedule_path(schedules_dir, participant, weekday) for weekday in range(7)}
+    return sorted(path for path in paths if path is not None)
+
+
+@lru_cache(maxsize=None)
+def _read_schedule(path):
+    scheduleData = pd.read_csv(path)
+    scheduleData.columns = scheduleData.columns.str.strip()
+    return scheduleData
+
+
+def read_schedule(path):
+    """The schedule CSV as a dataframe (a copy; the file itself is only read once)."""
+    return _read_schedule(path).copy()
+
+
+@lru_cache(maxsize=None)
+def compiled_schedule(path, first_match=True):
+    """compile_schedule() of a schedule CSV, compiled once per process."""
+    return compile_schedule(_read_schedule(path), first_match)
+
+
+@lru_cache(maxsize=None)
+def schedule_for(schedules_dir, participant, weekday, first_match=True):
+    """Compiled schedule for a participant on a weekday, or None if they have none."""
+    path = schedule_path(schedules_dir, participant, weekday)
+    return None if path is None else compiled_schedule(path, first_match)
+
+
+@lru_cache(maxsize=None)
+def schedule_blocks(path):
+    """
+    The rows of a schedule CSV as ((start, end, class), ...) with datetime.time
+    start/end and the class name stripped ('' when missing), in file order.
+    DELETE rows are kept; callers drop what they don't count.
+    """
+    scheduleData = _read_schedule(path)
+    starts = seconds_of_day(scheduleData['TimeStart'].astype(str).str.strip())
+    ends = seconds_of_day(scheduleData['TimeEnd'].astype(str).str.strip())
+    classes = scheduleData['Class'].fillna('').astype(str).str.strip()
+    return tuple(
+        (_seconds_to_time(start), _seconds_to_time(end), class_name)
+        for start, end, class_name in zip(starts, ends, classes)
+    )
+
+
+def _seconds_to_time(seconds):
+    return (datetime.min + timedelta(seconds=float(seconds))).time()
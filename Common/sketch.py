@@ -0,0 +1,94 @@
+"""
+Mergeable quantile sketch for bpm and acceleration magnitudes.
+
+A sketch is a pair of arrays (keys, counts): how many values fell in each
+logarithmic bucket. Bucket k holds the values in (GAMMA**(k-1), GAMMA**k], so
+any value read back from a bucket is within RELATIVE_ACCURACY of the values
+that went in (the DDSketch construction). Values below MIN_VALUE, including
+exact zeros, share the bucket ZERO_KEY and read back as 0; the sketched
+quantities (bpm, magnitudes) are never negative.
+
+Two sketches merge by adding the counts of equal keys, so the per-file or
+per-5-minute sketches of Common.cube roll up to any coarser grain without the
+raw values, and a quantile of the merged sketch is as accurate as one taken
+over all the values at once. A bpm sketch holds ~100 buckets whatever the
+number of samples.
+"""
+
+import numpy as np
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_VALUE = 1e-3
+
+_LOG_GAMMA = np.log(GAMMA)
+ZERO_KEY = int(np.floor(np.log(MIN_VALUE) / _LOG_GAMMA)) - 1
+KEY_DTYPE = np.int16
+
+
+def value_keys(values):
+    """Bucket key of every (finite, non-negative) value."""
+    values = np.asarray(values, dtype=np.float64)
+    keys = np.full(len(values), ZERO_KEY, dtype=np.int64)
+    big = values >= MIN_VALUE
+    keys[big] = np.ceil(np.log(values[big]) / _LOG_GAMMA)
+    return keys.astype(KEY_DTYPE)
+
+
+def key_values(keys):
+    """Representative value of each bucket (0 for ZERO_KEY)."""
+    keys = np.asarray(keys, dtype=np.float64)
+    values = 2 * GAMMA ** keys / (GAMMA + 1)
+    values[keys == ZERO_KEY] = 0.0
+    return values
+
+
+def grouped_sketches(groups, n_groups, keys, counts=None):
+    """
+    One sketch per group from the group index and bucket key of every value
+    (or of every bucket of several sketches, with their `counts`): a list of
+    n_groups (keys, counts) pairs, keys sorted.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    keys = np.asarray(keys, dtype=np.int64)
+    span = int(keys.max() - ZERO_KEY + 1) if len(keys) else 1
+
+    pairs, inverse = np.unique(groups * span + (keys - ZERO_KEY), return_inverse=True)
+    totals = np.bincount(inverse, weights=counts).astype(np.int64)
+    owner = pairs // span
+    bucket = (pairs % span + ZERO_KEY).astype(KEY_DTYPE)
+    cuts = np.searchsorted(owner, np.arange(n_groups + 1))
+    return [(bucket[a:b], totals[a:b]) for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def merge_sketches(sketches):
+    """One sketch from several (keys, counts) sketches."""
+    sketches = list(sketches)
+    if not sketches:
+        return np.empty(0, dtype=KEY_DTYPE), np.empty(0, dtype=np.int64)
+    keys = np.concatenate([np.asarray(k, dtype=np.int64) for k, _ in sketches])
+    counts = np.concatenate([np.asarray(c, dtype=np.float64) for _, c in sketches])
+    return grouped_sketches(np.zeros(len(keys), dtype=np.int64), 1, keys, counts)[0]
+
+
+def sketch_quantiles(keys, counts, qs):
+    """
+    Quantiles (0..1) of a sketch, as np.quantile's default (linear) method
+    would give over the bucket values. NaN for an empty sketch.
+    """
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(qs), np.nan)
+
+    order = np.argsort(keys)
+    values = key_values(np.asarray(keys)[order])
+    ends = np.cumsum(counts[order])  # rank just past each bucket
+
+    ranks = qs * (total - 1)
+    lo = np.floor(ranks).astype(np.int64)
+    hi = np.minimum(lo + 1, total - 1)
+    lo_values = values[np.searchsorted(ends, lo, side='right')]
+    hi_values = values[np.searchsorted(ends, hi, side='right')]
+    return lo_values + (ranks - lo) * (hi_values - lo_values)
@@ -0,0 +1,68 @@
+"""
+Vectorized ISO-8601 (UTC) -> Pacific conversion for Oura Ring timestamps.
+
+The Oura raw files store `timestamp` as "2025-03-10T15:45:00.000Z". The
+labeling scripts converted it with strptime + pytz.astimezone once per row,
+and once more per row for every derived value (unix time, Pacific date,
+Pacific clock time). parse_oura_timestamps() parses the whole column once
+with a fixed format and derives everything from that. tz_convert uses the
+same tz database rules as pytz, so days that cross a DST switch come out the
+same as the per-row conversion did.
+
+split_by_date() replaces the "walk the rows until the date changes" loops
+that cut a file into one frame per day.
+"""
+
+import numpy as np
+import pandas as pd
+
+PACIFIC_TZ = "America/Los_Angeles"
+OURA_ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+NS_PER_SECOND = 1_000_000_000
+
+
+def parse_oura_timestamps(values):
+    """
+    Parse a column of Oura ISO timestamps. Returns a dict of arrays:
+
+      unix:    int64 UTC epoch seconds (what convert_iso_to_unix returned)
+      date:    datetime64[D] Pacific calendar date
+      seconds: float64 Pacific seconds since midnight
+      weekday: int64 Pacific weekday, Monday=0 ... Sunday=6
+      time:    object array of datetime.time Pacific clock times, the values
+               the scripts write to Time_In_PST
+    """
+    utc = pd.to_datetime(pd.Series(values), format=OURA_ISO_FORMAT, utc=True)
+    local = utc.dt.tz_convert(PACIFIC_TZ).dt.tz_localize(None)
+
+    local_ns = local.to_numpy(dtype='datetime64[ns]')
+    date = local_ns.astype('datetime64[D]')
+    seconds = (local_ns - date).astype('timedelta64[ns]').astype(np.int64) / NS_PER_SECOND
+
+    return {
+        'unix': utc.to_numpy(dtype='datetime64[ns]').astype(np.int64) // NS_PER_SECOND,
+        'date': date,
+        'seconds': seconds,
+        # 1970-01-01 was a Thursday (weekday 3)
+        'weekday': (date.astype(np.int64) + 3) % 7,
+        'time': local.dt.time.to_numpy(dtype=object),
+    }
+
+
+def split_by_date(df, dates):
+    """
+    {date: rows of df on that date}, in date order. `dates` has one value per
+    row (e.g. parse_oura_timestamps()['date']). Input that is not in date
+    order is stably sorted first, so every day comes out as one frame no
+    matter how its rows were interleaved; sorted input is just cut at the date
+    boundaries and every frame is an iloc slice of df.
+    """
+    dates = np.asarray(dates)
+    if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+        order = np.argsort(dates, kind='stable')
+        df = df.iloc[order]
+        dates = dates[order]
+
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(dates) else np.empty(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(dates)]
+    return {dates[start]: df.iloc[start:end] for start, end in zip(starts, ends)}
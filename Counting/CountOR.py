@@ -1,7 +1,12 @@
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 import pytz
 import pandas as pd
 import os
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.schedules import label_classes, schedule_blocks, schedule_for, schedule_path, seconds_of_day
 
 def convert_timestamp_to_pacific(timestamp):
     pacific_tz = pytz.timezone('America/Los_Angeles')
@@ -10,9 +15,6 @@ def convert_timestamp_to_pacific(timestamp):
     dt_pacific = dt_utc.astimezone(pacific_tz)
     return dt_pacific.time()
 
-def convert_string_to_time(time_string):
-    return datetime.strptime(time_string, "%H:%M:%S").time()
-
 def convert_iso_to_pacific_date(timestamp):
     pacific_tz = pytz.timezone('America/Los_Angeles')
     dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
@@ -49,6 +51,7 @@ def generate_bins(start_time, end_time, bin_minutes=BIN_MINUTES):
     return bins
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
+SCHEDULES_DIR = "/Users/cibrian/Documents/GitHub/Research/Schedules"
 
 # --- Output location for the CSV summary ---
 OUTPUT_DIR = "/Users/cibrian/Documents/Github/Research/1_visualization/Bins"
@@ -70,15 +73,6 @@ for pNum in participant_numbers:
 
     rawData = pd.read_csv(rawDataPath)
 
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
-
     zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
     rawData.insert(0, 'class', "NONE")
     rawData.insert(1, 'Time_In_PST', zero_time)
@@ -111,28 +105,15 @@ for pNum in participant_numbers:
         df.loc[:, 'Time_In_PST'] = df['timestamp'].apply(convert_timestamp_to_pacific)
         df.rename(columns={'timestamp': 'Time_In_ISO'}, inplace=True)
 
-    # Keep track of which scheduleData applies to each day's df, so we can
+    # Keep track of which schedule applies to each day's df, so we can
     # reuse it later for bin generation without recomputing DayOfWeek logic.
     schedulePerDay = []
 
     for df in dfList:
-        DayOfWeek = get_day_of_week(datetime.fromtimestamp(df.iloc[0]['time']))
-        if DayOfWeek == 'Friday':
-            scheduleData = scheduleDataFri
-        elif DayOfWeek == 'Tuesday' and (pNum == "14" or pNum == "16"):
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-
-        schedulePerDay.append(scheduleData)
-
-        for row in df.itertuples():
-            for schedRow in scheduleData.itertuples():
-                timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-                timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
-                if timeA < df.at[row.Index, 'Time_In_PST'] <= timeB:
-                    df.at[row.Index, 'class'] = getattr(schedRow, 'Class')
-                    break
+        weekday = datetime.fromtimestamp(df.iloc[0]['time']).weekday()
+        schedulePerDay.append(schedule_blocks(schedule_path(SCHEDULES_DIR, pNum, weekday)))
+
+        df.loc[:, 'class'] = label_classes(seconds_of_day(df['Time_In_PST']), schedule_for(SCHEDULES_DIR, pNum, weekday))
 
     for i in range(len(dfList)):
         df = dfList[i].copy()
@@ -148,15 +129,12 @@ for pNum in participant_numbers:
 
     for i in range(len(dfList)):
         df = dfList[i]
-        scheduleData = schedulePerDay[i]
+        scheduleBlocks = schedulePerDay[i]
 
-        for schedRow in scheduleData.itertuples():
-            classLabel = str(getattr(schedRow, 'Class')).strip()
+        for timeA, timeB, classLabel in scheduleBlocks:
             if classLabel == 'DELETE':
                 continue
 
-            timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-            timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
             bins = generate_bins(timeA, timeB)
             participant_total_bins += len(bins)
 
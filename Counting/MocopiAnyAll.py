@@ -1,198 +1,45 @@
 import pandas as pd
 import pytz
 import os
-import re
+import sys
 import numpy as np
 
 from datetime import datetime, timezone, date
 from collections import defaultdict
 from pathlib import Path
 
-def convert_to_unix_time(timestamp_str):
-    dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-    return dt.timestamp()
-
-def extract_time_only(timestamp_str):
-    dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-    return dt.time()
-
-def convert_string_to_time(time_string):
-    time_obj = datetime.strptime(time_string, "%H:%M:%S").time()
-    return time_obj
-
-def get_day_of_week(date_obj):
-    return date_obj.strftime("%A")
-
-def time_to_seconds(t):
-    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
-
-def getSensorLocation(fileName):
-    mapping = {
-        "11CCD": "HeadDeviceOne",
-        "132D3": "HeadDeviceTwo",
-        "1092A": "HeadDeviceThree",
-        "13CF2": "HeadDeviceFour",
-        "12144": "HipDeviceOne",
-        "114C8": "HipDeviceTwo",
-        "10B1F": "HipDeviceThree",
-        "1211E": "HipDeviceFour",
-        "0E3E9": "WristRDeviceOne",
-        "0EE55": "WristRDeviceTwo",
-        "12801": "WristRDeviceThree",
-        "0EA70": "WristRDeviceFour",
-        "14A51": "WristLDeviceOne",
-        "134F5": "WristLDeviceTwo",
-        "1447A": "WristLDeviceThree",
-        "14A53": "WristLDeviceFour",
-        "1503C": "AnkleRDeviceOne",
-        "13B8F": "AnkleRDeviceTwo",
-        "13B06": "AnkleRDeviceThree",
-        "158A6": "AnkleRDeviceFour",
-        "16E17": "AnkleLDeviceOne",
-        "16FB1": "AnkleLDeviceTwo",
-        "142A8": "AnkleLDeviceThree",
-        "16CA7": "AnkleLDeviceFour",
-    }
-    for code, label in mapping.items():
-        if code in fileName:
-            return label
-    return "None"
-
-
-def normalize_sensor(label):
-    """Strip trailing device number suffix: AnkleLDeviceOne -> AnkleLDevice
-    This collapses the 24 raw device codes down to the 6 physical sensor
-    locations: HeadDevice, HipDevice, WristRDevice, WristLDevice,
-    AnkleRDevice, AnkleLDevice.
-    """
-    return re.sub(r'(Device)(One|Two|Three|Four)$', r'\1', label)
-
-
-# ── Invalid-data detection ──────────────────────────────────────────────────
-# Columns that must contain sane numeric values for a row to be considered
-# "valid" sensor data.
-REQUIRED_NUMERIC_COLS = [
-    'Rotation X', 'Rotation Y', 'Rotation Z', 'Rotation W',
-    'Acceleration X', 'Acceleration Y', 'Acceleration Z',
-]
-
-# Quaternion components must fall within [-1, 1]. Adjust if your rotation
-# columns are not normalized quaternion components.
-ROTATION_MIN, ROTATION_MAX = -1.0, 1.0
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.coverage import any_all_counts, count_bits, coverage_bitset, segment_span
+from Common.mocopi import (
+    INVALID_REASONS, compute_bin_array, group_catalog, load_raw_group, normalize_sensor, raw_catalog,
+    validate_imu_rows,
+)
+from Common.schedules import label_classes, schedule_for, seconds_of_day
 
-# Acceleration "impossible value" bound, in g's. Mocopi-style IMUs typically
-# report in the +/-16g range; tune this to your actual sensor spec.
-ACCEL_MAX_G = 16.0
-
-
-def find_invalid_rows(df, timestamp_col='Old Timestamp'):
+# ── Cross-sensor any/all ────────────────────────────────────────────────────
+def combine_any_all(sensor_segments):
     """
-    Returns a boolean Series (aligned to df's index) that is True for rows
-    where any of Timestamp, Rotation X/Y/Z/W, Acceleration X/Y/Z are either
-    not parseable/numeric or fall outside a physically plausible range.
-    """
-    invalid = pd.Series(False, index=df.index)
-
-    # Timestamp must parse as a valid datetime.
-    if timestamp_col in df.columns:
-        ts_parsed = pd.to_datetime(
-            df[timestamp_col], format="%Y-%m-%d %H:%M:%S.%f", errors='coerce'
-        )
-        invalid |= ts_parsed.isna()
-    else:
-        invalid |= True
-
-    # Rotation components: numeric and within [-1, 1].
-    for col in ['Rotation X', 'Rotation Y', 'Rotation Z', 'Rotation W']:
-        if col in df.columns:
-            vals = pd.to_numeric(df[col], errors='coerce')
-            invalid |= vals.isna() | (vals < ROTATION_MIN) | (vals > ROTATION_MAX)
-        else:
-            invalid |= True  # column missing entirely -> can't validate, treat as invalid
-
-    # Acceleration components: numeric and within +/- ACCEL_MAX_G.
-    for col in ['Acceleration X', 'Acceleration Y', 'Acceleration Z']:
-        if col in df.columns:
-            vals = pd.to_numeric(df[col], errors='coerce')
-            invalid |= vals.isna() | (vals.abs() > ACCEL_MAX_G)
-        else:
-            invalid |= True
-
-    return invalid
-# ─────────────────────────────────────────────────────────────────────────────
-
-
-# ── 1-second bin classification ─────────────────────────────────────────────
-def compute_bin_dict(df, time_col='time', threshold=50, start_sec=None, end_sec=None):
-    """
-    Breaks [start_sec, end_sec] (inclusive) into 1-second bins (keyed by
-    integer unix-epoch second) and returns a dict {bin_second: bool} where
-    the bool is True iff the bin contains >= `threshold` datapoints.
-
-    Passing explicit start_sec/end_sec lets "before" and "after" invalid-row
-    removal be compared over the exact same bin range, so bins that lose all
-    their data due to invalid rows correctly become False rather than
-    disappearing from the comparison.
-    """
-    if start_sec is None or end_sec is None:
-        if df.empty:
-            return {}
-        start_sec = int(df[time_col].min())
-        end_sec   = int(df[time_col].max())
-
-    all_bins = np.arange(int(start_sec), int(end_sec) + 1)
-
-    if df.empty:
-        counts = pd.Series(0, index=all_bins)
-    else:
-        counts_per_sec = df.groupby(time_col).size()
-        counts = counts_per_sec.reindex(all_bins, fill_value=0)
-
-    return {int(b): bool(c >= threshold) for b, c in counts.items()}
-
-
-def compute_bins_true_count(filtered_df, time_col='time', threshold=50,
-                             start_sec=None, end_sec=None):
-    """Convenience wrapper: returns (true_bin_count, total_bin_count)."""
-    d = compute_bin_dict(filtered_df, time_col=time_col, threshold=threshold,
-                          start_sec=start_sec, end_sec=end_sec)
-    return sum(d.values()), len(d)
-
-
-def merge_bin_dict(target, addition):
-    """OR-merge `addition` into `target` in place (True wins on collision)."""
-    for k, v in addition.items():
-        target[k] = target.get(k, False) or v
-
-
-def combine_any_all(sensor_bin_dicts):
-    """
-    Given a dict {sensor_name: {bin_second: bool}} for a fixed set of
-    sensors, returns (any_true_count, all_true_count, universe_size,
-    n_sensors_present).
+    Given a dict {sensor_name: [(start_sec, bins), ...]} for a fixed set of
+    sensors (one segment per device file, see compute_bin_array), returns
+    (any_true_count, all_true_count, universe_size, n_sensors_present).
 
+    Each sensor's segments are OR-ed into one bitset over the seconds that
+    any segment covers (the universe).
     - "any_true": bin is True if at least one sensor is True in that bin.
-    - "all_true": bin is True only if every sensor in `sensor_bin_dicts`
+    - "all_true": bin is True only if every sensor in `sensor_segments`
       is True in that bin (a sensor with no coverage for a given bin is
       treated as False for that bin).
     """
-    sensor_names = list(sensor_bin_dicts.keys())
-    n_sensors = len(sensor_names)
-
-    universe = set()
-    for d in sensor_bin_dicts.values():
-        universe |= set(d.keys())
-
-    any_true = 0
-    all_true = 0
-    for b in universe:
-        vals = [sensor_bin_dicts[s].get(b, False) for s in sensor_names]
-        if any(vals):
-            any_true += 1
-        if n_sensors > 0 and all(vals):
-            all_true += 1
-
-    return any_true, all_true, len(universe), n_sensors
+    segments = [seg for segs in sensor_segments.values() for seg in segs]
+    first_second, n_bins = segment_span(segments)
+
+    universe = coverage_bitset(
+        [(start, np.ones(len(bins), dtype=bool)) for start, bins in segments], first_second, n_bins
+    )
+    bitsets = [coverage_bitset(segs, first_second, n_bins) for segs in sensor_segments.values()]
+    any_true, all_true = any_all_counts(bitsets)
+
+    return any_true, all_true, count_bits(universe), len(sensor_segments)
 # ─────────────────────────────────────────────────────────────────────────────
 
 
@@ -201,6 +48,7 @@ current_time = now.strftime("%H:%M:%S")
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
 rootPath = "/Users/cibrian/Documents/GitHub/Research"
+schedulesPath = f"{rootPath}/Schedules"
 
 # ── accumulators for summary stats ───────────────────────────────────────────
 # Maps participant → total valid datapoints
@@ -208,6 +56,12 @@ participant_totals = {}
 # Maps participant → {sensor_label: count}
 participant_sensor_counts = {}
 
+# ── accumulators for invalid-row stats ───────────────────────────────────────
+# Maps participant → class-time rows that failed validation
+participant_invalid_rows = {}
+# Maps participant → {reason: rows}, see Common.mocopi.INVALID_REASONS
+participant_invalid_reasons = {}
+
 # ── accumulators for 1-second bin true-count stats ──────────────────────────
 # Maps participant → {sensor_label: true_bin_count}, before/after invalid-data removal
 participant_sensor_true_bins_before = {}
@@ -217,10 +71,10 @@ participant_true_bins_before_total = {}
 participant_true_bins_after_total  = {}
 
 # ── accumulators for the 6-sensor "any"/"all" bin comparison ───────────────
-# Maps participant → {normalized_sensor: {bin_second: bool}}, merged across
-# every raw device file mapping to that sensor location.
-participant_sensor_bin_dicts_before = {}
-participant_sensor_bin_dicts_after  = {}
+# Maps participant → {normalized_sensor: [(start_sec, bins), ...]}, one
+# segment per raw device file mapping to that sensor location.
+participant_sensor_segments_before = {}
+participant_sensor_segments_after  = {}
 # Maps participant → (any_true, all_true, universe_size, n_sensors_present)
 participant_any_all_before = {}
 participant_any_all_after  = {}
@@ -232,99 +86,45 @@ for pNum in participant_numbers:
     rawParentPath     = f"{rootPath}/P0{pNum}/Mocopi/Raw"
     labeledParentPath = f"{rootPath}/P0{pNum}/Mocopi/Labeled"
 
-    directories = [d for d in os.listdir(rawParentPath) if os.path.isdir(os.path.join(rawParentPath, d))]
-
-    grouped_raw_data = defaultdict(list)
+    # (sensor, date) groups from the raw files' headers; each group's files
+    # are only read when that group is counted
+    grouped_raw_files = group_catalog(raw_catalog(rawParentPath))
+    zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
 
-    for dir_name in directories:
-        folder_path = Path(rawParentPath) / dir_name
-        for file in folder_path.iterdir():
-            dataFrame = pd.read_csv(file)
-            dateTime  = datetime.strptime(dataFrame.iloc[0]['Timestamp'], "%Y-%m-%d %H:%M:%S.%f")
-            dateOnly  = dateTime.date().strftime("%Y-%m-%d")
-            sensor_label = getSensorLocation(str(file))
-            grouped_raw_data[(sensor_label, dateOnly)].append(dataFrame)
+    # ── count valid datapoints AND 1-second-bin true/false stats per sensor ──
+    sensor_counts = {}
+    invalid_rows = 0
+    invalid_reasons = dict.fromkeys(INVALID_REASONS, 0)
+    sensor_true_bins_before = {}
+    sensor_true_bins_after  = {}
 
-    dataFrames   = []
-    csvPathList  = []
-    sensorLabels = []          # track sensor label per dataframe
+    # Per-participant, per-normalized-sensor (6 total) bin segments from
+    # every raw device file that maps to that sensor location; OR'd together
+    # in combine_any_all.
+    sensor_segments_before = {}   # {normalized_sensor: [(start_sec, bins), ...]}
+    sensor_segments_after  = {}
 
-    for (sensor_label, dateOnly), dfs in grouped_raw_data.items():
-        combined_df = pd.concat(dfs, ignore_index=True).sort_values(by="Timestamp").reset_index(drop=True)
-        dataFrames.append(combined_df)
-        sensorLabels.append(sensor_label)
+    for (sensor_label, dateOnly), files in grouped_raw_files.items():
+        dataFrame = load_raw_group(files)
 
         dirPath = os.path.join(labeledParentPath, dateOnly)
         os.makedirs(dirPath, exist_ok=True)
-
         file_path = os.path.join(dirPath, f"P0{pNum}Mocopi{sensor_label}{dateOnly}.csv")
-        csvPathList.append(file_path)
 
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
+        dataFrame.insert(0, 'class', "NONE")
+        dataFrame.insert(1, 'Time_In_PST', zero_time)
+        dataFrame.insert(2, 'time', 0.0)
 
-    zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
-    for rawData in dataFrames:
-        rawData.insert(0, 'class', "NONE")
-        rawData.insert(1, 'Time_In_PST', zero_time)
-        rawData.insert(2, 'time', 0.0)
-
-    for i, df in enumerate(dataFrames):
-        dt = pd.to_datetime(df['Timestamp'], format="%Y-%m-%d %H:%M:%S.%f")
-        df['time']       = dt.astype('int64') // 10**9
-        df['Time_In_PST'] = dt.dt.time
-        df.rename(columns={'Timestamp': 'Old Timestamp'}, inplace=True)
-        dataFrames[i] = df
-
-    for dataFrame in dataFrames:
-        DayOfWeek = get_day_of_week(datetime.fromtimestamp(dataFrame.iloc[0]['time']))
-        if DayOfWeek == 'Friday':
-            scheduleData = scheduleDataFri
-        elif DayOfWeek == 'Tuesday' and (pNum == "14" or pNum == "16"):
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-
-        scheduleData = scheduleData.copy()
-        scheduleData['TimeStart'] = pd.to_datetime(scheduleData['TimeStart'], format="%H:%M:%S").dt.time
-        scheduleData['TimeEnd']   = pd.to_datetime(scheduleData['TimeEnd'],   format="%H:%M:%S").dt.time
-        scheduleData['TimeStart_sec'] = scheduleData['TimeStart'].apply(time_to_seconds)
-        scheduleData['TimeEnd_sec']   = scheduleData['TimeEnd'].apply(time_to_seconds)
-
-        time_values_sec = dataFrame['Time_In_PST'].apply(time_to_seconds)
-
-        intervals = pd.IntervalIndex.from_arrays(
-            scheduleData['TimeStart_sec'],
-            scheduleData['TimeEnd_sec'],
-            closed='right'
-        )
+        dt = pd.to_datetime(dataFrame['Timestamp'], format="%Y-%m-%d %H:%M:%S.%f")
+        dataFrame['time']       = dt.astype('int64') // 10**9
+        dataFrame['Time_In_PST'] = dt.dt.time
+        dataFrame.rename(columns={'Timestamp': 'Old Timestamp'}, inplace=True)
 
-        matched_class = np.full(len(time_values_sec), None, dtype=object)
-        for i, interval in enumerate(intervals):
-            mask = (interval.left < time_values_sec) & (time_values_sec <= interval.right)
-            matched_class = np.where(mask, scheduleData.iloc[i]['Class'], matched_class)
+        weekday = datetime.fromtimestamp(dataFrame.iloc[0]['time']).weekday()
+        schedule = schedule_for(schedulesPath, pNum, weekday, first_match=False)
 
-        dataFrame['class'] = matched_class
-
-    # ── count valid datapoints AND 1-second-bin true/false stats per sensor ──
-    sensor_counts = {}
-    sensor_true_bins_before = {}
-    sensor_true_bins_after  = {}
-
-    # Per-participant, per-normalized-sensor (6 total) bin dicts, merged
-    # (OR'd) across every raw device file that maps to that sensor location.
-    sensor_bin_dicts_before = {}   # {normalized_sensor: {bin_second: bool}}
-    sensor_bin_dicts_after  = {}
-
-    for i in range(len(dataFrames)):
-        dataFrame    = dataFrames[i].copy()
-        sensor_label = sensorLabels[i]
+        # Last matching schedule row wins; unscheduled times stay None
+        dataFrame['class'] = label_classes(seconds_of_day(dataFrame['Time_In_PST']), schedule, default=None)
         norm_sensor  = normalize_sensor(sensor_label)
 
         dataFrame['class'] = dataFrame['class'].str.strip()
@@ -340,55 +140,61 @@ for pNum in participant_numbers:
 
         if class_time_df.empty:
             true_before, true_after, total_bins = 0, 0, 0
-            invalid_mask = pd.Series(dtype=bool)
-            bin_dict_before = {}
-            bin_dict_after  = {}
+            invalid_mask = np.zeros(0, dtype=bool)
+            segment_before = None
+            segment_after  = None
         else:
             start_sec = int(class_time_df['time'].min())
             end_sec   = int(class_time_df['time'].max())
 
             # --- BEFORE removing invalid data: all class-time rows, valid or not ---
-            bin_dict_before = compute_bin_dict(class_time_df, start_sec=start_sec, end_sec=end_sec)
-            true_before  = sum(bin_dict_before.values())
-            total_bins   = len(bin_dict_before)
+            segment_before = compute_bin_array(class_time_df, start_sec=start_sec, end_sec=end_sec)
+            true_before  = int(segment_before[1].sum())
+            total_bins   = len(segment_before[1])
 
             # --- Identify invalid rows: bad Timestamp / Rotation / Acceleration ---
-            invalid_mask = find_invalid_rows(class_time_df)
+            invalid_mask, reasons = validate_imu_rows(class_time_df)
+            for reason, rows in reasons.items():
+                invalid_reasons[reason] += rows
             valid_class_time_df = class_time_df[~invalid_mask].reset_index(drop=True)
 
             # --- AFTER removing invalid data: same bin range, invalid rows gone ---
-            bin_dict_after = compute_bin_dict(valid_class_time_df, start_sec=start_sec, end_sec=end_sec)
-            true_after = sum(bin_dict_after.values())
+            segment_after = compute_bin_array(valid_class_time_df, start_sec=start_sec, end_sec=end_sec)
+            true_after = int(segment_after[1].sum())
 
-        sensor_counts[sensor_label] = sensor_counts.get(sensor_label, 0) + len(class_time_df) - int(invalid_mask.sum() if len(invalid_mask) else 0)
+        invalid_rows += int(invalid_mask.sum())
+        sensor_counts[sensor_label] = sensor_counts.get(sensor_label, 0) + len(class_time_df) - int(invalid_mask.sum())
         sensor_true_bins_before[sensor_label] = sensor_true_bins_before.get(sensor_label, 0) + true_before
         sensor_true_bins_after[sensor_label]  = sensor_true_bins_after.get(sensor_label, 0) + true_after
 
-        # Merge this device's per-bin True/False dict into its normalized
+        # Add this device's per-bin True/False segment to its normalized
         # (6-sensor-location) bucket for the any/all comparison.
-        sensor_bin_dicts_before.setdefault(norm_sensor, {})
-        sensor_bin_dicts_after.setdefault(norm_sensor, {})
-        merge_bin_dict(sensor_bin_dicts_before[norm_sensor], bin_dict_before)
-        merge_bin_dict(sensor_bin_dicts_after[norm_sensor],  bin_dict_after)
+        sensor_segments_before.setdefault(norm_sensor, [])
+        sensor_segments_after.setdefault(norm_sensor, [])
+        if segment_before is not None:
+            sensor_segments_before[norm_sensor].append(segment_before)
+            sensor_segments_after[norm_sensor].append(segment_after)
 
         # Save the labeled file with DELETE rows removed (unchanged behavior).
         dataFrame_to_save = dataFrame[dataFrame['class'] != 'DELETE'].reset_index(drop=True)
-        dataFrame_to_save.to_csv(csvPathList[i], index=False)
-        dataFrames[i] = dataFrame_to_save
+        dataFrame_to_save.to_csv(file_path, index=False)
 
     participant_sensor_counts[pNum] = sensor_counts
     participant_totals[pNum]        = sum(sensor_counts.values())
 
+    participant_invalid_rows[pNum]    = invalid_rows
+    participant_invalid_reasons[pNum] = invalid_reasons
+
     participant_sensor_true_bins_before[pNum] = sensor_true_bins_before
     participant_sensor_true_bins_after[pNum]  = sensor_true_bins_after
     participant_true_bins_before_total[pNum]  = sum(sensor_true_bins_before.values())
     participant_true_bins_after_total[pNum]   = sum(sensor_true_bins_after.values())
 
-    participant_sensor_bin_dicts_before[pNum] = sensor_bin_dicts_before
-    participant_sensor_bin_dicts_after[pNum]  = sensor_bin_dicts_after
+    participant_sensor_segments_before[pNum] = sensor_segments_before
+    participant_sensor_segments_after[pNum]  = sensor_segments_after
 
-    participant_any_all_before[pNum] = combine_any_all(sensor_bin_dicts_before)
-    participant_any_all_after[pNum]  = combine_any_all(sensor_bin_dicts_after)
+    participant_any_all_before[pNum] = combine_any_all(sensor_segments_before)
+    participant_any_all_after[pNum]  = combine_any_all(sensor_segments_after)
     # ─────────────────────────────────────────────────────────────────────────
 
 # ── print summary ─────────────────────────────────────────────────────────────
@@ -435,6 +241,29 @@ for sensor in all_sensors:
 
 print("=" * 60)
 
+# ── Invalid class-time rows by reason ─────────────────────────────────────────
+print("\n" + "=" * 60)
+print("INVALID CLASS-TIME ROWS BY REASON")
+print("(a row can fail for more than one reason; DELETE rows are always excluded)")
+print("=" * 60)
+
+reason_headers = {
+    'timestamp':          'Timestamp',
+    'missing_column':     'Missing Col',
+    'not_numeric':        'Not Numeric',
+    'rotation_range':     'Rotation',
+    'acceleration_range': 'Accel',
+}
+header = f"  {'Participant':<12} {'Invalid':>10}" + "".join(f" {reason_headers[r]:>12}" for r in INVALID_REASONS)
+print(header)
+print("  " + "-" * (len(header) - 2))
+for pNum in participant_numbers:
+    reasons = participant_invalid_reasons[pNum]
+    print(f"  P0{pNum:<10} {participant_invalid_rows[pNum]:>10,}"
+          + "".join(f" {reasons[r]:>12,}" for r in INVALID_REASONS))
+
+print("=" * 60)
+
 # ── 1-second bin True-count summary (before vs. after removing invalid data) ──
 print("\n" + "=" * 60)
 print("1-SECOND BIN SUMMARY — TRUE BINS (>=50 datapoints/bin)")
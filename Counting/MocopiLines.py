@@ -6,14 +6,26 @@ Mocopi/Raw subfolders for a list of participant IDs.
 Expected folder structure:
     <BASE_DIR>/<PARTICIPANT_ID>/Mocopi/Raw/**/*.csv
 
+Lines are counted as b"\n" bytes in large binary blocks, so nothing is
+decoded. Files are scanned in parallel on a thread pool (the work is
+mostly waiting on the disk). For every file it also reports the data
+rows (lines minus the header) and the Timestamp of the first and last
+data rows, read from the head and tail of the file only.
+
 Usage:
     python count_csv_lines.py
     python count_csv_lines.py --base-dir /path/to/Research
+    python count_csv_lines.py --workers 16
 """
 
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.mocopi import peek_raw_file
 
 DEFAULT_BASE_DIR = "/Users/cibrian/Documents/Github/Research"
 
@@ -22,18 +34,54 @@ DEFAULT_PARTICIPANTS = [
     "P008", "P009", "P0012", "P0014", "P0016",
 ]
 
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+BLOCK_BYTES = 1 << 20        # read size for counting newlines
+
 
 def count_lines(filepath):
-    """Count the number of lines in a file, tolerant of encoding issues."""
+    """
+    Count the number of lines in a file: its b"\n" bytes, plus one for a
+    last line that has no newline. \r\n files count the same as \n files.
+    """
     count = 0
+    ends_with_newline = True
+    buffer = bytearray(BLOCK_BYTES)
+    with open(filepath, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            count += buffer.count(b"\n", 0, n)
+            ends_with_newline = buffer[n - 1] == ord("\n")
+    return count + (not ends_with_newline)
+
+
+def timestamp_range(filepath):
+    """
+    (first, last) Timestamp of the data rows, from the head and tail of the
+    file (Common.mocopi.peek_raw_file). (None, None) if there is no data row
+    or no Timestamp column.
+    """
+    try:
+        return peek_raw_file(filepath)
+    except ValueError:
+        return None, None
+
+
+def scan_file(filepath):
+    """
+    {"lines", "rows", "size", "first", "last"} for one CSV (rows excludes the
+    header line), or None if it cannot be read.
+    """
     try:
-        with open(filepath, "r", encoding="utf-8", errors="replace", newline="") as f:
-            for _ in f:
-                count += 1
+        size = os.path.getsize(filepath)
+        lines = count_lines(filepath)
+        first, last = timestamp_range(filepath)
     except OSError as e:
         print(f"  ERROR reading {filepath}: {e}", file=sys.stderr)
         return None
-    return count
+    return {"lines": lines, "rows": max(lines - 1, 0), "size": size, "first": first, "last": last}
 
 
 def find_csvs(raw_dir):
@@ -62,39 +110,62 @@ def main():
                          help=f"Base directory containing participant folders (default: {DEFAULT_BASE_DIR})")
     parser.add_argument("--participants", nargs="+", default=DEFAULT_PARTICIPANTS,
                          help="List of participant IDs (default: the P001-P0016 list)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                         help=f"Files scanned at the same time (default: {DEFAULT_WORKERS})")
     args = parser.parse_args()
 
+    # Find every file first so the whole Raw tree goes through one pool
+    listings = []
+    for participant in args.participants:
+        raw_dir = os.path.join(args.base_dir, participant, "Mocopi", "Raw")
+        csv_files = find_csvs(raw_dir) if os.path.isdir(raw_dir) else []
+        listings.append((participant, raw_dir, csv_files))
+
     total_lines = 0
+    total_rows = 0
     total_size = 0
     total_files = 0
-
-    for participant in args.participants:
-        raw_dir = os.path.join(args.base_dir, participant, "Mocopi", "Raw")
-        print(f"\n=== {participant} ===")
-
-        if not os.path.isdir(raw_dir):
-            print(f"  Folder not found: {raw_dir}")
-            continue
-
-        csv_files = find_csvs(raw_dir)
-        if not csv_files:
-            print(f"  No CSV files found in {raw_dir}")
-            continue
-
-        for filepath in csv_files:
-            lines = count_lines(filepath)
-            rel = os.path.relpath(filepath, raw_dir)
-            if lines is not None:
-                size = os.path.getsize(filepath)
-                print(f"  {rel}: {lines} lines, {format_size(size)}")
-                total_lines += lines
-                total_size += size
+    first_seen = None
+    last_seen = None
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        # map() hands results back in submission order, so output is stable
+        results = pool.map(scan_file, [path for _, _, csv_files in listings for path in csv_files])
+
+        for participant, raw_dir, csv_files in listings:
+            print(f"\n=== {participant} ===")
+
+            if not os.path.isdir(raw_dir):
+                print(f"  Folder not found: {raw_dir}")
+                continue
+            if not csv_files:
+                print(f"  No CSV files found in {raw_dir}")
+                continue
+
+            for filepath in csv_files:
+                result = next(results)
+                rel = os.path.relpath(filepath, raw_dir)
+                if result is None:
+                    continue
+
+                span = f", {result['first']} -> {result['last']}" if result["first"] else ""
+                print(f"  {rel}: {result['lines']} lines ({result['rows']} rows + header), "
+                      f"{format_size(result['size'])}{span}")
+                total_lines += result["lines"]
+                total_rows += result["rows"]
+                total_size += result["size"]
                 total_files += 1
+                if result["first"]:
+                    first_seen = min(first_seen or result["first"], result["first"])
+                    last_seen = max(last_seen or result["last"], result["last"])
 
     print("\n=== Totals ===")
     print(f"  Files:       {total_files}")
     print(f"  Total lines: {total_lines}")
+    print(f"  Data rows:   {total_rows}")
     print(f"  Total size:  {format_size(total_size)}")
+    if first_seen:
+        print(f"  Time range:  {first_seen} -> {last_seen}")
 
 
 if __name__ == "__main__":
@@ -1,8 +1,13 @@
 import pandas as pd
-import pytz
 import os
-from collections import defaultdict
-from datetime import datetime, timezone, date
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.health_export import read_export
+from Common.schedules import label_classes, schedule_for, seconds_of_day
+from Common.timestamps import split_by_date
 
 def convert_date_format(date_str):
     try:
@@ -13,12 +18,6 @@ def convert_date_format(date_str):
     except Exception:
         return None
     
-def time_to_seconds(t):
-    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
-
-def get_day_of_week(date_obj):
-    return date_obj.strftime("%A")
-
 def filter_dates_for_participant(df, participant_id, date_column):
     allowed_dates = participants_dates.get(participant_id, set())
     converted_dates = df[date_column].astype(str).apply(convert_date_format)
@@ -27,6 +26,9 @@ def filter_dates_for_participant(df, participant_id, date_column):
     return filtered_df
 
 
+# Format of the per-(date, Type) Record files: "csv", or "parquet" (needs pyarrow)
+RECORD_FORMAT = "csv"
+
 participants_dates = {
     "01": {"2025-02-03", "2025-02-04", "2025-02-05", "2025-02-06", "2025-02-07"},
     "02": {"2025-02-03", "2025-02-04", "2025-02-05"},
@@ -45,16 +47,12 @@ participants_dates = {
 # Prompt for participant number
 pNum = input("Enter the participant number: ")
 
-# Load schedule data
-if pNum in ["04", "05"]:
-    scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05)_Fr.csv")
-    scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05)_M-Th.csv")
-else:
-    scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,09,12,14,16)_FR.csv")
-    scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,09,12,14,16)_M-TH.csv")
+# Schedules come from the registry in Common/schedules.py, per weekday
+schedulesPath = "/Users/tommoore/Documents/GitHub/Research/Schedules"
 
 # Gathering parent paths
 rawParentPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Raw/P0{pNum}export.csv"
+rawXmlPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Raw/P0{pNum}export.xml"
 labeledActivityParentPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/ActivitySummary"
 labeledRecordParentPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/ActivitySummary"
 
@@ -62,32 +60,36 @@ labeledRecordParentPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/H
 recordDir = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/Record"
 os.makedirs(recordDir, exist_ok=True)
 
-# Make dataframe of entire csv (will split later)
-majorDF = pd.read_csv(rawParentPath, low_memory=False)
+if os.path.exists(rawXmlPath):
+    # Stream export.xml, keeping only Record/ActivitySummary rows on this participant's dates
+    activityDF, recordDF = read_export(rawXmlPath, participants_dates.get(pNum, set()))
+else:
+    # Make dataframe of entire csv (will split later)
+    majorDF = pd.read_csv(rawParentPath, low_memory=False)
 
-# Drop uneccessary colummns
-majorDF.drop(columns=["/@locale"], inplace=True)
-majorDF.drop(columns=[col for col in majorDF.columns if col.startswith("/Me/")], inplace=True)
-majorDF.drop(columns=[col for col in majorDF.columns if col.startswith("/Workout/")], inplace=True)
+    # Drop uneccessary colummns
+    majorDF.drop(columns=["/@locale"], inplace=True)
+    majorDF.drop(columns=[col for col in majorDF.columns if col.startswith("/Me/")], inplace=True)
+    majorDF.drop(columns=[col for col in majorDF.columns if col.startswith("/Workout/")], inplace=True)
 
-# Making DF for activity data
-activityCols = [col for col in majorDF.columns if col.startswith("/ActivitySummary/")]
-activityDF = majorDF[activityCols]
+    # Making DF for activity data
+    activityCols = [col for col in majorDF.columns if col.startswith("/ActivitySummary/")]
+    activityDF = majorDF[activityCols]
 
-# Making DF for record data
-recordCols = [col for col in majorDF.columns if col.startswith("/Record/")]
-recordDF = majorDF[recordCols]
+    # Making DF for record data
+    recordCols = [col for col in majorDF.columns if col.startswith("/Record/")]
+    recordDF = majorDF[recordCols]
 
-# Delete empty rows
-activityDF = activityDF.dropna(how='all')
-recordDF = recordDF.dropna(how='all')
+    # Delete empty rows
+    activityDF = activityDF.dropna(how='all')
+    recordDF = recordDF.dropna(how='all')
 
-# Reset index
-activityDF = activityDF.reset_index(drop=True)
-recordDF = recordDF.reset_index(drop=True)
+    # Reset index
+    activityDF = activityDF.reset_index(drop=True)
+    recordDF = recordDF.reset_index(drop=True)
 
-activityDF = filter_dates_for_participant(activityDF, pNum, "/ActivitySummary/@dateComponents")
-recordDF = filter_dates_for_participant(recordDF, pNum, "/Record/@startDate")
+    activityDF = filter_dates_for_participant(activityDF, pNum, "/ActivitySummary/@dateComponents")
+    recordDF = filter_dates_for_participant(recordDF, pNum, "/Record/@startDate")
 
 #renaming and removing unecessary columns
 activityDF = activityDF.rename(columns={'/ActivitySummary/@activeEnergyBurned': 'ActiveEnergyBurned'})
@@ -122,93 +124,38 @@ recordDF.insert(0, 'class', "NONE")
 recordDF.insert(1, 'Time_In_PST', zero_time)
 recordDF.insert(2, 'time', 0.0)
 
-# Creating list of the different data frames
 recordDF = recordDF.sort_values(by='StartDate').reset_index(drop=True)
-prevDate = convert_date_format(recordDF.iloc[0]['StartDate'])
-start_idx = 0
-dfList = []
-
-
-#Separating based on date
-for idx, row in recordDF.iterrows():
-    currDate = convert_date_format(row['StartDate'])
-    if currDate != prevDate:
-        dfList.append(recordDF.iloc[start_idx:idx].copy())
-        start_idx = idx
-        prevDate = currDate
-dfList.append(recordDF.iloc[start_idx:].copy())
-
-#adding time columns
-for i, df in enumerate(dfList):
-    dt = pd.to_datetime(df['StartDate'], errors='coerce')
-    dt = dt.dt.tz_convert('US/Pacific')
-    df['Time_In_PST'] = dt.dt.time
-    df['time'] = dt.dt.floor('s').astype('int64') // 10**9
-    dfList[i] = df
-
-for dataFrame in dfList:
-    day_of_week = get_day_of_week(datetime.fromtimestamp(dataFrame.iloc[0]['time']))
-    schedule = scheduleDataFri if day_of_week == 'Friday' else scheduleDataOth
-
-    schedule = schedule.copy()
-    schedule['TimeStart'] = pd.to_datetime(schedule['TimeStart'], format="%H:%M:%S").dt.time
-    schedule['TimeEnd']   = pd.to_datetime(schedule['TimeEnd'],   format="%H:%M:%S").dt.time
-
-    schedule['TimeStart_sec'] = schedule['TimeStart'].apply(time_to_seconds)
-    schedule['TimeEnd_sec']   = schedule['TimeEnd'].apply(time_to_seconds)
-
-    time_values_sec = dataFrame['Time_In_PST'].apply(time_to_seconds)
-
-    intervals = pd.IntervalIndex.from_arrays(
-    schedule['TimeStart_sec'],
-    schedule['TimeEnd_sec'],
-    closed='right'
-    )
-
-    import numpy as np
-    matched_class = np.full(len(time_values_sec), None, dtype=object)
-    for i, interval in enumerate(intervals):
-        mask = (interval.left < time_values_sec) & (time_values_sec <= interval.right)
-        matched_class = np.where(mask, schedule.iloc[i]['Class'], matched_class)
-
-    dataFrame['class'] = matched_class
 
-# Creates date directories
-for df in dfList:
-    date = convert_date_format(df['StartDate'].iloc[0])
-    recordDir = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/Record/{date}"
-    os.makedirs(recordDir, exist_ok=True)
+# Convert StartDate to Pacific once for the whole file
+dt = pd.to_datetime(recordDF['StartDate'], errors='coerce', utc=True).dt.tz_convert('US/Pacific')
+recordDF['Time_In_PST'] = dt.dt.time
+recordDF['time'] = dt.dt.floor('s').astype('int64') // 10**9
 
-#Splitting data frames up by data type
-dfListTypes = []
-existing = {}
+# One frame per Pacific date
+days = split_by_date(recordDF, dt.dt.strftime("%Y-%m-%d").to_numpy())
+dayDates = list(days)
+dfList = [day.copy() for day in days.values()]
 
+for day, dataFrame in zip(dayDates, dfList):
+    weekday = datetime.strptime(day, "%Y-%m-%d").weekday()
+    schedule = schedule_for(schedulesPath, pNum, weekday, first_match=False)
 
-for df in dfList:
-    date = convert_date_format(df['StartDate'].iloc[0])
-    for idx, row in df.iterrows():
-        t = row['Type']
-        key = (date, t)
+    # Last matching schedule row wins and unscheduled times stay None, as in the old np.where loop
+    dataFrame['class'] = label_classes(seconds_of_day(dataFrame['Time_In_PST']), schedule, default=None)
 
-        if key not in existing:
-            existing[key] = pd.DataFrame([row])
-        else:
-            existing[key] = pd.concat([existing[key], pd.DataFrame([row])], ignore_index=True)
-
-# Now store the final DataFrames
-dfListTypes = list(existing.values())
-
-# Creating list of paths to save to
-csvPathList = []
-
-for df in dfListTypes:
-    date = convert_date_format(df['StartDate'].iloc[0])
-    type = df['Type'].iloc[0]
-    csvPathList.append(f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/Record/{date}/P0{pNum}HealthAppRecord{date}_{type}.csv")
+# Creates date directories
+for day in dayDates:
+    recordDir = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/Record/{day}"
+    os.makedirs(recordDir, exist_ok=True)
 
-for i in range(len(dfListTypes)):
-    dataFrame = dfListTypes[i].copy()
-    dataFrame.loc[:, 'class'] = dataFrame['class'].str.strip()
-    dataFrame = dataFrame[dataFrame['class'] != 'DELETE'].reset_index(drop=True)
-    dataFrame.to_csv(csvPathList[i], index=False)
-    dfListTypes[i] = dataFrame
\ No newline at end of file
+# Split each day by data type with one groupby and write every (date, Type)
+# group in bulk. A group whose rows are all DELETE is still written, empty.
+for day, df in zip(dayDates, dfList):
+    df.loc[:, 'class'] = df['class'].str.strip()
+    for type, dataFrame in df.groupby('Type', sort=False, dropna=False):
+        dataFrame = dataFrame[dataFrame['class'] != 'DELETE'].reset_index(drop=True)
+        savePath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/HealthApp/Labeled/Record/{day}/P0{pNum}HealthAppRecord{day}_{type}"
+        if RECORD_FORMAT == "parquet":
+            dataFrame.to_parquet(f"{savePath}.parquet", index=False)
+        else:
+            dataFrame.to_csv(f"{savePath}.csv", index=False)
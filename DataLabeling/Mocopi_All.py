@@ -1,169 +1,212 @@
+import argparse
 import pandas as pd
-import pytz
 import os
+import sys
+import tempfile
 
-from datetime import datetime, timezone, date
-from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def convert_to_unix_time(timestamp_str):
-    dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-    return dt.timestamp()
-
-def extract_time_only(timestamp_str):
-    dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-    return dt.time()
-
-def convert_string_to_time(time_string):
-    time_obj = datetime.strptime(time_string, "%H:%M:%S").time()
-    return time_obj
-
-def get_day_of_week(date_obj):
-    return date_obj.strftime("%A")
-
-def time_to_seconds(t):
-    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1_000_000
-
-def getSensorLocation(fileName):
-    mapping = {
-        "11CCD": "HeadDeviceOne",
-        "132D3": "HeadDeviceTwo",
-        "1092A": "HeadDeviceThree",
-        "13CF2": "HeadDeviceFour",
-        "12144": "HipDeviceOne",
-        "114C8": "HipDeviceTwo",
-        "10B1F": "HipDeviceThree",
-        "1211E": "HipDeviceFour",
-        "0E3E9": "WristRDeviceOne",
-        "0EE55": "WristRDeviceTwo",
-        "12801": "WristRDeviceThree",
-        "0EA70": "WristRDeviceFour",
-        "14A51": "WristLDeviceOne",
-        "134F5": "WristLDeviceTwo",
-        "1447A": "WristLDeviceThree",
-        "14A53": "WristLDeviceFour",
-        "1503C": "AnkleRDeviceOne",
-        "13B8F": "AnkleRDeviceTwo",
-        "13B06": "AnkleRDeviceThree",
-        "158A6": "AnkleRDeviceFour",
-        "16E17": "AnkleLDeviceOne",
-        "16FB1": "AnkleLDeviceTwo",
-        "142A8": "AnkleLDeviceThree",
-        "16CA7": "AnkleLDeviceFour",
-    }
-    for code, label in mapping.items():
-        if code in fileName:
-            return label
-    return "None"
-
-
-now = datetime.now()
-
-# Just get the time part
-current_time = now.strftime("%H:%M:%S")
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.external_sort import merge_sorted_runs, spill_sorted_runs
+from Common.manifest import (
+    fingerprint_inputs, is_current, load_manifest, manifest_path, record, refresh_inputs, save_manifest, stat_inputs,
+)
+from Common.mocopi import RAW_DTYPES, group_catalog, load_raw_group, raw_catalog
+from Common.mocopi_store import (
+    append_labeled_parquet, labeled_parquet_path, parquet_available, write_labeled_parquet,
+)
+from Common.schedules import label_classes, participant_schedule_paths, schedule_for, seconds_of_day
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
 rootPath = "/Users/cibrian/Documents/GitHub/Research"
+schedulesPath = f"{rootPath}/Schedules"
 
+# Typed Parquet copy of the Labeled CSVs for the HeatMaps/Mocopi scripts
+writeParquet = parquet_available()
 
 
+def group_raw_files(pNum):
+    """
+    Raw CSV paths of one participant grouped by (sensor, date), where the date
+    is the date of each file's first Timestamp (from the header-peek catalog,
+    nothing is parsed here). Files keep the order they are listed in so the
+    concat/sort below sees the same input as before.
+    """
+    return group_catalog(raw_catalog(f"{rootPath}/P0{pNum}/Mocopi/Raw"))
 
-for pNum in participant_numbers:
-    print(f"Processing Participant P0{pNum}...")
-    #Gathering parent paths
-    rawParentPath = f"{rootPath}/P0{pNum}/Mocopi/Raw"
-    labeledParentPath = f"{rootPath}/P0{pNum}/Mocopi/Labeled"
 
-    # all of the directories in raw data folder
-    directories = [d for d in os.listdir(rawParentPath) if os.path.isdir(os.path.join(rawParentPath, d))]
+def pick_schedule(pNum, first_time):
+    """Compiled schedule for the day of the group's first sample (unix seconds)."""
+    weekday = datetime.fromtimestamp(first_time).weekday()
+    return schedule_for(schedulesPath, pNum, weekday, first_match=False)
 
-    # Group raw CSVs by (sensor, date)
-    grouped_raw_data = defaultdict(list)
 
-    for dir_name in directories:
-        folder_path = Path(rawParentPath) / dir_name
-        for file in folder_path.iterdir():
-            dataFrame = pd.read_csv(file)
-            dateTime = datetime.strptime(dataFrame.iloc[0]['Timestamp'], "%Y-%m-%d %H:%M:%S.%f")
-            dateOnly = dateTime.date().strftime("%Y-%m-%d")
-            sensor_label = getSensorLocation(str(file))
-            grouped_raw_data[(sensor_label, dateOnly)].append(dataFrame)
-
-    # Combine groups & build save paths
-    dataFrames = []
-    csvPathList = []
-
-    for (sensor_label, dateOnly), dfs in grouped_raw_data.items():
-        combined_df = pd.concat(dfs, ignore_index=True).sort_values(by="Timestamp").reset_index(drop=True)
-        dataFrames.append(combined_df)
-
-        dirPath = os.path.join(labeledParentPath, dateOnly)
-        os.makedirs(dirPath, exist_ok=True)
-
-        file_path = os.path.join(dirPath, f"P0{pNum}Mocopi{sensor_label}{dateOnly}.csv")
-        csvPathList.append(file_path)
-
-    # Load schedule data
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/cibrian/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
-
-    # Add time & class columns
+def add_time_columns(dataFrame):
+    """Insert class/Time_In_PST/time in front of the raw columns and fill the time ones."""
     zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
-    for rawData in dataFrames:
-        rawData.insert(0, 'class', "NONE")
-        rawData.insert(1, 'Time_In_PST', zero_time)
-        rawData.insert(2, 'time', 0.0)
-
-    # Process timestamp columns
-    import pandas as pd
-    for i, df in enumerate(dataFrames):
-        dt = pd.to_datetime(df['Timestamp'], format="%Y-%m-%d %H:%M:%S.%f")
-        df['time'] = dt.astype('int64') // 10**9
-        df['Time_In_PST'] = dt.dt.time
-        df.rename(columns={'Timestamp': 'Old Timestamp'}, inplace=True)
-        dataFrames[i] = df
-
-    for dataFrame in dataFrames:
-        DayOfWeek = get_day_of_week(datetime.fromtimestamp(dataFrame.iloc[0]['time']))
-        if DayOfWeek == 'Friday':
-            scheduleData = scheduleDataFri
-        elif DayOfWeek == 'Tuesday' and (pNum == "14" or pNum == "16"):
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-
-        scheduleData = scheduleData.copy()
-        scheduleData['TimeStart'] = pd.to_datetime(scheduleData['TimeStart'], format="%H:%M:%S").dt.time
-        scheduleData['TimeEnd']   = pd.to_datetime(scheduleData['TimeEnd'],   format="%H:%M:%S").dt.time
-
-        scheduleData['TimeStart_sec'] = scheduleData['TimeStart'].apply(time_to_seconds)
-        scheduleData['TimeEnd_sec']   = scheduleData['TimeEnd'].apply(time_to_seconds)
-
-        time_values_sec = dataFrame['Time_In_PST'].apply(time_to_seconds)
-
-        intervals = pd.IntervalIndex.from_arrays(
-        scheduleData['TimeStart_sec'],
-        scheduleData['TimeEnd_sec'],
-        closed='right'
-        )
-
-        import numpy as np
-        matched_class = np.full(len(time_values_sec), None, dtype=object)
-        for i, interval in enumerate(intervals):
-            mask = (interval.left < time_values_sec) & (time_values_sec <= interval.right)
-            matched_class = np.where(mask, scheduleData.iloc[i]['Class'], matched_class)
-
-        dataFrame['class'] = matched_class
-
-    for i in range(len(dataFrames)):
-        dataFrame = dataFrames[i].copy()
-        dataFrame.loc[:, 'class'] = dataFrame['class'].str.strip()
-        dataFrame = dataFrame[dataFrame['class'] != 'DELETE'].reset_index(drop=True)
-        dataFrame.to_csv(csvPathList[i], index=False)
-        dataFrames[i] = dataFrame
\ No newline at end of file
+    dataFrame.insert(0, 'class', "NONE")
+    dataFrame.insert(1, 'Time_In_PST', zero_time)
+    dataFrame.insert(2, 'time', 0.0)
+
+    dt = pd.to_datetime(dataFrame['Timestamp'], format="%Y-%m-%d %H:%M:%S.%f")
+    dataFrame['time'] = dt.astype('int64') // 10**9
+    dataFrame['Time_In_PST'] = dt.dt.time
+    dataFrame.rename(columns={'Timestamp': 'Old Timestamp'}, inplace=True)
+    return dataFrame
+
+
+def label_frame(dataFrame, schedule):
+    """Label rows against the compiled schedule and drop the DELETE ones."""
+    # first_match=False: the last matching schedule row wins, as in the old np.where loop
+    dataFrame['class'] = label_classes(seconds_of_day(dataFrame['Time_In_PST']), schedule, default=None)
+
+    dataFrame.loc[:, 'class'] = dataFrame['class'].str.strip()
+    return dataFrame[dataFrame['class'] != 'DELETE'].reset_index(drop=True)
+
+
+def labeled_csv_path(pNum, sensor_label, dateOnly):
+    dirPath = os.path.join(f"{rootPath}/P0{pNum}/Mocopi/Labeled", dateOnly)
+    os.makedirs(dirPath, exist_ok=True)
+    return os.path.join(dirPath, f"P0{pNum}Mocopi{sensor_label}{dateOnly}.csv")
+
+
+def label_group(pNum, sensor_label, dateOnly, files, chunk_rows=0):
+    """Combine, label and write one (sensor, date) group. Returns (log line, output paths)."""
+    if chunk_rows > 0:
+        return label_group_streaming(pNum, sensor_label, dateOnly, files, chunk_rows)
+
+    dataFrame = load_raw_group(files)
+    file_path = labeled_csv_path(pNum, sensor_label, dateOnly)
+
+    dataFrame = add_time_columns(dataFrame)
+    schedule = pick_schedule(pNum, dataFrame.iloc[0]['time'])
+    dataFrame = label_frame(dataFrame, schedule)
+
+    outputs = [file_path]
+    dataFrame.to_csv(file_path, index=False)
+    if writeParquet:
+        outputs.append(write_labeled_parquet(dataFrame, rootPath, f"P0{pNum}", dateOnly, sensor_label))
+
+    return f"  {sensor_label} {dateOnly}: {len(files)} raw file(s), {len(dataFrame)} labeled rows", outputs
+
+
+def label_group_streaming(pNum, sensor_label, dateOnly, files, chunk_rows):
+    """
+    Same output as label_group(), but the group never sits in memory whole:
+    raw files are cut into sorted runs of at most chunk_rows rows, k-way
+    merged back in Timestamp order, and each merged block is labeled and
+    appended to the Labeled CSV (and Parquet part).
+    """
+    file_path = labeled_csv_path(pNum, sensor_label, dateOnly)
+    schedule = None
+    parquetWriter = None
+    n_rows = 0
+
+    with tempfile.TemporaryDirectory(prefix="mocopi_runs_") as run_dir:
+        run_paths = spill_sorted_runs(files, "Timestamp", chunk_rows, run_dir, RAW_DTYPES)
+        for n, block in enumerate(merge_sorted_runs(run_paths, "Timestamp", chunk_rows, RAW_DTYPES)):
+            block = add_time_columns(block)
+            if schedule is None:
+                schedule = pick_schedule(pNum, block.iloc[0]['time'])
+            block = label_frame(block, schedule)
+
+            block.to_csv(file_path, mode='w' if n == 0 else 'a', header=(n == 0), index=False)
+            if writeParquet:
+                parquetWriter = append_labeled_parquet(
+                    parquetWriter, block, rootPath, f"P0{pNum}", dateOnly, sensor_label)
+            n_rows += len(block)
+
+    outputs = [file_path]
+    if parquetWriter is not None:
+        parquetWriter.close()
+        outputs.append(labeled_parquet_path(rootPath, f"P0{pNum}", dateOnly, sensor_label))
+
+    return f"  {sensor_label} {dateOnly}: {len(files)} raw file(s), {n_rows} labeled rows ({len(run_paths)} sorted run(s))", outputs
+
+
+def group_key(pNum, sensor_label, dateOnly):
+    return f"P0{pNum}/{sensor_label}/{dateOnly}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label every participant's Mocopi Raw data against their class schedule.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to label (sensor, date) groups with, across all participants (default: 1)")
+    parser.add_argument("--chunk-rows", type=int, default=0,
+                        help="Stream each group in chunks of this many rows instead of loading it whole (default: 0, off)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip (sensor, date) groups whose raw files and schedules are unchanged since the last run")
+    args = parser.parse_args()
+
+    if not writeParquet:
+        print("pyarrow not installed, skipping the Mocopi_Parquet cache (Labeled CSVs are still written)")
+
+    manifestPath = manifest_path(rootPath, "Mocopi_All")
+    manifest = load_manifest(manifestPath)
+
+    # Raw files are grouped up front (first row of each file only) so every
+    # (participant, sensor, date) group can be labeled independently.
+    # Each entry: (pNum, [(key, input paths, sensor_label, dateOnly, files), ...])
+    groups_by_participant = []
+    for pNum in participant_numbers:
+        schedules = participant_schedule_paths(schedulesPath, pNum)
+        groups = []
+        for (sensor_label, dateOnly), files in group_raw_files(pNum).items():
+            groups.append((group_key(pNum, sensor_label, dateOnly), list(files) + schedules, sensor_label, dateOnly, files))
+        groups_by_participant.append((pNum, groups))
+
+    def run_group(submit, pNum, key, paths, sensor_label, dateOnly, files):
+        """
+        Submit one group's labeling. A group --incremental finds current is
+        not submitted: its entry is refreshed and whether that changed it
+        (a bool) is returned instead.
+        """
+        if args.incremental:
+            inputs = stat_inputs(paths)
+            if is_current(manifest, key, inputs):
+                return refresh_inputs(manifest, key, inputs)
+        return submit(label_group, pNum, sensor_label, dateOnly, files, args.chunk_rows)
+
+    def report(key, paths, sensor_label, dateOnly, result):
+        """Print a group's outcome (run_group()'s bool or label_group()'s result) and record it if written. True if the manifest changed."""
+        if not isinstance(result, tuple):
+            print(f"  {sensor_label} {dateOnly}: unchanged, skipped")
+            return result
+        log_line, outputs = result
+        # Only an incremental run hashes, and only inputs it has no hash for yet
+        inputs = fingerprint_inputs(manifest, key, paths) if args.incremental else stat_inputs(paths)
+        record(manifest, key, inputs, outputs)
+        print(log_line)
+        return True
+
+    if args.workers <= 1:
+        for pNum, groups in groups_by_participant:
+            print(f"Processing Participant P0{pNum}...")
+            changed = False
+            for key, paths, sensor_label, dateOnly, files in groups:
+                result = run_group(lambda fn, *a: fn(*a), pNum, key, paths, sensor_label, dateOnly, files)
+                changed |= report(key, paths, sensor_label, dateOnly, result)
+            if changed:
+                save_manifest(manifest, manifestPath)
+        return
+
+    # Submit everything, then print each participant's log in order as it finishes
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures_by_participant = []
+        for pNum, groups in groups_by_participant:
+            futures = [run_group(pool.submit, pNum, *group) for group in groups]
+            futures_by_participant.append((pNum, groups, futures))
+
+        for pNum, groups, futures in futures_by_participant:
+            print(f"Processing Participant P0{pNum}...")
+            changed = False
+            for (key, paths, sensor_label, dateOnly, _), future in zip(groups, futures):
+                result = future if isinstance(future, bool) else future.result()
+                changed |= report(key, paths, sensor_label, dateOnly, result)
+            if changed:
+                save_manifest(manifest, manifestPath)
+
+if __name__ == "__main__":
+    main()
@@ -1,102 +1,56 @@
-from datetime import datetime, timezone
-import pytz
+import argparse
+from pathlib import Path
 import pandas as pd
 import os
+import sys
 
-def convert_timestamp_to_pacific(timestamp):
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_pacific = dt_utc.astimezone(pacific_tz)
-    return dt_pacific.time()
-
-def convert_string_to_time(time_string):
-    return datetime.strptime(time_string, "%H:%M:%S").time()
-
-def convert_iso_to_pacific_date(timestamp):
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_pacific = dt_utc.astimezone(pacific_tz)
-    return dt_pacific.date()
-
-def convert_iso_to_unix(iso_timestamp):
-    dt = datetime.strptime(iso_timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt = dt.replace(tzinfo=timezone.utc)
-    return int(dt.timestamp())
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.manifest import (
+    fingerprint_inputs, is_current, load_manifest, manifest_path, record, refresh_inputs, save_manifest, stat_inputs,
+)
+from Common.schedules import label_classes, participant_schedule_paths, schedule_for, seconds_of_day
+from Common.timestamps import parse_oura_timestamps, split_by_date
 
 def get_day_of_week(date_obj):
     return date_obj.strftime("%A")
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
+rootPath = "/Users/tommoore/Documents/GitHub/Research"
+schedulesPath = f"{rootPath}/Schedules"
 
-for pNum in participant_numbers:
-    print(f"Processing Participant P0{pNum}...")
-
-    rawDataPath = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrRAW.csv"
-    if not os.path.exists(rawDataPath):
-        print(f"Raw data not found for P0{pNum}, skipping...")
-        continue
+def raw_data_path(pNum):
+    return f"{rootPath}/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrRAW.csv"
 
-    rawData = pd.read_csv(rawDataPath)
+def label_participant(pNum):
+    """Split a participant's raw HR file by Pacific date and write one Labeled CSV per day. Returns the CSV paths."""
+    rawData = pd.read_csv(raw_data_path(pNum))
 
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
+    # Parse every timestamp once: unix time, Pacific clock time and Pacific date
+    stamps = parse_oura_timestamps(rawData['timestamp'])
+    dates = stamps['date']
 
-    zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
     rawData.insert(0, 'class', "NONE")
-    rawData.insert(1, 'Time_In_PST', zero_time)
-    rawData.insert(2, 'time', 0)
+    rawData.insert(1, 'Time_In_PST', stamps['time'])
+    rawData.insert(2, 'time', stamps['unix'])
 
-    prevDate = convert_iso_to_pacific_date(rawData.iloc[0]['timestamp'])
-    start_idx = 0
-    dfList = []
-
-    for idx, row in enumerate(rawData.itertuples()):
-        currDate = convert_iso_to_pacific_date(row.timestamp)
-        if currDate != prevDate:
-            dfList.append(rawData.iloc[start_idx:idx].copy())
-            start_idx = idx
-            prevDate = currDate
-    dfList.append(rawData.iloc[start_idx:].copy())
+    # One frame per Pacific date (rows are stably sorted by date if needed)
+    days = split_by_date(rawData, dates)
+    dayDates = list(days)
+    dfList = [day.copy() for day in days.values()]
 
     csvPathList = []
 
-    for df in dfList:
-        timestamp = convert_iso_to_pacific_date(df.iloc[0]['timestamp'])
-        date_str = timestamp.strftime("%Y-%m-%d")
-        file_path = f"/Users/tommoore/Documents/GitHub/Research/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrLabeled{date_str}.csv"
+    for day in dayDates:
+        date_str = str(day)
+        file_path = f"{rootPath}/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrLabeled{date_str}.csv"
         csvPathList.append(file_path)
-        with open(file_path, 'w') as f:
-            pass
 
     for df in dfList:
-        df.loc[:, 'time'] = df['timestamp'].apply(convert_iso_to_unix)
-        df.loc[:, 'Time_In_PST'] = df['timestamp'].apply(convert_timestamp_to_pacific)
         df.rename(columns={'timestamp': 'Time_In_ISO'}, inplace=True)
 
-    for df in dfList:
-        DayOfWeek = get_day_of_week(datetime.fromtimestamp(df.iloc[0]['time']))
-        if DayOfWeek == 'Friday':
-            scheduleData = scheduleDataFri
-        elif DayOfWeek == 'Tuesday' and (pNum == "14" or pNum == "16"):
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-
-        for row in df.itertuples():
-            for schedRow in scheduleData.itertuples():
-                timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-                timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
-                if timeA < df.at[row.Index, 'Time_In_PST'] <= timeB:
-                    df.at[row.Index, 'class'] = getattr(schedRow, 'Class')
-                    break
+    for df, day in zip(dfList, dayDates):
+        schedule = schedule_for(schedulesPath, pNum, day.astype(object).weekday())
+        df.loc[:, 'class'] = label_classes(seconds_of_day(df['Time_In_PST']), schedule)
 
     for i in range(len(dfList)):
         df = dfList[i].copy()
@@ -105,6 +59,44 @@ for pNum in participant_numbers:
         df.to_csv(csvPathList[i], index=False)
         dfList[i] = df
 
-    print(f"Done for Participant P0{pNum}")
-
-print("All participants processed.")
+    return csvPathList
+
+def main():
+    parser = argparse.ArgumentParser(description="Label every participant's Oura Ring heart rate data against their class schedule.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip participants whose raw HR file and schedules are unchanged since the last run")
+    args = parser.parse_args()
+
+    manifestPath = manifest_path(rootPath, "OuraRingHR_All")
+    manifest = load_manifest(manifestPath)
+
+    for pNum in participant_numbers:
+        print(f"Processing Participant P0{pNum}...")
+
+        rawDataPath = raw_data_path(pNum)
+        if not os.path.exists(rawDataPath):
+            print(f"Raw data not found for P0{pNum}, skipping...")
+            continue
+
+        # The raw HR file holds every day of a participant, so it is the unit of work
+        key = f"P0{pNum}"
+        paths = [rawDataPath] + participant_schedule_paths(schedulesPath, pNum)
+        if args.incremental:
+            inputs = stat_inputs(paths)
+            if is_current(manifest, key, inputs):
+                if refresh_inputs(manifest, key, inputs):
+                    save_manifest(manifest, manifestPath)
+                print(f"Unchanged, skipped P0{pNum}")
+                continue
+
+        outputs = label_participant(pNum)
+        # Only an incremental run hashes, and only inputs it has no hash for yet
+        inputs = fingerprint_inputs(manifest, key, paths) if args.incremental else stat_inputs(paths)
+        record(manifest, key, inputs, outputs)
+        save_manifest(manifest, manifestPath)
+        print(f"Done for Participant P0{pNum}")
+
+    print("All participants processed.")
+
+if __name__ == "__main__":
+    main()
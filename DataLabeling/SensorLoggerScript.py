@@ -1,6 +1,11 @@
 from datetime import datetime, timezone
+from pathlib import Path
 import pytz
 import pandas as pd
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.schedules import compile_schedule, label_classes, seconds_of_day
 
 def convert_timestamp_to_pacific(timestamp):
     pacific_tz = pytz.timezone('America/Los_Angeles')
@@ -8,15 +13,12 @@ def convert_timestamp_to_pacific(timestamp):
     dt_pacific = dt_utc.astimezone(pacific_tz)
     return dt_pacific.time()
 
-def convert_string_to_time(time_string):
-    time_obj = datetime.strptime(time_string, "%H:%M:%S").time()
-    return time_obj
-
 rawDataPath = input("Enter the file path of the raw data: ")
 rawData = pd.read_csv(rawDataPath)
 
 scheduleDataPath = input("Enter the file path of the schedule data: ")
 scheduleData = pd.read_csv(scheduleDataPath)
+schedule = compile_schedule(scheduleData)
 
 saveLocation = input("Enter file path of where you would like to save to: ")
 
@@ -24,14 +26,8 @@ zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
 rawData.insert(0, 'class', "NONE")
 rawData.insert(1, 'Time_In_PST', zero_time)
 
-for row in rawData.itertuples():
-    rawData.at[row.Index, 'Time_In_PST'] = convert_timestamp_to_pacific(getattr(row, 'time'))
-    for schedRow in scheduleData.itertuples():
-        timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-        timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
-        if  timeA < rawData.at[row.Index, 'Time_In_PST'] <= timeB:
-            rawData.at[row.Index, 'class'] = getattr(schedRow, 'Class')
-            break
+rawData['Time_In_PST'] = rawData['time'].apply(convert_timestamp_to_pacific)
+rawData['class'] = label_classes(seconds_of_day(rawData['Time_In_PST']), schedule)
 rawData = rawData[rawData['class'] != 'DELETE']
 print(rawData.head)
 
@@ -1,13 +1,23 @@
-from datetime import datetime, timezone, time
+import argparse
+from datetime import datetime
+from pathlib import Path
 import pytz
 import os
+import sys
 import pandas as pd
-import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.manifest import (
+    fingerprint_inputs, is_current, load_manifest, manifest_path, record, recorded_outputs, refresh_inputs,
+    save_manifest, stat_inputs,
+)
+from Common.schedules import label_classes, participant_schedule_paths, schedule_for, seconds_of_day
 
 pacific_tz = pytz.timezone('America/Los_Angeles')
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
 rootPath = "/Users/tommoore/Documents/GitHub/Research"
+schedulesPath = f"{rootPath}/Schedules"
 
 def convert_timestamp_to_pacific_vectorized(ts_series):
     # ts_series is in nanoseconds
@@ -19,19 +29,9 @@ def convert_string_to_time_series(time_series):
     # Convert a series of strings like 'HH:MM:SS' to time objects
     return pd.to_datetime(time_series, format="%H:%M:%S").dt.time
 
-for pNum in participant_numbers:
-    print(f"Processing Participant P0{pNum}...")
+def list_raw_files(pNum):
     dataPath = os.path.join(rootPath, f"P0{pNum}", "SensorLogger")
 
-    # Load schedules once
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv("/Users/tommoore/Documents/GitHub/Research/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
     # Find leaf folders
     subFolders = [root for root, dirs, files in os.walk(dataPath) if not dirs]
 
@@ -43,44 +43,72 @@ for pNum in participant_numbers:
             for f in os.listdir(subFolder)
             if os.path.isfile(os.path.join(subFolder, f)) and "LABELED" not in f
         ])
+    return rawDataPaths
+
+def label_file(pNum, rawDataPath):
+    """Label one raw SensorLogger CSV and write it next to the raw file. Returns the saved path."""
+    rawData = pd.read_csv(rawDataPath)
+
+    # Convert timestamps to PST vectorized
+    rawData['Time_In_PST'] = convert_timestamp_to_pacific_vectorized(rawData['time'])
+
+    # Determine day of week
+    weekday = pd.to_datetime(rawData['time'].iloc[0], unit='ns').weekday()
+    schedule = schedule_for(schedulesPath, pNum, weekday, first_match=False)
+
+    # Last matching schedule row wins, as with the per-row mask assignment
+    rawData['class'] = label_classes(seconds_of_day(rawData['Time_In_PST']), schedule)
+
+    # Remove rows marked DELETE
+    rawData = rawData[rawData['class'] != 'DELETE']
+
+    savePath = os.path.dirname(rawDataPath)
+    dirList = savePath.split(os.sep)
+    if not rawData.empty:
+        saveLocation = f"{savePath}/P0{pNum}SensorLog_TRUE_{dirList[9]}_{pd.to_datetime(rawData['time'].iloc[0], unit='ns').strftime('%Y_%m_%d')}.csv"
+    else:
+        date = dirList[8]
+        date_obj = datetime.strptime(date, "%b%d")
+        formatted_date = date_obj.replace(year=2025).strftime("%m_%d_%Y")
+        saveLocation = f"{savePath}/P0{pNum}SensorLog_TRUE_{dirList[9]}_{formatted_date}.csv"
+    rawData.to_csv(saveLocation, index=False)
+    return saveLocation
+
+def main():
+    parser = argparse.ArgumentParser(description="Label every participant's SensorLogger data against their class schedule.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip raw files whose content and schedules are unchanged since the last run")
+    args = parser.parse_args()
+
+    manifestPath = manifest_path(rootPath, "SensorLogger_All")
+    manifest = load_manifest(manifestPath)
+    # Labeled files are written next to the raw ones, so don't pick them up as new raw input
+    previousOutputs = recorded_outputs(manifest) if args.incremental else set()
+
+    for pNum in participant_numbers:
+        print(f"Processing Participant P0{pNum}...")
+
+        schedules = participant_schedule_paths(schedulesPath, pNum)
+        changed = False
+
+        for rawDataPath in list_raw_files(pNum):
+            if rawDataPath in previousOutputs:
+                continue
+            key = rawDataPath
+            paths = [rawDataPath] + schedules
+            if args.incremental:
+                inputs = stat_inputs(paths)
+                if is_current(manifest, key, inputs):
+                    changed |= refresh_inputs(manifest, key, inputs)
+                    continue
+            saveLocation = label_file(pNum, rawDataPath)
+            # Only an incremental run hashes, and only inputs it has no hash for yet
+            inputs = fingerprint_inputs(manifest, key, paths) if args.incremental else stat_inputs(paths)
+            record(manifest, key, inputs, [saveLocation])
+            changed = True
+
+        if changed:
+            save_manifest(manifest, manifestPath)
 
-    for rawDataPath in rawDataPaths:
-        rawData = pd.read_csv(rawDataPath)
-
-        # Convert timestamps to PST vectorized
-        rawData['Time_In_PST'] = convert_timestamp_to_pacific_vectorized(rawData['time'])
-
-        # Determine day of week
-        day_of_week = pd.to_datetime(rawData['time'].iloc[0], unit='ns').day_name()
-        if day_of_week == 'Friday':
-            scheduleData = scheduleDataFri
-        elif day_of_week == 'Tuesday' and scheduleDataTu is not None:
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-
-        # Convert schedule times once
-        scheduleData['TimeStart'] = convert_string_to_time_series(scheduleData['TimeStart'])
-        scheduleData['TimeEnd'] = convert_string_to_time_series(scheduleData['TimeEnd'])
-
-        # Initialize class column
-        rawData['class'] = "NONE"
-
-        # Vectorized assignment
-        for _, schedRow in scheduleData.iterrows():
-            mask = (rawData['Time_In_PST'] > schedRow['TimeStart']) & (rawData['Time_In_PST'] <= schedRow['TimeEnd'])
-            rawData.loc[mask, 'class'] = schedRow['Class']
-
-        # Remove rows marked DELETE
-        rawData = rawData[rawData['class'] != 'DELETE']
-
-        savePath = os.path.dirname(rawDataPath)
-        dirList = savePath.split(os.sep)
-        if not rawData.empty:
-            saveLocation = f"{savePath}/P0{pNum}SensorLog_TRUE_{dirList[9]}_{pd.to_datetime(rawData['time'].iloc[0], unit='ns').strftime('%Y_%m_%d')}.csv"
-        else:
-            date = dirList[8]
-            date_obj = datetime.strptime(date, "%b%d")
-            formatted_date = date_obj.replace(year=2025).strftime("%m_%d_%Y")
-            saveLocation = f"{savePath}/P0{pNum}SensorLog_TRUE_{dirList[9]}_{formatted_date}.csv"
-        rawData.to_csv(saveLocation, index=False)
+if __name__ == "__main__":
+    main()
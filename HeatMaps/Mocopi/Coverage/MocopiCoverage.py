@@ -0,0 +1,447 @@
+"""
+Mocopi coverage heatmaps (class / weekday / time of day) for every sensor scope.
+
+Goal:
+  One run that produces what the 21 Coverage/{Scope}/MocopiCov{Class,Day,Time}
+  scripts used to, for Total plus the six sensor locations.
+
+Approach:
+  - Every labeled (sensor, date) group is read once through Common.mocopi_store.
+  - Its 5-min bin occupancy (any row, any non-excluded row, classes present)
+    is computed once and added to the Total scope and to the scope whose name
+    is in the sensor label (e.g. "Head" for HeadDeviceOne).
+  - Occupancy comes from one Common.coverage.bin_counts() histogram per group
+    instead of a between() scan per bin. Bins stay inclusive on both ends,
+    like Series.between().
+  - The class / day / time metrics are then aggregated per scope exactly as the
+    old scripts did.
+  - Expected class times come from the Common.schedules registry, the same
+    (participant, weekday) -> schedule lookup the labeling scripts use. P14/P16
+    Tuesdays therefore count only the TU schedule's classes, not M-TH's as well.
+
+Outputs (per scope, under 1_visualization/Heatmaps/Mocopi/Coverage/{Scope}):
+  - class, day and time coverage PNGs and metrics CSVs, same file names as before
+"""
+
+import os
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.coverage import bin_counts, bin_spec, occupied
+from Common.mocopi_store import iter_labeled
+from Common.schedules import participant_id, schedule_blocks, schedule_path, scheduled_participants
+
+# === Paths ===
+root_path      = "/Users/cibrian/Documents/GitHub/Research"
+schedules_path = os.path.join(root_path, "Schedules")
+output_root    = os.path.join(root_path, "1_visualization/Heatmaps/Mocopi/Coverage")
+
+# === Scopes ===
+# Total takes every sensor; the others take sensors whose label contains the scope name.
+SCOPES = ["Total", "Head", "Hip", "WristL", "WristR", "AnkleL", "AnkleR"]
+
+# (png, csv) per scope and metric. Kept exactly as the per-scope scripts named them.
+OUTPUT_FILES = {
+    "Total":  {"class": ("class_coverage.png", "class_coverage_metrics.csv"),
+               "day":   ("day_coverage.png", "day_coverage_metrics.csv"),
+               "time":  ("time_coverage.png", "time_coverage_metrics.csv")},
+    "AnkleL": {"class": ("class_coverage.png", "class_coverage_metrics.csv"),
+               "day":   ("day_coverage_ankleL.png", "day_coverage_metrics_ankleL.csv"),
+               "time":  ("time_coverage_ankeL.png", "time_coverage_metrics.csv")},
+    "AnkleR": {"class": ("ankleR_class_coverage.png", "ankleR_class_coverage_metrics.csv"),
+               "day":   ("ankleR_day_coverage.png", "ankleR_day_coverage_metrics.csv"),
+               "time":  ("ankleR_time_coverage.png", "ankleR_time_coverage_metrics.csv")},
+}
+for scope in ["Head", "Hip", "WristL", "WristR"]:
+    OUTPUT_FILES[scope] = {
+        metric: (f"{scope}_{metric}_coverage.png", f"{scope}_{metric}_coverage_metrics.csv")
+        for metric in ("class", "day", "time")
+    }
+
+# A 5-min bin counts as covered when it holds at least this many samples
+MIN_SAMPLES_PER_BIN = 1
+
+# === Classes to exclude ===
+EXCLUDED_CLASSES = {'DELETE', 'ELA/History', 'Friday Funday'}
+
+weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+# === Define time bins ===
+start_time = datetime.strptime("08:30", "%H:%M")
+end_time   = datetime.strptime("15:00", "%H:%M")
+
+# 30-min bins for the time-of-day display
+time_bins_30min = []
+temp_time = start_time
+while temp_time < end_time:
+    bin_end = temp_time + timedelta(minutes=30)
+    time_bins_30min.append((temp_time.time(), bin_end.time()))
+    temp_time = bin_end
+
+# 5-min bins for all coverage calculations
+time_bins_5min = []
+temp_time = start_time
+while temp_time < end_time:
+    bin_end = temp_time + timedelta(minutes=5)
+    time_bins_5min.append((temp_time.time(), bin_end.time()))
+    temp_time = bin_end
+
+bin_labels_5min = [f"{bs.strftime('%H:%M')}-{be.strftime('%H:%M')}" for bs, be in time_bins_5min]
+spec_5min = bin_spec(time_bins_5min)
+
+
+# === Helpers ===
+def get_participant_number(name):
+    return int(name[1:])
+
+
+def scopes_for_sensor(sensor_label):
+    return ["Total"] + [scope for scope in SCOPES[1:] if scope in sensor_label]
+
+
+def summarize_group(df):
+    """
+    Occupancy of every 5-min bin for one labeled (sensor, date) group:
+      any_rows:    bin has at least one row
+      any_valid:   bin has at least one row whose class is not excluded
+      bin_classes: set of class labels present in the bin
+    """
+    seconds = df['Seconds_In_PST'].to_numpy(dtype=np.float64)
+    valid = ~df['class'].astype(str).str.strip().isin(EXCLUDED_CLASSES).to_numpy()
+    codes, class_labels = pd.factorize(df['class'])
+
+    any_rows  = occupied(bin_counts(seconds, spec_5min), MIN_SAMPLES_PER_BIN)
+    any_valid = occupied(bin_counts(seconds[valid], spec_5min), MIN_SAMPLES_PER_BIN)
+    class_occupied = occupied(
+        bin_counts(seconds, spec_5min, codes=codes, n_codes=len(class_labels)), MIN_SAMPLES_PER_BIN
+    )
+    bin_classes = [set(class_labels[class_occupied[:, b]]) for b in range(len(time_bins_5min))]
+    return any_rows, any_valid, bin_classes
+
+
+def plot_coverage(heatmap_coverage, figsize, title, ylabel, output_file):
+    mask_cov  = heatmap_coverage == 0.0
+    annot_cov = heatmap_coverage.round(1).astype(str)
+    annot_cov[mask_cov] = ""
+
+    plt.figure(figsize=figsize)
+    sns.heatmap(
+        heatmap_coverage,
+        cmap="viridis_r",
+        linewidths=0.5,
+        linecolor='gray',
+        annot=annot_cov,
+        fmt='s',
+        mask=mask_cov,
+        vmin=0, vmax=100,
+        cbar_kws={'label': 'Data Coverage (%)'}
+    )
+    plt.title(title, fontsize=14, pad=20)
+    plt.xlabel("Participant", fontsize=12)
+    plt.ylabel(ylabel, fontsize=12)
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close()
+    print(f"Coverage heatmap saved to: {output_file}")
+
+
+def save_metrics(coverage_metrics, csv_path):
+    coverage_df = pd.DataFrame(coverage_metrics).T
+    coverage_df.index.name = 'Participant'
+    coverage_df = coverage_df.reset_index()
+    coverage_df.to_csv(csv_path, index=False)
+    print(f"Coverage metrics saved to: {csv_path}")
+    return coverage_df
+
+
+def print_summary(header, coverage_df):
+    print(f"\n=== {header} ===")
+    print(coverage_df.to_string(index=False))
+    for stat, fn in [("Mean", "mean"), ("Median", "median"), ("Min", "min"), ("Max", "max")]:
+        print(f"{stat} coverage: {getattr(coverage_df['coverage_pct'], fn)():.1f}%")
+
+
+# ============================================================
+# === Schedules (from the Common.schedules registry)
+# ============================================================
+def class_schedule(participant, weekday):
+    """[(start_t, end_t, class_name), ...] expected on a weekday, without excluded classes."""
+    path = schedule_path(schedules_path, participant, weekday)
+    if path is None or not os.path.exists(path):
+        return []
+    return [(s, e, c) for s, e, c in schedule_blocks(path) if c and c not in EXCLUDED_CLASSES]
+
+
+def get_participant_schedule(participant_name):
+    """{weekday name: [(start, end), ...]} of the non-DELETE rows, or None without a schedule."""
+    if participant_id(participant_name) not in scheduled_participants():
+        return None
+    return {
+        day: [(s, e) for s, e, c in schedule_blocks(schedule_path(schedules_path, participant_name, wd))
+              if c.upper() != 'DELETE']
+        for wd, day in enumerate(weekday_names)
+    }
+
+
+def bin_is_in_class(bin_start, bin_end, class_blocks):
+    return any(bin_start < ce and bin_end > cs for cs, ce in class_blocks)
+
+
+# ============================================================
+# === Single pass over all labeled groups
+# ============================================================
+participant_folders_all = sorted(
+    [f for f in os.listdir(root_path)
+     if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')],
+    key=get_participant_number
+)
+
+# Class metric: classes seen (non-Friday) and per-date class occupancy (Mon-Thu)
+class_values    = {scope: defaultdict(set) for scope in SCOPES}
+class_date_bins = {scope: defaultdict(dict) for scope in SCOPES}
+# Day metric: (weekday, any_valid) per group (Mon-Fri)
+day_groups      = {scope: defaultdict(list) for scope in SCOPES}
+# Time metric: any_rows per group (non-Friday)
+time_groups     = {scope: defaultdict(list) for scope in SCOPES}
+
+print("Reading labeled Mocopi data...")
+for participant, file_date, sensor_label, df in iter_labeled(
+    root_path, columns=['class', 'Seconds_In_PST'], participants=participant_folders_all,
+):
+    weekday = file_date.weekday()
+    any_rows, any_valid, bin_classes = summarize_group(df)
+    present = set(df['class'].dropna().unique()) if weekday != 4 else set()
+
+    for scope in scopes_for_sensor(sensor_label):
+        if weekday != 4:
+            if len(df):
+                # Creates the participant's entry even when every class is NaN
+                class_values[scope][participant].update(present)
+            time_groups[scope][participant].append(any_rows)
+        if weekday < 4:
+            date_bins = class_date_bins[scope][participant].setdefault(
+                file_date, [set() for _ in time_bins_5min]
+            )
+            for b, classes_in_bin in enumerate(bin_classes):
+                date_bins[b] |= classes_in_bin
+        if weekday <= 4:
+            day_groups[scope][participant].append((weekday, any_valid))
+
+print(f"Schedules for participants: {scheduled_participants()}")
+
+
+# ============================================================
+# === Class coverage
+# ============================================================
+def report_class(scope, output_folder):
+    png_name, csv_name = OUTPUT_FILES[scope]["class"]
+    seen = class_values[scope]
+
+    participant_folders = sorted(seen.keys(), key=get_participant_number)
+    class_names = sorted({
+        c for p in participant_folders for c in seen[p]
+        if str(c).strip() not in EXCLUDED_CLASSES
+    })
+
+    print(f"Participants with data: {participant_folders}")
+    print(f"Classes found in data ({len(class_names)}): {class_names}")
+    if not class_names:
+        print("No class labels found in all_data. Check file contents.")
+        return
+
+    heatmap_coverage = pd.DataFrame(0.0, index=class_names, columns=participant_folders)
+    coverage_metrics = {}
+
+    for participant in participant_folders:
+        print(f"\nProcessing: {participant}")
+        expected_class_bins = {cls: set() for cls in class_names}
+        actual_class_bins   = {cls: set() for cls in class_names}
+
+        for file_date, date_bins in class_date_bins[scope][participant].items():
+            schedule = class_schedule(participant, file_date.weekday())
+            for start_t, end_t, class_name in schedule:
+                if class_name not in class_names:
+                    continue
+                for bin_start, bin_end in time_bins_5min:
+                    if not (bin_end <= start_t or bin_start >= end_t):
+                        bin_key = (file_date, f"{bin_start.strftime('%H:%M')}-{bin_end.strftime('%H:%M')}")
+                        expected_class_bins[class_name].add(bin_key)
+
+            # Covered = at least one row for that class in an expected bin
+            for interval, classes_in_bin in zip(bin_labels_5min, date_bins):
+                bin_key = (file_date, interval)
+                for class_name in classes_in_bin:
+                    if class_name in actual_class_bins and bin_key in expected_class_bins[class_name]:
+                        actual_class_bins[class_name].add(bin_key)
+
+        total_bins   = 0
+        covered_bins = 0
+        for class_name in class_names:
+            n_expected = len(expected_class_bins[class_name])
+            n_covered  = len(actual_class_bins[class_name])
+
+            total_bins   += n_expected
+            covered_bins += n_covered
+
+            if n_expected > 0:
+                pct = (n_covered / n_expected) * 100
+                heatmap_coverage.loc[class_name, participant] = pct
+                print(f"  {class_name}: {n_covered}/{n_expected} bins = {pct:.1f}%")
+
+        coverage_metrics[participant] = {
+            'total_bins':   total_bins,
+            'covered_bins': covered_bins,
+            'coverage_pct': (covered_bins / total_bins * 100) if total_bins > 0 else 0,
+        }
+
+    # Sort classes by total coverage
+    class_order      = heatmap_coverage.sum(axis=1).sort_values(ascending=False).index.tolist()
+    heatmap_coverage = heatmap_coverage.loc[class_order]
+
+    coverage_df = save_metrics(coverage_metrics, os.path.join(output_folder, csv_name))
+
+    title_prefix = "" if scope == "Total" else f"{scope} "
+    plot_coverage(
+        heatmap_coverage, (14, len(class_names) * 0.5),
+        f'{title_prefix}Data Coverage Heatmap by Class (5-min bin resolution)', "Class",
+        os.path.join(output_folder, png_name),
+    )
+    print_summary("Coverage Summary", coverage_df)
+
+
+# ============================================================
+# === Weekday coverage (class times only)
+# ============================================================
+def report_day(scope, output_folder):
+    png_name, csv_name = OUTPUT_FILES[scope]["day"]
+
+    heatmap_coverage = pd.DataFrame(0.0, index=weekday_names, columns=participant_folders_all)
+    coverage_metrics = {p: {'total_bins': 0, 'covered_bins': 0} for p in participant_folders_all}
+
+    for participant in participant_folders_all:
+        if not os.path.exists(os.path.join(root_path, participant, "Mocopi", "Labeled")):
+            continue
+
+        p_schedule = get_participant_schedule(participant)
+        if p_schedule is None:
+            print(f"  WARNING: No schedule found for {participant}. Skipping.")
+            continue
+
+        # Which 5-min bins fall within class time, per weekday
+        class_bins_by_weekday = {
+            day: [b for b, (bs, be) in enumerate(time_bins_5min) if bin_is_in_class(bs, be, p_schedule[day])]
+            for day in weekday_names
+        }
+
+        weekday_coverage = {
+            day: {b: [] for b in class_bins_by_weekday[day]} for day in weekday_names
+        }
+        for weekday, any_valid in day_groups[scope][participant]:
+            day = weekday_names[weekday]
+            for b in class_bins_by_weekday[day]:
+                weekday_coverage[day][b].append(1 if any_valid[b] else 0)
+
+        total_bins_all   = 0
+        covered_bins_all = 0
+        for day in weekday_names:
+            bins_for_day = []
+            for cov_list in weekday_coverage[day].values():
+                if cov_list:
+                    bins_for_day.append((sum(cov_list) / len(cov_list)) * 100)
+                    total_bins_all += 1
+                    if sum(cov_list) > 0:
+                        covered_bins_all += 1
+
+            if bins_for_day:
+                heatmap_coverage.loc[day, participant] = np.mean(bins_for_day)
+
+        coverage_metrics[participant]['total_bins']   = total_bins_all
+        coverage_metrics[participant]['covered_bins'] = covered_bins_all
+        coverage_metrics[participant]['coverage_pct'] = (
+            covered_bins_all / total_bins_all * 100
+        ) if total_bins_all > 0 else 0
+
+    coverage_df = save_metrics(coverage_metrics, os.path.join(output_folder, csv_name))
+
+    title_prefix = "" if scope == "Total" else f"{scope} "
+    plot_coverage(
+        heatmap_coverage, (14, 6),
+        f'{title_prefix}Mocopi Data Coverage Heatmap by Weekday (Class Times Only, 5-min bins)', "Day of Week",
+        os.path.join(output_folder, png_name),
+    )
+    print_summary("Coverage Summary (Class Times Only)", coverage_df)
+
+
+# ============================================================
+# === Time-of-day coverage
+# ============================================================
+def report_time(scope, output_folder):
+    png_name, csv_name = OUTPUT_FILES[scope]["time"]
+
+    heatmap_coverage = pd.DataFrame(
+        0.0,
+        index=[f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}" for start, end in time_bins_30min],
+        columns=participant_folders_all
+    )
+    coverage_metrics = {p: {'total_bins': 0, 'covered_bins': 0} for p in participant_folders_all}
+
+    for participant in participant_folders_all:
+        if not os.path.exists(os.path.join(root_path, participant, "Mocopi", "Labeled")):
+            print(f"  Skipping {participant}: path not found")
+            continue
+
+        # For each 5-min bin, which days had coverage (1) or not (0)
+        groups = time_groups[scope][participant]
+        per_bin = [[1 if any_rows[b] else 0 for any_rows in groups] for b in range(len(time_bins_5min))]
+
+        total_5min_bins   = len(time_bins_5min)
+        covered_5min_bins = sum(1 for cov in per_bin if cov and sum(cov) > 0)
+
+        coverage_metrics[participant]['total_bins'] = total_5min_bins
+        coverage_metrics[participant]['covered_bins'] = covered_5min_bins
+        coverage_metrics[participant]['coverage_pct'] = (
+            (covered_5min_bins / total_5min_bins * 100) if total_5min_bins > 0 else 0
+        )
+
+        # Average the 5-min coverage % inside each 30-min display bin
+        for start_30, end_30 in time_bins_30min:
+            interval_30 = f"{start_30.strftime('%H:%M')}-{end_30.strftime('%H:%M')}"
+            all_coverage_values = [
+                (sum(per_bin[b]) / len(per_bin[b])) * 100
+                for b, (bs, be) in enumerate(time_bins_5min)
+                if start_30 <= bs and be <= end_30 and per_bin[b]
+            ]
+            if all_coverage_values:
+                heatmap_coverage.loc[interval_30, participant] = np.mean(all_coverage_values)
+
+        print(f"  {participant}: {covered_5min_bins}/{total_5min_bins} bins covered "
+              f"({coverage_metrics[participant]['coverage_pct']:.1f}%)")
+
+    coverage_df = save_metrics(coverage_metrics, os.path.join(output_folder, csv_name))
+
+    title_prefix = "" if scope == "Total" else f"{scope} "
+    plot_coverage(
+        heatmap_coverage, (14, 8),
+        f'{title_prefix}Mocopi Data Coverage Heatmap (5-min bin resolution, 30-min display)', "Time Interval",
+        os.path.join(output_folder, png_name),
+    )
+    print_summary("Coverage Summary", coverage_df)
+
+
+# ============================================================
+# === Outputs per scope
+# ============================================================
+for scope in SCOPES:
+    output_folder = os.path.join(output_root, scope)
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"\n######## {scope} ########")
+    report_class(scope, output_folder)
+    report_day(scope, output_folder)
+    report_time(scope, output_folder)
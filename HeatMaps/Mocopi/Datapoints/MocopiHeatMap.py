@@ -3,8 +3,11 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-import glob
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.cube import load_cube, rollup
 
 # ============ CONFIGURATION ============
 root_path = "/Users/cibrian/Documents/GitHub/Research"
@@ -33,16 +36,6 @@ def extract_joint_from_filename(filename):
         return None
 
 
-def extract_date_from_filename(filename):
-    """Extract date from Mocopi filename (format ...YYYY-MM-DD.csv)."""
-    basename = os.path.basename(filename)
-    date_part = basename[-14:-4]  # last 10 chars before .csv
-    try:
-        return datetime.strptime(date_part, "%Y-%m-%d")
-    except ValueError:
-        return None
-
-
 # ============ DATA LOADING ============
 participant_folders = [
     f for f in os.listdir(root_path)
@@ -51,53 +44,36 @@ participant_folders = [
 
 print(f"Found participant folders: {participant_folders}")
 
+# Mocopi cells from the aggregate cube, Fridays (weekday() == 4) skipped
+cube = load_cube(root_path, "Mocopi", participants=participant_folders, skip_weekdays=(4,))
+
 all_data = []
 
 for participant in participant_folders:
     participant_number = participant
-    mocopi_folder = os.path.join(root_path, participant, "Mocopi", "Labeled")
-    if not os.path.exists(mocopi_folder):
+    if not os.path.exists(os.path.join(root_path, participant, "Mocopi", "Labeled")):
         print(f"⚠️ Skipping {participant_number}: Mocopi folder not found.")
         continue
 
-    csv_files = glob.glob(os.path.join(mocopi_folder, "**", "*.csv"), recursive=True)
-    print(f"  {participant_number}: Found {len(csv_files)} CSV files.")
-
-    for file in csv_files:
-        joint = extract_joint_from_filename(os.path.basename(file))
+    participant_cube = cube[cube["participant"] == participant]
+    n_groups = len(participant_cube[["date", "sensor"]].drop_duplicates())
+    for sensor_label, sensor_cube in participant_cube.groupby("sensor", sort=False):
+        joint = extract_joint_from_filename(sensor_label)
         if joint is None:
             continue
 
-        # Extract and check date — skip if Friday
-        file_date = extract_date_from_filename(file)
-        if file_date is None:
-            print(f"⚠️ Skipping {file}: could not extract date.")
-            continue
-        if file_date.weekday() == 4:  # 4 = Friday
-            print(f"⏭️ Skipping Friday file: {file}")
-            continue
-
-        # Read data
-        try:
-            df = pd.read_csv(file)
-        except Exception as e:
-            print(f"❌ Error reading {file}: {e}")
-            continue
-
-        if "class" not in df.columns:
-            print(f"⚠️ Skipping {file}: no 'class' column found.")
-            continue
-
-        # Count rows per activity within this file
-        activity_counts = df["class"].value_counts().to_dict()
+        # Count rows per activity of this sensor
+        activity_counts = rollup(sensor_cube, ["class"], sketches=False)
+        activity_counts = activity_counts[activity_counts["rows"] > 0]
 
-        for activity, count in activity_counts.items():
+        for activity, count in zip(activity_counts["class"], activity_counts["rows"]):
             all_data.append({
                 "participant": participant_number,
                 "activity": activity,
                 "joint": joint,
                 "value": count
             })
+    print(f"  {participant_number}: Read {n_groups} labeled groups.")
 
 # ============ COMBINE AND SUMMARIZE ============
 if not all_data:
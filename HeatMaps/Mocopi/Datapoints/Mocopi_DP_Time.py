@@ -4,6 +4,12 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.catalog import catalog_participants
+from Common.cube import bin_of, load_cube, rollup
 
 # Paths
 root_path = "/Users/cibrian/Documents/GitHub/Research"
@@ -12,10 +18,7 @@ output_folder = os.path.join(root_path, "1_visualization/HeatMaps/Mocopi/DataPoi
 os.makedirs(output_folder, exist_ok=True)
 
 # Find participant folders
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(root_path)
 
 # Sort numerically
 def get_participant_number(name):
@@ -39,44 +42,14 @@ heatmap_data = pd.DataFrame(
     columns=participant_folders
 )
 
-# Safe time parser 
-def parse_time(s):
-    try:
-        return datetime.strptime(s, "%H:%M:%S.%f").time()
-    except ValueError:
-        return datetime.strptime(s, "%H:%M:%S").time()
-
-# Process each participant 
-for participant in participant_folders:
-    heart_rate_folder = os.path.join(root_path, participant, "Mocopi", "Labeled")
-
-    csv_files = [
-    os.path.join(root, f)
-    for root, dirs, files in os.walk(heart_rate_folder)
-    for f in files
-    if f.endswith('.csv')
-    ]
-
-    for file in csv_files:
-        date_str = file[-14:-4]
-        file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-        # Skip if the date is a Friday (weekday() == 4)
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-
-        if 'Time_In_PST' not in df.columns:
-            continue
-
-        df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
+# Rows per 30-min bin of each participant from the aggregate cube, Fridays (weekday() == 4) skipped
+cube = load_cube(root_path, "Mocopi", participants=participant_folders, skip_weekdays=(4,), refresh=False)
+binned = rollup(cube, ['participant', 'bin'], bin_minutes=30, sketches=False)
+intervals = {bin_of(start, 30): f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}" for start, end in time_bins}
 
-        for start, end in time_bins:
-            count = df[df['TimeObj'].between(start, end)].shape[0]
-            interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
-            heatmap_data.loc[interval, participant] += count
+for participant, time_bin, count in zip(binned['participant'], binned['bin'], binned['rows']):
+    if time_bin in intervals:
+        heatmap_data.loc[intervals[time_bin], participant] += count
 
 # Ensure final column order is numeric
 heatmap_data = heatmap_data[participant_folders]
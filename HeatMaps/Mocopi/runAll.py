@@ -13,9 +13,10 @@ def collect_scripts() -> list[Path]:
     if datapoints_dir.exists():
         scripts.extend(sorted(datapoints_dir.glob("*.py")))
 
-    coverage_dir = BASE_DIR / "Coverage"
-    if coverage_dir.exists():
-        scripts.extend(sorted(coverage_dir.rglob("*.py")))
+    # One pass over the Labeled data covers class/day/time for every sensor scope
+    coverage_script = BASE_DIR / "Coverage" / "MocopiCoverage.py"
+    if coverage_script.exists():
+        scripts.append(coverage_script)
 
     return [script for script in scripts if script.name != Path(__file__).name]
 
@@ -2,12 +2,20 @@ import os
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.coverage import bin_counts, bin_spec, occupied
+from Common.schedules import SCHEDULE_FILES, schedule_blocks, schedule_path, seconds_of_day
+from Common.catalog import catalog_files, catalog_participants
+from Common.csv_profiles import read_profile
 
 # === Paths ===
 root_path = "/Users/cibrian/Documents/GitHub/Research"
-schedule_path = os.path.join(root_path, "Schedules")
+schedules_path = os.path.join(root_path, "Schedules")
 output_folder = os.path.join(root_path, "1_visualization/Heatmaps/OuraRing/Coverage")
 
 fileName_hr = "class_data.png"
@@ -16,10 +24,7 @@ fileName_csv = "class_coverage_metrics.csv"
 os.makedirs(output_folder, exist_ok=True)
 
 # === Find participant folders ===
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(root_path)
 
 # Sort numerically
 def get_participant_number(name):
@@ -36,113 +41,30 @@ while temp_time < end_time:
     bin_end = temp_time + timedelta(minutes=5)
     time_bins_5min.append((temp_time.time(), bin_end.time()))
     temp_time = bin_end
-
-# Safe time parser 
-def parse_time(s):
-    try:
-        return datetime.strptime(s, "%H:%M:%S.%f").time()
-    except ValueError:
-        try:
-            return datetime.strptime(s, "%H:%M:%S").time()
-        except ValueError:
-            return datetime.strptime(s, "%H:%M").time()
-
-# Function to check if HR is valid
-def is_valid_hr(bpm):
-    if pd.isna(bpm):
-        return False
-    return 40 <= bpm <= 200
+spec_5min = bin_spec(time_bins_5min)
+bin_labels_5min = [f"{bs.strftime('%H:%M')}-{be.strftime('%H:%M')}" for bs, be in time_bins_5min]
 
 # === Classes to exclude ===
 EXCLUDED_CLASSES = {'DELETE', 'ELA/History', 'Friday Funday'}
 
-# === Load and parse schedule files ===
-schedule_files = {
-    'schedData_P(01,02,03,06,07,08,12)_FR.csv': {'participants': ['P001', 'P002', 'P003', 'P006', 'P007', 'P008', 'P012'], 'weekdays': [4]},
-    'schedData_P(01,02,03,06,07,08,12)_M-TH.csv': {'participants': ['P001', 'P002', 'P003', 'P006', 'P007', 'P008', 'P012'], 'weekdays': [0, 1, 2, 3]},
-    'schedData_P(04,05,09,14,16)_FR.csv': {'participants': ['P004', 'P005', 'P009', 'P014', 'P016'], 'weekdays': [4]},
-    'schedData_P(04,05,09,14,16)_M-TH.csv': {'participants': ['P004', 'P005', 'P009', 'P014', 'P016'], 'weekdays': [0, 1, 2, 3]},
-    'schedData_P(14,16)TU.csv': {'participants': ['P014', 'P016'], 'weekdays': [1]},
-}
-
-# First, let's examine the schedule file structure
-print("Examining schedule file structure...")
-sample_file = os.path.join(schedule_path, 'schedData_P(01,02,03,06,07,08,12)_M-TH.csv')
-if os.path.exists(sample_file):
-    sample_df = pd.read_csv(sample_file)
-    print(f"Columns in schedule file: {sample_df.columns.tolist()}")
-    print(f"First few rows:\n{sample_df.head()}")
-else:
-    print(f"Sample schedule file not found: {sample_file}")
-
-# Initialize schedule data structure
-all_classes = set()
-participant_schedules = {p: {wd: [] for wd in range(5)} for p in participant_folders}
+# === Expected classes per participant and weekday (Common.schedules registry) ===
+def class_schedule(participant, weekday):
+    """[(start_t, end_t, class_name), ...] for a weekday, without excluded classes."""
+    path = schedule_path(schedules_path, participant, weekday)
+    if path is None or not os.path.exists(path):
+        return []
+    return [(s, e, c) for s, e, c in schedule_blocks(path) if c and c not in EXCLUDED_CLASSES]
 
-# Parse schedule files
-for sched_file, info in schedule_files.items():
-    file_path = os.path.join(schedule_path, sched_file)
-    
+participant_schedules = {p: {wd: class_schedule(p, wd) for wd in range(5)} for p in participant_folders}
+
+# Heatmap rows: every class in any schedule file
+all_classes = set()
+for sched_file in SCHEDULE_FILES:
+    file_path = os.path.join(schedules_path, sched_file)
     if not os.path.exists(file_path):
         print(f"Warning: Schedule file not found: {file_path}")
         continue
-    
-    print(f"\nProcessing schedule file: {sched_file}")
-    df = pd.read_csv(file_path)
-    
-    # Try to identify time and class columns
-    time_cols = [col for col in df.columns if 'time' in col.lower() or 'start' in col.lower() or 'period' in col.lower()]
-    
-    if len(time_cols) > 0:
-        # Assuming each row is a time slot
-        for _, row in df.iterrows():
-            # Get start time
-            start_time_val = None
-            end_time_val = None
-            
-            for col in df.columns:
-                if 'start' in col.lower():
-                    start_time_val = row[col]
-                elif 'end' in col.lower():
-                    end_time_val = row[col]
-                elif 'time' in col.lower() and start_time_val is None:
-                    start_time_val = row[col]
-            
-            if pd.isna(start_time_val):
-                continue
-            
-            try:
-                start_t = parse_time(str(start_time_val))
-                
-                # Get end time or assume 50 minutes
-                if pd.notna(end_time_val):
-                    end_t = parse_time(str(end_time_val))
-                else:
-                    end_t = (datetime.combine(datetime.today(), start_t) + timedelta(minutes=50)).time()
-                
-                # Now look for class names in remaining columns
-                for col in df.columns:
-                    if col not in time_cols and 'period' not in col.lower():
-                        class_name = row[col]
-                        if pd.notna(class_name) and str(class_name).strip():
-                            class_name_clean = str(class_name).strip()
-                            
-                            # Skip excluded classes
-                            if class_name_clean in EXCLUDED_CLASSES:
-                                continue
-                            
-                            all_classes.add(class_name_clean)
-                            
-                            # Add to all participants in this schedule
-                            for participant in info['participants']:
-                                if participant not in participant_folders:
-                                    continue
-                                for weekday in info['weekdays']:
-                                    participant_schedules[participant][weekday].append((start_t, end_t, class_name_clean))
-            
-            except Exception as e:
-                print(f"Error parsing row: {e}")
-                continue
+    all_classes.update(c for _, _, c in schedule_blocks(file_path) if c and c not in EXCLUDED_CLASSES)
 
 class_names = sorted(list(all_classes))
 
@@ -162,95 +84,66 @@ coverage_metrics = {p: {'total_bins': 0, 'covered_bins': 0} for p in participant
 # === Process each participant ===
 for participant in participant_folders:
     print(f"\nProcessing participant: {participant}")
-    hr_path = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    if not os.path.exists(hr_path):
+    # Labeled HR files of school days (Fridays and weekends skipped)
+    hr_files = catalog_files(root_path, modality="OuraRing", kind="Labeled", sensor="HeartRate", participants=[participant], skip_weekdays=(4, 5, 6), refresh=False)
+    if not hr_files:
         continue
 
     # Expected bins for each class (from schedule)
     expected_class_bins = {cls: set() for cls in class_names}
     # Actual bins with HR data for each class
     actual_class_bins = {cls: set() for cls in class_names}
-    # HR values for averaging
-    participant_class_hr = {cls: [] for cls in class_names}
+    # Sum and count of valid HR values for averaging
+    participant_class_hr_sum = {cls: 0.0 for cls in class_names}
+    participant_class_hr_n = {cls: 0 for cls in class_names}
 
     # Build expected bins from schedule
-    for file in os.listdir(hr_path):
-        if file.endswith(".csv") and "RAW" not in file:
-            try:
-                date_str = file[-14:-4]
-                file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
+    for entry in hr_files:
+        file_date = entry['date']
+        weekday = entry['weekday']
 
-            weekday = file_date.weekday()
+        # Get schedule for this weekday
+        schedule = participant_schedules[participant][weekday]
             
-            # Skip Fridays for actual data (but we use Friday schedules)
-            if weekday == 4:
+        # Mark expected bins
+        for start_t, end_t, class_name in schedule:
+            if class_name not in class_names:
                 continue
-            
-            if weekday > 4:  # Skip weekends
-                continue
-            
-            # Get schedule for this weekday
-            schedule = participant_schedules[participant][weekday]
-            
-            # Mark expected bins
-            for start_t, end_t, class_name in schedule:
-                if class_name not in class_names:
-                    continue
                 
-                for bin_start, bin_end in time_bins_5min:
-                    # Check if this bin overlaps with the class period
-                    if not (bin_end <= start_t or bin_start >= end_t):
-                        bin_key = (file_date, f"{bin_start.strftime('%H:%M')}-{bin_end.strftime('%H:%M')}")
-                        expected_class_bins[class_name].add(bin_key)
+            for bin_start, bin_end in time_bins_5min:
+                # Check if this bin overlaps with the class period
+                if not (bin_end <= start_t or bin_start >= end_t):
+                    bin_key = (file_date, f"{bin_start.strftime('%H:%M')}-{bin_end.strftime('%H:%M')}")
+                    expected_class_bins[class_name].add(bin_key)
     
     # Now check which expected bins actually have HR data
-    for file in os.listdir(hr_path):
-        if file.endswith(".csv") and "RAW" not in file:
-            try:
-                date_str = file[-14:-4]
-                file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-
-            weekday = file_date.weekday()
-            
-            if weekday == 4 or weekday > 4:  # Skip Fridays and weekends
-                continue
-
-            file_path = os.path.join(hr_path, file)
-            df = pd.read_csv(file_path)
-
-            if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns or 'class' not in df.columns:
-                continue
-
-            df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
-            df['valid_hr'] = df['bpm'].apply(is_valid_hr)
-            
-            # Check each 5-min bin
-            for bin_start, bin_end in time_bins_5min:
-                bin_df = df[df['TimeObj'].between(bin_start, bin_end)]
-                
-                if bin_df.empty:
-                    continue
-                
-                interval = f"{bin_start.strftime('%H:%M')}-{bin_end.strftime('%H:%M')}"
-                bin_key = (file_date, interval)
-                
-                # Check each class
-                for class_name in class_names:
-                    # Is this bin expected for this class?
-                    if bin_key in expected_class_bins[class_name]:
-                        # Does it have HR data for this class?
-                        class_bin_df = bin_df[bin_df['class'] == class_name]
-                        if not class_bin_df.empty and class_bin_df['valid_hr'].any():
-                            actual_class_bins[class_name].add(bin_key)
-                            
-                            # Collect HR for averaging
-                            valid_hr_df = class_bin_df[class_bin_df['valid_hr']]
-                            if not valid_hr_df.empty:
-                                participant_class_hr[class_name].extend(valid_hr_df['bpm'].tolist())
+    for entry in hr_files:
+        file_date = entry['date']
+        df = read_profile(entry['path'], 'oura_hr_labeled', columns=['Time_In_PST', 'bpm', 'class'])
+
+        if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns or 'class' not in df.columns:
+            continue
+
+        # Only rows with a valid HR count; code each row by its class index
+        seconds = seconds_of_day(df['Time_In_PST'].astype(str))
+        bpm = pd.to_numeric(df['bpm'], errors='coerce').to_numpy(dtype=np.float64)
+        valid_hr = (bpm >= 40) & (bpm <= 200)
+        codes = pd.Categorical(df['class'], categories=class_names).codes.astype(np.int64)
+        codes[~valid_hr] = -1
+
+        # Valid-HR samples and their bpm sum per (class, 5-min bin), one pass each
+        valid_counts = bin_counts(seconds, spec_5min, codes=codes, n_codes=len(class_names))
+        bpm_sums = bin_counts(seconds, spec_5min, codes=codes, n_codes=len(class_names), weights=bpm)
+        covered = occupied(valid_counts)
+
+        for c, class_name in enumerate(class_names):
+            for b in np.flatnonzero(covered[c]):
+                # Is this bin expected for this class?
+                bin_key = (file_date, bin_labels_5min[b])
+                if bin_key in expected_class_bins[class_name]:
+                    actual_class_bins[class_name].add(bin_key)
+                    participant_class_hr_sum[class_name] += bpm_sums[c, b]
+                    participant_class_hr_n[class_name] += valid_counts[c, b]
     
     # Calculate coverage
     total_5min_bins_all_classes = 0
@@ -269,8 +162,10 @@ for participant in participant_folders:
         covered_5min_bins_all_classes += covered_bins
         
         # Average HR
-        if participant_class_hr[class_name]:
-            heatmap_hr.loc[class_name, participant] = np.mean(participant_class_hr[class_name])
+        if participant_class_hr_n[class_name]:
+            heatmap_hr.loc[class_name, participant] = (
+                participant_class_hr_sum[class_name] / participant_class_hr_n[class_name]
+            )
     
     coverage_metrics[participant]['total_bins'] = total_5min_bins_all_classes
     coverage_metrics[participant]['covered_bins'] = covered_5min_bins_all_classes
@@ -1,10 +1,16 @@
 import os
-import re
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.schedules import participant_id, schedule_blocks, schedule_path, scheduled_participants
+from Common.catalog import catalog_files, catalog_participants
+from Common.csv_profiles import read_profile
 
 # === Paths ===
 root_path      = "/Users/cibrian/Documents/GitHub/Research"
@@ -16,10 +22,7 @@ fileName_csv      = "day_coverage_metrics.csv"
 os.makedirs(output_folder, exist_ok=True)
 
 # === Find participant folders ===
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(root_path)
 
 def get_participant_number(name):
     return int(name[1:])
@@ -43,116 +46,24 @@ while temp_time < end_time:
 # === Schedule loading
 # ============================================================
 
-def parse_schedule_csv(filepath):
-    """
-    Load a schedule CSV with columns: TimeStart, TimeEnd, Class.
-    Returns a list of (start_time, end_time) tuples for non-DELETE rows.
-    """
-    df = pd.read_csv(filepath)
-    df.columns = df.columns.str.strip()
-    blocks = []
-    for _, row in df.iterrows():
-        if str(row['Class']).strip().upper() == 'DELETE':
-            continue
-        try:
-            s = datetime.strptime(str(row['TimeStart']).strip(), "%H:%M:%S").time()
-            e = datetime.strptime(str(row['TimeEnd']).strip(), "%H:%M:%S").time()
-            blocks.append((s, e))
-        except Exception as ex:
-            print(f"  WARNING: Could not parse schedule row {row.to_dict()}: {ex}")
-    return blocks
-
-
-def extract_participants_from_filename(fname):
-    """
-    Given a filename like 'schedData_P(01,02,03)_M-TH.csv',
-    return a set of zero-padded participant IDs, e.g. {'01','02','03'}.
-    """
-    match = re.search(r'P\(([^)]+)\)', fname)
-    if not match:
-        return set()
-    ids = [x.strip() for x in match.group(1).split(',')]
-    return set(ids)
-
-
-def build_schedule_map(schedules_dir):
+def get_participant_schedule(participant_name):
     """
-    Parse all schedule files and build a map:
-        participant_id (str, zero-padded) ->
-            {
-              'Monday':    [(start, end), ...],
-              'Tuesday':   [...],
-              'Wednesday': [...],
-              'Thursday':  [...],
-              'Friday':    [...],
-            }
-    Logic:
-      - *_M-TH.csv  -> Monday, Wednesday, Thursday
-                       (Tuesday uses M-TH schedule unless a TU override exists)
-      - *_FR.csv    -> Friday
-      - *TU.csv     -> Tuesday override for those participants
+    Class time blocks per weekday for a folder name like 'P001', from the
+    Common.schedules registry:
+        {'Monday': [(start, end), ...], ..., 'Friday': [...]}
+    Only non-DELETE rows are kept. Tuesday is the TU schedule for P14/P16 and
+    M-TH for everyone else. Returns None if the participant has no schedule.
     """
-    mth_files = {}
-    fr_files  = {}
-    tu_files  = {}
-
-    for fname in os.listdir(schedules_dir):
-        fpath = os.path.join(schedules_dir, fname)
-        if not fname.endswith('.csv'):
-            continue
-        ids = extract_participants_from_filename(fname)
-        if not ids:
-            continue
-
-        fname_upper = fname.upper()
-        if fname_upper.endswith('TU.CSV') or '_TU.' in fname_upper:
-            for pid in ids:
-                tu_files[pid] = fpath
-        elif '_FR' in fname_upper:
-            for pid in ids:
-                fr_files[pid] = fpath
-        elif '_M-TH' in fname_upper:
-            for pid in ids:
-                mth_files[pid] = fpath
-
-    all_pids = set(mth_files) | set(fr_files) | set(tu_files)
-
-    schedule_map = {}
-    for pid in all_pids:
-        mth_blocks = parse_schedule_csv(mth_files[pid]) if pid in mth_files else []
-        fr_blocks  = parse_schedule_csv(fr_files[pid])  if pid in fr_files  else []
-        # Tuesday: use TU override if it exists, otherwise fall back to M-TH
-        tu_blocks  = parse_schedule_csv(tu_files[pid])  if pid in tu_files  else mth_blocks
-
-        schedule_map[pid] = {
-            'Monday':    mth_blocks,
-            'Tuesday':   tu_blocks,
-            'Wednesday': mth_blocks,
-            'Thursday':  mth_blocks,
-            'Friday':    fr_blocks,
-        }
+    if participant_id(participant_name) not in scheduled_participants():
+        return None
+    return {
+        day: [(s, e) for s, e, c in schedule_blocks(schedule_path(schedules_path, participant_name, wd))
+              if c.upper() != 'DELETE']
+        for wd, day in enumerate(weekday_names)
+    }
 
-    return schedule_map
 
-
-def get_participant_schedule(participant_name, schedule_map):
-    """
-    Match a folder name like 'P001' or 'P01' to a schedule entry.
-    Tries zero-padded variants: '01', '001', '1'.
-    """
-    num = int(participant_name[1:])
-    for candidate in [f"{num:02d}", f"{num:03d}", str(num)]:
-        if candidate in schedule_map:
-            return schedule_map[candidate]
-    return None
-
-
-# ============================================================
-# === Load all schedules once
-# ============================================================
-print("Loading schedules...")
-schedule_map = build_schedule_map(schedules_path)
-print(f"  Loaded schedules for participants: {sorted(schedule_map.keys())}")
+print(f"Schedules for participants: {scheduled_participants()}")
 
 
 # === Helper: check if a 5-min bin overlaps any class block ===
@@ -183,12 +94,12 @@ def is_valid_hr(bpm):
 
 # === Process each participant ===
 for participant in participant_folders:
-    participant_path = os.path.join(root_path, participant)
-    hr_path = os.path.join(participant_path, "OuraRing", "HeartRate")
-    if not os.path.exists(hr_path):
+    # Labeled HR files of weekdays
+    hr_files = catalog_files(root_path, modality="OuraRing", kind="Labeled", sensor="HeartRate", participants=[participant], skip_weekdays=(5, 6), refresh=False)
+    if not hr_files:
         continue
 
-    p_schedule = get_participant_schedule(participant, schedule_map)
+    p_schedule = get_participant_schedule(participant)
     if p_schedule is None:
         print(f"  WARNING: No schedule found for {participant}. Skipping.")
         continue
@@ -212,25 +123,14 @@ for participant in participant_folders:
     }
     participant_weekday_hr = {day: [] for day in weekday_names}
 
-    for file in os.listdir(hr_path):
-        if not (file.endswith(".csv") and "RAW" not in file):
-            continue
-        try:
-            date_str = file[-14:-4]
-            file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except Exception:
-            continue
-
-        weekday = file_date.weekday()
-        if weekday > 4:
-            continue
-        weekday_name = weekday_names[weekday]
+    for entry in hr_files:
+        file_date = entry['date']
+        weekday_name = weekday_names[entry['weekday']]
 
         if not class_bins_by_weekday[weekday_name]:
             continue  # No class blocks for this day — skip entirely
 
-        file_path = os.path.join(hr_path, file)
-        df = pd.read_csv(file_path)
+        df = read_profile(entry['path'], 'oura_hr_labeled', columns=['Time_In_PST', 'bpm'], dtype={'bpm': 'float64'})
         if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns:
             continue
 
@@ -4,6 +4,12 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.catalog import catalog_files, catalog_participants
+from Common.csv_profiles import read_profile
 
 # === Paths ===
 root_path = "/Users/cibrian/Documents/Github/Research"
@@ -14,10 +20,7 @@ fileName_csv = "time_coverage_metrics.csv"
 os.makedirs(output_folder, exist_ok=True)
 
 # === Find participant folders ===
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(root_path)
 
 # Sort numerically
 def get_participant_number(name):
@@ -77,8 +80,9 @@ def is_valid_hr(bpm):
 
 # === Process each participant ===
 for participant in participant_folders:
-    hr_path = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    if not os.path.exists(hr_path):
+    # Labeled HR files, Fridays skipped
+    hr_files = catalog_files(root_path, modality="OuraRing", kind="Labeled", sensor="HeartRate", participants=[participant], skip_weekdays=(4,), refresh=False)
+    if not hr_files:
         continue
 
     # Track coverage across all valid days for this participant
@@ -87,46 +91,34 @@ for participant in participant_folders:
     participant_30min_hr = {f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}": []
                              for start, end in time_bins_30min}
 
-    for file in os.listdir(hr_path):
-        if file.endswith(".csv") and "RAW" not in file:
-            try:
-                date_str = file[-14:-4]
-                file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-
-            # Skip Fridays
-            if file_date.weekday() == 4:
-                continue
-
-            file_path = os.path.join(hr_path, file)
-            df = pd.read_csv(file_path)
+    for entry in hr_files:
+        df = read_profile(entry['path'], 'oura_hr_labeled', columns=['Time_In_PST', 'bpm'], dtype={'bpm': 'float64'})
 
-            if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns:
-                continue
+        if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns:
+            continue
 
-            df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
+        df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
             
-            # Filter for valid HR samples
-            df['valid_hr'] = df['bpm'].apply(is_valid_hr)
+        # Filter for valid HR samples
+        df['valid_hr'] = df['bpm'].apply(is_valid_hr)
             
-            # === Calculate coverage for 5-min bins ===
-            for start, end in time_bins_5min:
-                bin_df = df[df['TimeObj'].between(start, end)]
-                interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+        # === Calculate coverage for 5-min bins ===
+        for start, end in time_bins_5min:
+            bin_df = df[df['TimeObj'].between(start, end)]
+            interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
                 
-                # Check if bin has at least 1 valid HR sample
-                has_valid_sample = bin_df['valid_hr'].any()
-                participant_5min_coverage[interval].append(1 if has_valid_sample else 0)
+            # Check if bin has at least 1 valid HR sample
+            has_valid_sample = bin_df['valid_hr'].any()
+            participant_5min_coverage[interval].append(1 if has_valid_sample else 0)
             
-            # === Calculate HR averages for 30-min bins ===
-            for start, end in time_bins_30min:
-                bin_df = df[df['TimeObj'].between(start, end) & df['valid_hr']]
-                interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+        # === Calculate HR averages for 30-min bins ===
+        for start, end in time_bins_30min:
+            bin_df = df[df['TimeObj'].between(start, end) & df['valid_hr']]
+            interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
                 
-                if not bin_df.empty:
-                    mean_bpm = bin_df['bpm'].mean()
-                    participant_30min_hr[interval].append(mean_bpm)
+            if not bin_df.empty:
+                mean_bpm = bin_df['bpm'].mean()
+                participant_30min_hr[interval].append(mean_bpm)
     
     # === Aggregate coverage across days ===
     # For each 5-min bin, calculate % of days that had coverage
@@ -3,7 +3,11 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.cube import load_cube, rollup
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
 output_folder = os.path.join(root_path, "1_visualization/HeatMaps/OuraRing")
@@ -14,53 +18,16 @@ output_filename = "fig2_use_across_activities.png"
 
 os.makedirs(output_folder, exist_ok=True)
 
-# Get all participant folders
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-
-for participant in participant_folders:
-    participant_number = participant
-
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-
-    csv_files = [
-        f for f in os.listdir(heart_rate_folder)
-        if f.endswith(".csv") and "RAW" not in f
-    ]
-
-    for file in csv_files:
-        # Extract the date string from the filename
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
+# Oura HR cells of every participant from the aggregate cube, Fridays skipped
+cube = load_cube(root_path, "OuraRing", skip_weekdays=(4,))
 
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            # If the date can't be parsed, skip the file
-            continue
-
-        # Check if the date is a Friday (weekday() == 4 means Friday)
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-
-        df['participant'] = participant_number
-        all_data.append(df[[activity_column, 'participant']])
-
-# Combine all data
-if not all_data:
+if cube.empty:
     print("No labeled CSV files with activities found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
-
 # Count number of data points per activity per participant
-counts = combined_df.groupby(['participant', activity_column]).size().reset_index(name='count')
+counts = rollup(cube, ['participant', activity_column], sketches=False)
+counts = counts[['participant', activity_column, 'rows']].rename(columns={'rows': 'count'})
 
 # Pivot: rows = activity, columns = participant
 heatmap_data = counts.pivot_table(index=activity_column, columns='participant', values='count', fill_value=0)
@@ -4,7 +4,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.cube import load_cube, rollup
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
 output_folder = os.path.join(root_path, "1_visualization/Heatmaps/OuraRing")
@@ -15,68 +19,19 @@ output_filename = "fig1_HR_across_days"
 # Create Heatmaps folder if it doesn't exist
 os.makedirs(output_folder, exist_ok=True)
 
-# Get all participant folders
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-
-for participant in participant_folders:
-    participant_number = participant
-
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    if not os.path.exists(heart_rate_folder):
-        continue
-
-    csv_files = [
-        f for f in os.listdir(heart_rate_folder)
-        if f.endswith(".csv") and "RAW" not in f
-    ]
-
-    for file in csv_files:
-        # Extract the date string from the filename
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
-
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            # If the date can't be parsed, skip the file
-            continue
+# Oura HR cells of every participant from the aggregate cube, Fridays skipped
+cube = load_cube(root_path, "OuraRing", skip_weekdays=(4,))
 
-        # Check if the date is a Friday (weekday() == 4 means Friday)
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-
-        if timestamp_column not in df.columns or bpm_column not in df.columns:
-            continue
-
-        # Convert UNIX time to date
-        df['date'] = pd.to_datetime(df[timestamp_column], unit='s').dt.date
-        df['participant'] = participant_number
-        df = df[['date', 'participant', bpm_column]]
-        all_data.append(df)
-
-# Combine all data
-if not all_data:
+if cube.empty:
     print("No labeled CSV files found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
-
-# Add weekday info
-combined_df['date'] = pd.to_datetime(combined_df['date'])
-combined_df['weekday'] = combined_df['date'].dt.weekday  # Monday = 0
-
-# Filter for Monday–Thursday only
-combined_df = combined_df[combined_df['weekday'].isin([0, 1, 2, 3])]
+# Filter for Monday–Thursday only, by the (Pacific) date of each file
+cube = cube[cube['weekday'].isin([0, 1, 2, 3])]
 
 # Calculate average BPM per weekday per participant
-avg_bpm = combined_df.groupby(['participant', 'weekday'])[bpm_column].mean().reset_index()
+avg_bpm = rollup(cube, ['participant', 'weekday'], sketches=False)
+avg_bpm = avg_bpm[['participant', 'weekday', 'mean']].rename(columns={'mean': bpm_column})
 
 # Pivot: rows = weekday, columns = participant, values = average BPM
 heatmap_data = avg_bpm.pivot_table(index='weekday', columns='participant', values=bpm_column, fill_value=0)
@@ -3,7 +3,12 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
-import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from Common.catalog import catalog_participants
+from Common.cube import bin_of, load_cube, rollup
 
 # === Paths ===
 root_path = "/Users/tommoore/Documents/GitHub/Research"
@@ -12,10 +17,7 @@ fileName = "fig7_hr_hour.png"
 os.makedirs(output_folder, exist_ok=True)
 
 # === Find participant folders ===
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if os.path.isdir(os.path.join(root_path, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(root_path)
 
 # Sort numerically
 def get_participant_number(name):
@@ -39,51 +41,14 @@ heatmap_data = pd.DataFrame(
     columns=participant_folders
 )
 
-# Safe time parser 
-def parse_time(s):
-    try:
-        return datetime.strptime(s, "%H:%M:%S.%f").time()
-    except ValueError:
-        return datetime.strptime(s, "%H:%M:%S").time()
-
-# === Process each participant ===
-for participant in participant_folders:
-    hr_path = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    if not os.path.exists(hr_path):
-        continue
-
-    for file in os.listdir(hr_path):
-        if file.endswith(".csv") and "RAW" not in file:
-            try:
-                date_str = file[-14:-4]
-                file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-
-            if file_date.weekday() == 4:
-                continue
-
-            file_path = os.path.join(hr_path, file)
-            df = pd.read_csv(file_path)
-
-            if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns:
-                continue
-
-            df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
+# === Mean bpm per 30-min bin of each participant from the aggregate cube, Fridays skipped ===
+cube = load_cube(root_path, "OuraRing", participants=participant_folders, skip_weekdays=(4,), refresh=False)
+binned = rollup(cube, ['participant', 'bin'], bin_minutes=30, sketches=False)
+intervals = {bin_of(start, 30): f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}" for start, end in time_bins}
 
-            for start, end in time_bins:
-                bin_df = df[df['TimeObj'].between(start, end)]
-                interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
-                if not bin_df.empty:
-                    mean_bpm = bin_df['bpm'].mean()
-                    # If multiple files contribute, average them
-                    if heatmap_data.loc[interval, participant] == 0.0:
-                        heatmap_data.loc[interval, participant] = mean_bpm
-                    else:
-                        # Average with existing mean to merge multiple files
-                        heatmap_data.loc[interval, participant] = (
-                            heatmap_data.loc[interval, participant] + mean_bpm
-                        ) / 2
+for participant, time_bin, count, mean_bpm in zip(binned['participant'], binned['bin'], binned['count'], binned['mean']):
+    if time_bin in intervals and count > 0:
+        heatmap_data.loc[intervals[time_bin], participant] = mean_bpm
 
 # Force 12:00–12:30 bin for P14 and P16 to zero
 interval_to_zero = "12:00-12:30"
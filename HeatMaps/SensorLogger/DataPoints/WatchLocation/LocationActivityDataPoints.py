@@ -3,7 +3,12 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from Common.catalog import catalog_files
+from Common.csv_profiles import read_profile
 
 rootPath = "/Users/tommoore/Documents/GitHub/Research"
 outputFolder = os.path.join(rootPath, "Heatmaps/SensorLogger/WatchLocation")
@@ -13,44 +18,15 @@ outputFilename = "WatchLocationActivityDataPointsHeatMap.png"
 
 os.makedirs(outputFolder, exist_ok=True)
 
-# Get all participant folders
-participant_folders = [
-    f for f in os.listdir(rootPath)
-    if f.startswith("P") and os.path.isdir(os.path.join(rootPath, f))
-]
-
+# Labeled (TRUE) SensorLogger WatchLocation files of every participant, Fridays skipped
 all_data = []
 
-for participant in participant_folders:
-    participantNumber = participant
-    sensorLoggerFolder = os.path.join(rootPath, participant, "SensorLogger")
-
-    csv_files = []
-    for root, dirs, files in os.walk(sensorLoggerFolder):
-        for f in files:
-            if f.endswith(".csv") and "TRUE" in f and "WatchLocation" in f:
-                csv_files.append(os.path.join(root, f))
-
-
-    for file in csv_files:
-        dateStr = file[-14:-4]
-        normalized = dateStr.replace("_", "-")
-        
-        try:
-            fileDate = datetime.strptime(normalized, "%Y-%m-%d")
-        except ValueError:
-            # If the date can't be parsed, skip the file
-            continue
-
-        # Check if the date is a Friday (weekday() == 4 means Friday)
-        if fileDate.weekday() == 4:
-            continue
-
-        filePath = os.path.join(sensorLoggerFolder, file)
-        df = pd.read_csv(filePath)
+for entry in catalog_files(rootPath, modality="SensorLogger", kind="Labeled", sensor="WatchLocation", skip_weekdays=(4,)):
+    participantNumber = entry['participant']
+    df = read_profile(entry['path'], 'sensorlogger_true', columns=[activityColumn], dtype={'class': object})
 
-        df['participant'] = participantNumber
-        all_data.append(df[[activityColumn, 'participant']])
+    df['participant'] = participantNumber
+    all_data.append(df[[activityColumn, 'participant']])
 
 # Combine all data
 if not all_data:
@@ -4,6 +4,14 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from Common.coverage import bin_counts, bin_spec
+from Common.schedules import seconds_of_day
+from Common.catalog import catalog_files, catalog_participants
+from Common.csv_profiles import read_profile
 
 # Paths
 rootPath = "/Users/tommoore/Documents/GitHub/Research"
@@ -12,10 +20,7 @@ output_file = os.path.join(outputFolder, "WatchLocationTimeStampDataPoints.png")
 os.makedirs(outputFolder, exist_ok=True)
 
 # Find participant folders
-participant_folders = [
-    f for f in os.listdir(rootPath)
-    if os.path.isdir(os.path.join(rootPath, f)) and f.startswith('P')
-]
+participant_folders = catalog_participants(rootPath)
 
 # Sort numerically
 def getParticipantNumber(name):
@@ -39,51 +44,19 @@ heatmap_data = pd.DataFrame(
     columns=participant_folders
 )
 
-# Safe time parser 
-def parseTime(s):
-    try:
-        return datetime.strptime(s, "%H:%M:%S.%f").time()
-    except ValueError:
-        return datetime.strptime(s, "%H:%M:%S").time()
+# All 30-min bin counts of a file come from one histogram over seconds-of-day
+timeBinsSpec = bin_spec(timeBins)
 
 # Process each participant 
 for participant in participant_folders:
-    sensorLoggerFolder = os.path.join(rootPath, participant, "SensorLogger")
-    if not os.path.exists(sensorLoggerFolder):
-        continue
-
-    csv_files = []
-    for root, dirs, files in os.walk(sensorLoggerFolder):
-        for f in files:
-            if f.endswith(".csv") and "TRUE" in f and "WatchLocation" in f:
-                csv_files.append(os.path.join(root, f))
-    for file in csv_files:
-        # Skip if RAW in filename or if date is Friday
-        if file.endswith(".csv") and "TRUE" in file:
-            try:
-                # Extract date substring before .csv (last 14 chars before '.csv' expected as YYYY-MM-DD)
-                dateStr = file[-14:-4]
-                normalized = dateStr.replace("_", "-")
-                fileDate = datetime.strptime(normalized, "%Y-%m-%d").date()
-            except Exception:
-                # If date parsing fails, skip this file
-                continue
-
-            # Skip if the date is a Friday (weekday() == 4)
-            if fileDate.weekday() == 4:
-                continue
-
-            filePath = os.path.join(sensorLoggerFolder, file)
-            df = pd.read_csv(filePath)
-
-            if 'Time_In_PST' not in df.columns:
-                continue
-
-            df['TimeObj'] = df['Time_In_PST'].apply(parseTime)
-            for start, end in timeBins:
-                count = df[df['TimeObj'].between(start, end)].shape[0]
-                interval = f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
-                heatmap_data.loc[interval, participant] += count
+    for entry in catalog_files(rootPath, modality="SensorLogger", kind="Labeled", sensor="WatchLocation", participants=[participant], skip_weekdays=(4,), refresh=False):
+        df = read_profile(entry['path'], 'sensorlogger_true', columns=['Time_In_PST'])
+
+        if 'Time_In_PST' not in df.columns:
+            continue
+
+        seconds = seconds_of_day(df['Time_In_PST'].astype(str))
+        heatmap_data[participant] += bin_counts(seconds, timeBinsSpec)
 
 
 
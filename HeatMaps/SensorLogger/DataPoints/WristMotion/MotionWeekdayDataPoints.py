@@ -4,7 +4,12 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[4]))
+from Common.catalog import catalog_files
+from Common.csv_profiles import read_profile
 
 rootPath = "/Users/tommoore/Documents/GitHub/Research"
 outputFolder = os.path.join(rootPath, "Heatmaps/SensorLogger/WristMotion")
@@ -15,58 +20,19 @@ outputPath = os.path.join(outputFolder, outputFilename)
 # Create Heatmaps folder if it doesn't exist
 os.makedirs(outputFolder, exist_ok=True)
 
-# Get all participant folders
-participantFolders = [
-    f for f in os.listdir(rootPath)
-    if f.startswith("P") and os.path.isdir(os.path.join(rootPath, f))
-]
-
+# Labeled (TRUE) SensorLogger WristMotion files of every participant, Fridays skipped
 all_data = []
 
-for participant in participantFolders:
-    participantNumber = participant
-
-    sensorLoggerFolder = os.path.join(rootPath, participant, "SensorLogger")
-    if not os.path.exists(sensorLoggerFolder):
+for entry in catalog_files(rootPath, modality="SensorLogger", kind="Labeled", sensor="WristMotion", skip_weekdays=(4,)):
+    participantNumber = entry['participant']
+    df = read_profile(entry['path'], 'sensorlogger_true', columns=[timestampColumn])
+    if timestampColumn not in df.columns:
         continue
 
-    csv_files = []
-    for root, dirs, files in os.walk(sensorLoggerFolder):
-        for f in files:
-            if f.endswith(".csv") and "TRUE" in f and "WristMotion" in f:
-                csv_files.append(os.path.join(root, f))
-
-    for file in csv_files:
-        # Extract the date string from the filename
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
-
-        # Skip if RAW in filename or if date is Friday
-        if file.endswith(".csv") and "TRUE" in file:
-            try:
-                # Extract date substring before .csv (last 14 chars before '.csv' expected as YYYY-MM-DD)
-                dateStr = file[-14:-4]
-                normalized = dateStr.replace("_", "-")
-                fileDate = datetime.strptime(normalized, "%Y-%m-%d").date()
-            except Exception:
-                # If date parsing fails, skip this file
-                continue
-
-        # Check if the date is a Friday (weekday() == 4 means Friday)
-        if fileDate.weekday() == 4:
-            continue
-
-        file_path = os.path.join(sensorLoggerFolder, file)
-        df = pd.read_csv(file_path)
-
-        file_path = os.path.join(sensorLoggerFolder, file)
-        df = pd.read_csv(file_path)
-        if timestampColumn not in df.columns:
-            continue
-
-        # Convert UNIX time to date
-        df['date'] = pd.to_datetime(df[timestampColumn], unit='ns').dt.date
-        df['participant'] = participantNumber
-        all_data.append(df[['date', 'participant']])
+    # Convert UNIX time to date
+    df['date'] = pd.to_datetime(df[timestampColumn], unit='ns').dt.date
+    df['participant'] = participantNumber
+    all_data.append(df[['date', 'participant']])
 
 # Combine all data
 if not all_data:
@@ -1,26 +1,116 @@
 import os
 import re
+import sys
 import argparse
+from pathlib import Path
 import numpy as np
 import pandas as pd
 from scipy.stats import pearsonr
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from Common.mocopi import ACCELERATION_COLUMNS, IMU_COLUMNS
+from Common.mocopi_store import parquet_available
+from Common.schedules import seconds_of_day
+
 # === Paths ===
 # Root of the research repo. Participant data lives at ROOT_PATH/P###/Mocopi/Labeled,
 # same layout used by the heatmap/coverage script.
 ROOT_PATH = "/Users/cibrian/Documents/GitHub/Research"
 SUMMARY_DIR = os.path.join(ROOT_PATH, "1_visualization", "Movement")
 
+# Labeled columns the kinematics need, and the columns epoching needs after them
+KINEMATICS_COLUMNS = ['class', 'Time_In_PST', 'time'] + ACCELERATION_COLUMNS
+EPOCH_INPUT_COLUMNS = ['Sensor', 'Date', 'class', 'time', 'Acc_Mag', 'Jerk_Mag']
+
+# Optional combined intermediate: these are stored as float32, the labels as dictionaries
+COMBINED_FLOAT32_COLUMNS = IMU_COLUMNS + ['Jerk_Mag', 'Acc_Mag']
+COMBINED_DICTIONARY_COLUMNS = ['class', 'Sensor', 'Date']
+
 
 def get_participant_number(name):
     return int(name[1:])
 
 
-def clean_and_combine_raw_data(base_directory, participant_id):
+def labeled_sensor(file):
+    """Jaime's exact naming parser to find the sensor placement (P001MocopiHeadDeviceOne... -> Head)."""
+    parts = file.split("Mocopi")
+    if len(parts) > 1:
+        return parts[1].split("Device")[0]
+    return "Unknown"
+
+
+def add_kinematics(group_df):
+    """
+    Sort one (Sensor, Date) group by Time_In_PST and add Jerk_Mag (magnitude of
+    the sample-to-sample change in acceleration, NaN on the first row) and
+    Acc_Mag. The group is sorted on its parsed clock time; no timestamp strings
+    are built.
+    """
+    order = np.argsort(seconds_of_day(group_df['Time_In_PST']), kind='stable')
+    group_df = group_df.iloc[order].reset_index(drop=True)
+
+    acc_x, acc_y, acc_z = (group_df[col].to_numpy(dtype=np.float64) for col in ACCELERATION_COLUMNS)
+    jerk_mag = np.full(len(group_df), np.nan)
+    jerk_mag[1:] = np.sqrt(np.diff(acc_x)**2 + np.diff(acc_y)**2 + np.diff(acc_z)**2)
+
+    group_df['Jerk_Mag'] = jerk_mag
+    group_df['Acc_Mag'] = np.sqrt(acc_x**2 + acc_y**2 + acc_z**2)
+    return group_df
+
+
+def append_combined_parquet(writer, group_df, path):
+    """
+    Add one (Sensor, Date) group to the combined Parquet file as a row group,
+    with COMBINED_FLOAT32_COLUMNS as float32 and zstd compression. Pass
+    writer=None for the first group, keep the returned writer for the next
+    ones and close() it at the end.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(group_df, preserve_index=False)
+    if writer is None:
+        fields = []
+        for field in table.schema:
+            if field.name in COMBINED_FLOAT32_COLUMNS:
+                field = field.with_type(pa.float32())
+            elif field.name in COMBINED_DICTIONARY_COLUMNS:
+                field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            fields.append(field)
+        writer = pq.ParquetWriter(path, pa.schema(fields), compression='zstd')
+    # Every group has its own classes (or none at all), so cast to the file's schema
+    writer.write_table(table.cast(writer.schema))
+    return writer
+
+
+def grouped_mean_std(values, groups, n_groups):
+    """
+    Per-group NaN-skipping mean and sample std (ddof=1) of `values`, with
+    `groups` the group index of every value. Two passes of np.bincount: sums,
+    then squared deviations from the group mean.
+    """
+    ok = ~np.isnan(values)
+    values, groups = values[ok], groups[ok]
+    count = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(groups, weights=values, minlength=n_groups) / count
+        deviation = values - mean[groups]
+        std = np.sqrt(np.bincount(groups, weights=deviation * deviation, minlength=n_groups) / (count - 1))
+    std[count < 2] = np.nan
+    return mean, std
+
+
+def clean_and_combine_raw_data(base_directory, participant_id, write_combined=False):
     """
     [Phase 1 - Jaime's Logic]
     Dynamically scans the directory for YYYY-MM-DD subfolders, maps sensors 
-    from raw file names, and merges everything into a chronological master CSV.
+    from raw file names, and merges everything into one chronological frame
+    with the EPOCH_INPUT_COLUMNS. Only the KINEMATICS_COLUMNS are read unless
+    write_combined is set; then every column is read and the whole
+    chronological dataset is streamed to <participant>_dates_combined.parquet.
     """
     print(f"\n[{participant_id} - Step 1/3] Combining raw daily files...")
     
@@ -34,64 +124,56 @@ def clean_and_combine_raw_data(base_directory, participant_id):
         return None
         
     print(f"      Found date subfolders: {dates}")
-    combined_list = []
-
+    # Group the files by (Sensor, Date) first, keeping listdir order inside a group
+    group_files = {}
     for date in dates:
         day_folder = os.path.join(base_directory, date)
         for file in os.listdir(day_folder):
             if file.endswith('.csv'):
-                file_path = os.path.join(day_folder, file)
-                
-                # Jaime's exact naming parser to find the sensor placement
-                parts = file.split("Mocopi")
-                if len(parts) > 1:
-                    sensor = parts[1].split("Device")[0]
-                else:
-                    sensor = "Unknown"
-                    
-                try:
-                    temp_df = pd.read_csv(file_path)
-                    temp_df['Sensor'] = sensor
-                    temp_df['Date'] = date
-                    combined_list.append(temp_df)
-                except Exception as e:
-                    print(f"      Error reading {file}: {e}")
+                group_files.setdefault((labeled_sensor(file), date), []).append(os.path.join(day_folder, file))
 
-    if not combined_list:
+    if not group_files:
         print(f"      [Error] No raw CSV files found inside the date folders for {participant_id}.")
         return None
 
-    combined = pd.concat(combined_list, ignore_index=True)
-    
-    # Jaime's timeseries sorting logic
-    combined = combined.sort_values(['Sensor', 'Date', 'Time_In_PST']).reset_index(drop=True)
-    
-    # Jaime's exact raw Jerk and Acceleration Magnitude calculations
+    output_combined_path = os.path.join(base_directory, f"{participant_id}_dates_combined.parquet")
+    if write_combined and not parquet_available():
+        print("      [Warning] pyarrow is not installed; not writing the master combined dataset.")
+        write_combined = False
+    usecols = None if write_combined else KINEMATICS_COLUMNS
+
+    # Jaime's timeseries sorting plus raw Jerk and Acceleration Magnitude,
+    # one (Sensor, Date) group at a time
     print(f"[{participant_id} - Step 2/3] Computing raw kinematics (Acc Magnitude, Jerk)...")
-    combined['Jerk_X'] = combined.groupby(['Sensor', 'Date'])['Acceleration X'].diff()
-    combined['Jerk_Y'] = combined.groupby(['Sensor', 'Date'])['Acceleration Y'].diff()
-    combined['Jerk_Z'] = combined.groupby(['Sensor', 'Date'])['Acceleration Z'].diff()
-
-    combined['Jerk_Mag'] = np.sqrt(
-        combined['Jerk_X']**2 +
-        combined['Jerk_Y']**2 +
-        combined['Jerk_Z']**2
-    )
+    combined_list = []
+    writer = None
+    for (sensor, date), paths in sorted(group_files.items()):
+        frames = []
+        for file_path in paths:
+            try:
+                temp_df = pd.read_csv(file_path, usecols=usecols)
+                temp_df['Sensor'] = sensor
+                temp_df['Date'] = date
+                frames.append(temp_df)
+            except Exception as e:
+                print(f"      Error reading {os.path.basename(file_path)}: {e}")
+        if not frames:
+            continue
 
-    combined['Acc_Mag'] = np.sqrt(
-        combined['Acceleration X']**2 +
-        combined['Acceleration Y']**2 +
-        combined['Acceleration Z']**2
-    )
+        group_df = add_kinematics(pd.concat(frames, ignore_index=True))
+        if write_combined:
+            writer = append_combined_parquet(writer, group_df, output_combined_path)
+        combined_list.append(group_df[EPOCH_INPUT_COLUMNS])
 
-    # Clean up temporary component columns to save runtime memory
-    combined = combined.drop(columns=['Jerk_X', 'Jerk_Y', 'Jerk_Z'])
-    
-    # Save master raw combined file
-    output_combined_path = os.path.join(base_directory, f"{participant_id}_dates_combined.csv")
-    combined.to_csv(output_combined_path, index=False)
-    print(f"      Master combined dataset saved to: {output_combined_path}")
-    return combined
+    if writer is not None:
+        writer.close()
+        print(f"      Master combined dataset saved to: {output_combined_path}")
+
+    if not combined_list:
+        print(f"      [Error] No raw CSV files found inside the date folders for {participant_id}.")
+        return None
+
+    return pd.concat(combined_list, ignore_index=True)
 
 
 def generate_epoch_features(combined_df, base_directory, participant_id, movement_threshold=1.15):
@@ -101,20 +183,55 @@ def generate_epoch_features(combined_df, base_directory, participant_id, movemen
     variabilities, jerk profiles, and active-vs-sedentary categorizations.
     """
     print(f"[{participant_id} - Step 3/3] Epoching raw data to 1-minute blocks...")
-    
-    # Combine recording date with clock time so epoch timestamps use the actual school day.
-    combined_df['Timestamp'] = pd.to_datetime(
-        combined_df['Date'].astype(str) + ' ' + combined_df['Time_In_PST'].astype(str),
-        errors='coerce',
-    )
-    combined_df['Epoch_1Min'] = combined_df['Timestamp'].dt.floor('1min')
-    
+
+    # `time` is the wall-clock epoch second of the sample (Date + Time_In_PST
+    # read as UTC), so time // 60 is the epoch's minute on the actual school day.
+    times = combined_df['time'].to_numpy(dtype=np.float64, na_value=np.nan)
+    class_codes, classes = pd.factorize(combined_df['class'], sort=True)
+    sensors = combined_df['Sensor'].to_numpy()
+    dates = combined_df['Date'].to_numpy()
+
+    # Rows come in (Sensor, Date, time) order, so a (Sensor, Date) group is one slice
+    new_group = np.r_[True, (sensors[1:] != sensors[:-1]) | (dates[1:] != dates[:-1])]
+    group_ids = np.cumsum(new_group) - 1
+
+    # Rows without a class or time have no epoch (groupby drops NaN keys)
+    rows = np.flatnonzero((class_codes >= 0) & ~np.isnan(times))
+    group_ids = group_ids[rows]
+    class_codes = class_codes[rows]
+    minutes = (times[rows] // 60).astype(np.int64)
+
+    # Runs of rows with the same (group, class, minute) key; a class that comes
+    # back within the same minute starts a new run, so runs are merged by key
+    new_run = ((np.diff(group_ids, prepend=-1) != 0)
+               | (np.diff(class_codes, prepend=-1) != 0)
+               | (np.diff(minutes, prepend=-1) != 0))
+    run_starts = np.flatnonzero(new_run)
+    run_group, run_class, run_minute = group_ids[run_starts], class_codes[run_starts], minutes[run_starts]
+
+    order = np.lexsort((run_minute, run_class, run_group))
+    new_epoch = ((np.diff(run_group[order], prepend=-1) != 0)
+                 | (np.diff(run_class[order], prepend=-1) != 0)
+                 | (np.diff(run_minute[order], prepend=-1) != 0))
+    epoch_of_run = np.empty(len(run_starts), dtype=np.int64)
+    epoch_of_run[order] = np.cumsum(new_epoch) - 1
+    epoch_ids = epoch_of_run[np.cumsum(new_run) - 1]
+    n_epochs = int(new_epoch.sum())
+
     # Calculate window metrics (including standard deviation for variability)
-    epoch_df = combined_df.groupby(['Sensor', 'Date', 'class', 'Epoch_1Min']).agg(
-        Intensity=('Acc_Mag', 'mean'),
-        Variability=('Acc_Mag', 'std'),  # Movement variability
-        Jerk=('Jerk_Mag', 'mean')        # Windowed average Jerk
-    ).reset_index()
+    intensity, variability = grouped_mean_std(combined_df['Acc_Mag'].to_numpy()[rows], epoch_ids, n_epochs)
+    jerk, _ = grouped_mean_std(combined_df['Jerk_Mag'].to_numpy()[rows], epoch_ids, n_epochs)
+
+    first_runs = run_starts[order[new_epoch]]
+    epoch_df = pd.DataFrame({
+        'Sensor': sensors[rows[first_runs]],
+        'Date': dates[rows[first_runs]],
+        'class': classes.to_numpy()[class_codes[first_runs]],
+        'Epoch_1Min': (minutes[first_runs] * 60).astype('datetime64[s]').astype('datetime64[ns]'),
+        'Intensity': intensity,
+        'Variability': variability,  # Movement variability
+        'Jerk': jerk,                # Windowed average Jerk
+    })
     
     # Classify active vs low-movement window ratios
     epoch_df['Is_Active'] = (epoch_df['Intensity'] > movement_threshold).astype(int)
@@ -303,6 +420,12 @@ def main():
         default="all",
         help="Specific participant ID to process (e.g. 'P002', 'P014'), or 'all' (default) to run every participant found."
     )
+    parser.add_argument(
+        "--write-combined",
+        action="store_true",
+        help="Also write each participant's full chronological dataset (every column plus Acc_Mag/Jerk_Mag) "
+             "to Mocopi/Labeled/<participant>_dates_combined.parquet."
+    )
     args = parser.parse_args()
 
     if not os.path.exists(ROOT_PATH):
@@ -351,7 +474,7 @@ def main():
         print(f"========================================================")
 
         # Step 1 & 2: Clean and merge raw timeseries (Jaime's pipeline)
-        combined_data = clean_and_combine_raw_data(folder_path, p_id)
+        combined_data = clean_and_combine_raw_data(folder_path, p_id, write_combined=args.write_combined)
 
         if combined_data is not None:
             # Step 3: Run windowed feature aggregation (Your pipeline)
@@ -2,8 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-import glob
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.catalog import catalog_files, catalog_participants
+from Common.csv_profiles import read_profile
 
 # ============ CONFIGURATION ============
 root_path = "/Users/tommoore/Documents/GitHub/Research"
@@ -35,22 +39,22 @@ def extract_joint_from_filename(filename):
         return None
 
 # ============ DATA LOADING ============
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
+participant_folders = catalog_participants(root_path)
 print(f"Found participant folders: {participant_folders}")
 
 all_data = []
 
 for participant in participant_folders:
     participant_number = participant
-    mocopi_folder = os.path.join(root_path, participant, "Mocopi", "Labeled")
-    if not os.path.exists(mocopi_folder):
-        print(f"⚠️ Skipping {participant_number}: Mocopi folder not found.")
+    csv_files = [
+        entry['path'] for entry in catalog_files(
+            root_path, modality="Mocopi", kind="Labeled", participants=[participant], dated=False, refresh=False
+        )
+    ]
+    if not csv_files:
+        print(f"⚠️ Skipping {participant_number}: no Mocopi Labeled CSVs found.")
         continue
 
-    csv_files = glob.glob(os.path.join(mocopi_folder, "**", "*.csv"), recursive=True)
     print(f"  {participant_number}: Found {len(csv_files)} CSV files.")
 
     for file in csv_files:
@@ -60,7 +64,7 @@ for participant in participant_folders:
             continue
 
         try:
-            df = pd.read_csv(file)
+            df = read_profile(file, 'mocopi_labeled', columns=['time'])
         except Exception as e:
             print(f"❌ Error reading {file}: {e}")
             continue
@@ -16,9 +16,13 @@ Approach
 --------
 The expensive part of the original script -- loading raw data, splitting
 by day, converting timestamps, labeling each row with its scheduled class,
-and dropping DELETE rows -- does NOT depend on bin width. So it's done
-ONCE per participant. Only the binning + occupancy-check step is repeated
-for each candidate bin width.
+and dropping DELETE rows -- does NOT depend on bin width. It comes from
+Common.oura_store, which labels each participant once and reuses the cached
+result until the RAW file or a schedule changes. Each day's valid-HR sample
+times are sorted once.
+Only the binning + occupancy-check step is repeated for each candidate bin
+width, and that is one np.searchsorted per schedule row (bins are
+(start, end], as in the labeling), so fine-grained sweeps stay fast.
 
 Outputs
 -------
@@ -28,141 +32,66 @@ Outputs
 - Printed table to console
 """
 
-from datetime import datetime, timezone, timedelta
+from pathlib import Path
 import os
+import sys
 
 import pandas as pd
 import numpy as np
-import pytz
 import matplotlib.pyplot as plt
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.coverage import US_PER_SECOND, interval_counts, sorted_sample_us, split_edges
+from Common.oura_store import labeled_days, raw_hr_path
+from Common.schedules import schedule_blocks, schedule_path, time_to_seconds
+
 # === Candidate bin widths to test (minutes) ===
+# Any widths work, including fractions of a minute; e.g. every 30 s from
+# 30 s to 60 min is [s / 60 for s in range(30, 3601, 30)].
 CANDIDATE_BIN_MINUTES = [1, 2, 3, 5, 7, 10, 15, 20, 25, 30]
 
 # === Paths ===
 root_path = "/Users/cibrian/Documents/GitHub/Research"
+schedules_path = os.path.join(root_path, "Schedules")
 output_folder = os.path.join(root_path, "1_visualization/Heatmaps/OuraRing/BinSizeSweep")
 os.makedirs(output_folder, exist_ok=True)
 
 participant_numbers = ["01", "02", "03", "04", "05", "06", "07", "08", "09", "12", "14", "16"]
 
 
-# === Shared helper functions (same as coverage script) ===
-
-def convert_timestamp_to_pacific(timestamp):
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_pacific = dt_utc.astimezone(pacific_tz)
-    return dt_pacific.time()
-
-
-def convert_string_to_time(time_string):
-    return datetime.strptime(time_string, "%H:%M:%S").time()
-
-
-def convert_iso_to_pacific_date(timestamp):
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_pacific = dt_utc.astimezone(pacific_tz)
-    return dt_pacific.date()
-
+# === Helpers ===
 
-def convert_iso_to_unix(iso_timestamp):
-    dt = datetime.strptime(iso_timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt = dt.replace(tzinfo=timezone.utc)
-    return int(dt.timestamp())
+def to_us(t):
+    return round(time_to_seconds(t) * US_PER_SECOND)
 
 
-def get_day_of_week(date_obj):
-    return date_obj.strftime("%A")
+# === Step 1: load each participant's labeled days ONCE, keep sorted samples + class blocks ===
+# (labeling comes from Common.oura_store, which caches it on disk keyed by the
+#  RAW file and schedule hashes; binning happens later per bin width)
 
-
-def generate_bins(start_time, end_time, bin_minutes):
-    """Split (start_time, end_time] into consecutive bin_minutes-wide bins."""
-    base_date = datetime(1900, 1, 1)
-    dt = datetime.combine(base_date, start_time)
-    end_dt = datetime.combine(base_date, end_time)
-    bins = []
-    while dt < end_dt:
-        bin_end = min(dt + timedelta(minutes=bin_minutes), end_dt)
-        bins.append((dt.time(), bin_end.time()))
-        dt = bin_end
-    return bins
-
-
-# === Step 1: build labeled dfList + schedulePerDay ONCE per participant ===
-# (identical logic to the coverage script, minus the CSV-writing /
-#  bin-occupancy steps, which happen later per bin width)
-
-participant_data = {}  # pNum -> {'dfList': [...], 'schedulePerDay': [...]}
+# pNum -> {'validUs': [...], 'classBlocks': [...]}, one entry per day:
+#   validUs:     sorted microseconds-of-day of the valid-HR (40-180 bpm) samples
+#   classBlocks: (start_us, end_us) of the day's non-DELETE schedule rows
+participant_data = {}
 
 for pNum in participant_numbers:
-    rawDataPath = f"{root_path}/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrRAW.csv"
-    if not os.path.exists(rawDataPath):
+    if not os.path.exists(raw_hr_path(root_path, f"P0{pNum}")):
         print(f"Raw data not found for P0{pNum}, skipping...")
         continue
 
-    print(f"Loading & labeling Participant P0{pNum}...")
-    rawData = pd.read_csv(rawDataPath)
-
-    if pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv(f"{root_path}/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv(f"{root_path}/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        if pNum in ['14', '16']:
-            scheduleDataTu = pd.read_csv(f"{root_path}/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv(f"{root_path}/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv(f"{root_path}/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
-
-    zero_time = datetime(1900, 1, 1, 0, 0, 0).time()
-    rawData.insert(0, 'class', "NONE")
-    rawData.insert(1, 'Time_In_PST', zero_time)
-    rawData.insert(2, 'time', 0)
-
-    prevDate = convert_iso_to_pacific_date(rawData.iloc[0]['timestamp'])
-    start_idx = 0
-    dfList = []
-    for idx, row in enumerate(rawData.itertuples()):
-        currDate = convert_iso_to_pacific_date(row.timestamp)
-        if currDate != prevDate:
-            dfList.append(rawData.iloc[start_idx:idx].copy())
-            start_idx = idx
-            prevDate = currDate
-    dfList.append(rawData.iloc[start_idx:].copy())
-
-    for df in dfList:
-        df.loc[:, 'time'] = df['timestamp'].apply(convert_iso_to_unix)
-        df.loc[:, 'Time_In_PST'] = df['timestamp'].apply(convert_timestamp_to_pacific)
-        df.rename(columns={'timestamp': 'Time_In_ISO'}, inplace=True)
-
-    schedulePerDay = []
-    for df in dfList:
-        DayOfWeek = get_day_of_week(datetime.fromtimestamp(df.iloc[0]['time']))
-        if DayOfWeek == 'Friday':
-            scheduleData = scheduleDataFri
-        elif DayOfWeek == 'Tuesday' and (pNum == "14" or pNum == "16"):
-            scheduleData = scheduleDataTu
-        else:
-            scheduleData = scheduleDataOth
-        schedulePerDay.append(scheduleData)
-
-        for row in df.itertuples():
-            for schedRow in scheduleData.itertuples():
-                timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-                timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
-                if timeA < df.at[row.Index, 'Time_In_PST'] <= timeB:
-                    df.at[row.Index, 'class'] = getattr(schedRow, 'Class')
-                    break
-
-    for i in range(len(dfList)):
-        df = dfList[i].copy()
-        df.loc[:, 'class'] = df['class'].str.strip()
-        df = df[df['class'] != 'DELETE'].reset_index(drop=True)
-        dfList[i] = df
-
-    participant_data[pNum] = {'dfList': dfList, 'schedulePerDay': schedulePerDay}
+    print(f"Loading labeled Participant P0{pNum}...")
+    days = labeled_days(root_path, f"P0{pNum}")
+
+    validUs = []
+    classBlocks = []
+    for day, df in days.items():
+        validUs.append(sorted_sample_us(df.loc[df['bpm'].between(40, 180), 'Seconds_In_PST']))
+
+        scheduleBlocks = schedule_blocks(schedule_path(schedules_path, pNum, day.astype(object).weekday()))
+        classBlocks.append([
+            (to_us(timeA), to_us(timeB)) for timeA, timeB, classLabel in scheduleBlocks if classLabel != 'DELETE'
+        ])
+    participant_data[pNum] = {'validUs': validUs, 'classBlocks': classBlocks}
 
 print("\nAll participants loaded & labeled.\n")
 
@@ -172,35 +101,21 @@ print("\nAll participants loaded & labeled.\n")
 # original script's "clean_true_bins" definition)
 results = {pNum: {} for pNum in participant_data}
 
+# A bin is covered when it holds >=1 valid-HR sample. Its count is the
+# difference of two searchsorted positions in the day's sorted samples, so a
+# width costs one searchsorted per schedule row instead of a scan per bin.
 for bin_minutes in CANDIDATE_BIN_MINUTES:
     print(f"Evaluating bin width = {bin_minutes} min ...")
+    width_us = round(bin_minutes * 60 * US_PER_SECOND)
     for pNum, data in participant_data.items():
-        dfList = data['dfList']
-        schedulePerDay = data['schedulePerDay']
-
         total_bins = 0
         clean_true_bins = 0
 
-        for i in range(len(dfList)):
-            df = dfList[i]
-            scheduleData = schedulePerDay[i]
-
-            for schedRow in scheduleData.itertuples():
-                classLabel = str(getattr(schedRow, 'Class')).strip()
-                if classLabel == 'DELETE':
-                    continue
-
-                timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-                timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
-                bins = generate_bins(timeA, timeB, bin_minutes)
-                total_bins += len(bins)
-
-                for (binStart, binEnd) in bins:
-                    in_bin = df[(df['Time_In_PST'] > binStart) & (df['Time_In_PST'] <= binEnd)]
-                    if len(in_bin) > 0:
-                        clean_in_bin = in_bin[in_bin['bpm'].between(40, 180)]
-                        if len(clean_in_bin) > 0:
-                            clean_true_bins += 1
+        for validUs, classBlocks in zip(data['validUs'], data['classBlocks']):
+            for start_us, end_us in classBlocks:
+                counts = interval_counts(validUs, split_edges(start_us, end_us, width_us))
+                total_bins += len(counts)
+                clean_true_bins += int(np.count_nonzero(counts))
 
         coverage_pct = (clean_true_bins / total_bins * 100) if total_bins > 0 else np.nan
         results[pNum][bin_minutes] = coverage_pct
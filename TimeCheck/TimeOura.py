@@ -5,7 +5,8 @@ Goal
 ----
 The pipeline currently assumes Oura Ring heart rate data arrives as one
 sample every 5 minutes. This script checks that assumption directly by
-looking at the *actual* timestamps in each participant's raw HR files:
+looking at the *actual* timestamps in each participant's HR data (the
+labeled days from Common.oura_store, DELETE rows dropped):
 
   1. Time-gap analysis: for every pair of consecutive timestamps in a file,
      how much time elapsed? This tells us the real sampling interval(s).
@@ -27,14 +28,19 @@ Outputs
 """
 
 import os
-from datetime import datetime
+import sys
 from collections import Counter
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.coverage import sorted_sample_us
+from Common.oura_store import labeled_days
+
 # === Paths (mirrors the existing heatmap script) ===
 root_path = "/Users/cibrian/Documents/Github/Research"
 output_folder = os.path.join(root_path, "1_visualization/Heatmaps/OuraRing/SamplingFrequency")
@@ -67,17 +73,8 @@ def get_participant_number(name):
 participant_folders = sorted(participant_folders, key=get_participant_number)
 
 
-def parse_time(s):
-    try:
-        return datetime.strptime(s, "%H:%M:%S.%f")
-    except ValueError:
-        return datetime.strptime(s, "%H:%M:%S")
-
-
-def is_valid_hr(bpm):
-    if pd.isna(bpm):
-        return False
-    return 40 <= bpm <= 200
+# Sample clock times are put on this date so they can be diffed as datetimes
+DAY_START = pd.Timestamp(1900, 1, 1)
 
 
 # === Accumulators (global, across all participants/files) ===
@@ -90,40 +87,18 @@ participant_gap_lists = {p: [] for p in participant_folders}
 participant_burst_size_lists = {p: [] for p in participant_folders}
 participant_burst_gap_lists = {p: [] for p in participant_folders}
 
-files_processed = 0
-files_skipped_missing_cols = 0
+days_processed = 0
 
 for participant in participant_folders:
-    hr_path = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    if not os.path.exists(hr_path):
-        continue
-
-    for file in os.listdir(hr_path):
-        if not (file.endswith(".csv") and "RAW" not in file):
-            continue
-
-        file_path = os.path.join(hr_path, file)
-        try:
-            df = pd.read_csv(file_path)
-        except Exception as e:
-            print(f"Could not read {file_path}: {e}")
-            continue
-
-        if 'Time_In_PST' not in df.columns or 'bpm' not in df.columns:
-            files_skipped_missing_cols += 1
-            continue
-
-        df['TimeObj'] = df['Time_In_PST'].apply(parse_time)
-        df['valid_hr'] = df['bpm'].apply(is_valid_hr)
-
+    for day, labeled in labeled_days(root_path, participant).items():
         # Only look at rows with a valid HR sample -- these are the actual
         # "data points" the pipeline consumes downstream.
-        df = df[df['valid_hr']].copy()
-        if df.empty:
+        micros = sorted_sample_us(labeled.loc[labeled['bpm'].between(40, 200), 'Seconds_In_PST'])
+        if len(micros) == 0:
             continue
 
-        df = df.sort_values('TimeObj').reset_index(drop=True)
-        files_processed += 1
+        df = pd.DataFrame({'TimeObj': DAY_START + pd.to_timedelta(micros, unit='us')})
+        days_processed += 1
 
         # --- Gap analysis: seconds between consecutive samples ---
         gaps = df['TimeObj'].diff().dropna().dt.total_seconds().tolist()
@@ -161,8 +136,7 @@ for participant in participant_folders:
             all_burst_gap_sec.extend(burst_gaps)
             participant_burst_gap_lists[participant].extend(burst_gaps)
 
-print(f"Files processed: {files_processed}")
-print(f"Files skipped (missing columns): {files_skipped_missing_cols}")
+print(f"Days processed: {days_processed}")
 
 if not all_gaps_sec:
     raise SystemExit("No valid HR data found -- check root_path / folder structure.")
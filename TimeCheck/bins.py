@@ -44,12 +44,17 @@ Outputs
 - Printed report to console, grouped, explaining any discrepancies
 """
 
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
+from pathlib import Path
 import os
+import sys
 from collections import Counter
 
 import pandas as pd
-import pytz
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.oura_store import labeled_days, raw_hr_path
+from Common.schedules import schedule_blocks, schedule_path
 
 # === Bin width to use for this check (should match whatever you use downstream) ===
 BIN_MINUTES = 5
@@ -58,6 +63,7 @@ WEEKDAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
 
 # === Paths ===
 root_path = "/Users/cibrian/Documents/GitHub/Research"
+schedules_path = os.path.join(root_path, "Schedules")
 output_folder = os.path.join(root_path, "1_visualization/Heatmaps/OuraRing/BinParityCheck")
 os.makedirs(output_folder, exist_ok=True)
 
@@ -71,18 +77,6 @@ GROUPS = {
 
 # === Shared helper functions (same as coverage script) ===
 
-def convert_iso_to_pacific_date(timestamp):
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    dt_utc = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%fZ")
-    dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-    dt_pacific = dt_utc.astimezone(pacific_tz)
-    return dt_pacific.date()
-
-
-def convert_string_to_time(time_string):
-    return datetime.strptime(time_string, "%H:%M:%S").time()
-
-
 def get_day_of_week(date_obj):
     return date_obj.strftime("%A")
 
@@ -99,15 +93,12 @@ def generate_bins(start_time, end_time, bin_minutes):
     return bins
 
 
-def bins_for_schedule(scheduleData, bin_minutes):
-    """Total bin count implied by a schedule dataframe (all non-DELETE rows)."""
+def bins_for_schedule(scheduleBlocks, bin_minutes):
+    """Total bin count implied by a schedule's (start, end, class) blocks (all non-DELETE rows)."""
     total = 0
-    for schedRow in scheduleData.itertuples():
-        classLabel = str(getattr(schedRow, 'Class')).strip()
+    for timeA, timeB, classLabel in scheduleBlocks:
         if classLabel == 'DELETE':
             continue
-        timeA = convert_string_to_time(getattr(schedRow, 'TimeStart'))
-        timeB = convert_string_to_time(getattr(schedRow, 'TimeEnd'))
         total += len(generate_bins(timeA, timeB, bin_minutes))
     return total
 
@@ -116,49 +107,26 @@ def bins_for_schedule(scheduleData, bin_minutes):
 
 def load_participant_weekday_counts(pNum):
     """Returns Counter: weekday_name -> number of calendar days present with that weekday."""
-    rawDataPath = f"{root_path}/P0{pNum}/OuraRing/HeartRate/P0{pNum}OrHrRAW.csv"
-    if not os.path.exists(rawDataPath):
+    if not os.path.exists(raw_hr_path(root_path, f"P0{pNum}")):
         print(f"Raw data not found for P0{pNum}, skipping...")
         return Counter()
 
-    rawData = pd.read_csv(rawDataPath)
-    dates = rawData['timestamp'].apply(convert_iso_to_pacific_date)
-    unique_dates = sorted(dates.unique())
+    # Every day with a row counts, including days whose rows are all DELETE
+    days = labeled_days(root_path, f"P0{pNum}", drop_delete=False)
 
     weekday_counts = Counter()
-    for d in unique_dates:
-        dow = get_day_of_week(datetime(d.year, d.month, d.day))
+    for d in days:
+        dow = get_day_of_week(d.astype(object))
         weekday_counts[dow] += 1
     return weekday_counts
 
 
-# === Step 2: load schedules per group, and compute bins-per-single-day for each weekday ===
+# === Step 2: bins-per-single-day for each weekday, from the schedule registry ===
 
-def load_group_schedules(group_participants):
-    sample_pNum = group_participants[0]
-    if sample_pNum in ["04", "05", "09", "14", "16"]:
-        scheduleDataFri = pd.read_csv(f"{root_path}/Schedules/schedData_P(04,05,09,14,16)_FR.csv")
-        scheduleDataOth = pd.read_csv(f"{root_path}/Schedules/schedData_P(04,05,09,14,16)_M-TH.csv")
-        scheduleDataTu = None
-        if sample_pNum in ["14", "16"]:
-            scheduleDataTu = pd.read_csv(f"{root_path}/Schedules/schedData_P(14,16)TU.csv")
-    else:
-        scheduleDataFri = pd.read_csv(f"{root_path}/Schedules/schedData_P(01,02,03,06,07,08,12)_FR.csv")
-        scheduleDataOth = pd.read_csv(f"{root_path}/Schedules/schedData_P(01,02,03,06,07,08,12)_M-TH.csv")
-        scheduleDataTu = None
-
-    return {"Friday": scheduleDataFri, "Tuesday_special": scheduleDataTu, "Other": scheduleDataOth}
-
-
-def bins_per_day_for_weekday(weekday, schedules, pNum):
-    """Mirrors the coverage script's day-of-week -> schedule selection logic."""
-    if weekday == "Friday":
-        sched = schedules["Friday"]
-    elif weekday == "Tuesday" and pNum in ["14", "16"] and schedules["Tuesday_special"] is not None:
-        sched = schedules["Tuesday_special"]
-    else:
-        sched = schedules["Other"]
-    return bins_for_schedule(sched, BIN_MINUTES)
+def bins_per_day_for_weekday(weekday, pNum):
+    """Same day-of-week -> schedule selection as the labeling scripts (Friday, P14/P16 Tuesday, else M-Th)."""
+    path = schedule_path(schedules_path, pNum, WEEKDAY_ORDER.index(weekday))
+    return bins_for_schedule(schedule_blocks(path), BIN_MINUTES)
 
 
 # === Main analysis ===
@@ -168,8 +136,6 @@ summary_rows = []
 for group_name, group_participants in GROUPS.items():
     print(f"\n{'=' * 70}\n{group_name}\n{'=' * 70}")
 
-    schedules = load_group_schedules(group_participants)
-
     participant_weekday_counts = {}
     for pNum in group_participants:
         participant_weekday_counts[pNum] = load_participant_weekday_counts(pNum)
@@ -178,7 +144,7 @@ for group_name, group_participants in GROUPS.items():
     # (computed per participant since P14/P16 have a Tuesday-specific
     #  schedule that differs from the rest of their group)
     bins_per_weekday_by_participant = {
-        pNum: {wd: bins_per_day_for_weekday(wd, schedules, pNum) for wd in WEEKDAY_ORDER}
+        pNum: {wd: bins_per_day_for_weekday(wd, pNum) for wd in WEEKDAY_ORDER}
         for pNum in group_participants
     }
 
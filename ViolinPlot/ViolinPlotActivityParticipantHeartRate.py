@@ -1,85 +1,49 @@
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
-import numpy as np
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.cube import load_cube, rollup
+from Common.distplots import violin_plot
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
+modality = "OuraRing"  # or "Mocopi" / "SensorLogger" (acceleration magnitude)
 output_folder = os.path.join(root_path, "1_visualization/ViolinPlot")
-timestamp_column = "time"
 activity_column = "class"
-heart_rate_column = "bpm"
+value_label = "bpm" if modality == "OuraRing" else "acceleration magnitude"
 output_filename = "participant_activity_heartRate_combined.png"
 
 os.makedirs(output_folder, exist_ok=True)
 
-# Get all participant folders
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-
-for participant in participant_folders:
-    participant_number = participant
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-
-    csv_files = [
-        f for f in os.listdir(heart_rate_folder)
-        if f.endswith(".csv") and "RAW" not in f
-    ]
-
-    for file in csv_files:
-        # Extract date string
-        date_str = file[-14:-4]  # Assumes format: YYYY-MM-DD.csv
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            continue
-
-        # Skip Fridays
-        if file_date.weekday() == 4:
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
+# Cube cells of every participant, Fridays skipped: one quantile sketch per
+# participant and activity instead of every labeled row
+cube = load_cube(root_path, modality, skip_weekdays=(4,))
 
-        df['class'] = df['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
-
-        df['participant'] = participant_number
-        all_data.append(df[[activity_column, heart_rate_column, 'participant']])
-
-
-# Combine all data
-if not all_data:
+if cube.empty:
     print("No labeled CSV files with activities found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
-
-# Count number of data points per activity per participant
-counts = combined_df.groupby(['participant', activity_column]).size().reset_index(name='count')
-
-# --- BOX PLOT ---
-plt.figure(figsize=(14, 7))
+cube['class'] = cube['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
 
-# High-contrast palette for participants
-num_participants = combined_df['participant'].nunique()
-palette = sns.color_palette("tab20", num_participants)
+# Activities in the order they first appear, participants sorted
+activities = list(pd.unique(cube[activity_column].dropna()))
+summaries = rollup(cube, ['participant', activity_column])
 
-# Create a boxplot of counts per participant/activity
-# Using the raw combined_df instead of aggregated counts
+# --- VIOLIN PLOT ---
+# One split violin per participant/activity, drawn from its sketch
 plt.figure(figsize=(14, 7))
-sns.violinplot(
-    data=combined_df,
+violin_plot(
+    plt.gca(),
+    summaries,
     x=activity_column,
-    y=heart_rate_column,
     hue="participant",
+    order=activities,
     split=True,
     inner="quart",       # show quartiles inside
-    palette="tab20"
+    palette="tab20",
+    value_label=value_label
 )
 plt.xticks(rotation=45)
 plt.tight_layout()
@@ -1,57 +1,38 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from datetime import datetime
-from matplotlib.backends.backend_pdf import PdfPages
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from Common.cube import load_cube, rollup
+from Common.distplots import violin_plot
 
 root_path = "/Users/tommoore/Documents/GitHub/Research"
+modality = "OuraRing"  # or "Mocopi" / "SensorLogger" (acceleration magnitude)
+value_label = "Heart Rate (bpm)" if modality == "OuraRing" else "Acceleration Magnitude"
 output_folder = os.path.join(root_path, "1_visualization/ViolinPlot")
-timestamp_column = "time"
 activity_column = "class"
-heart_rate_column = "bpm"
 output_filename = "HR per activity per participant1.png"
 
 os.makedirs(output_folder, exist_ok=True)
 
-# --- load and combine data (same as before) ---
-participant_folders = [
-    f for f in os.listdir(root_path)
-    if f.startswith("P") and os.path.isdir(os.path.join(root_path, f))
-]
-
-all_data = []
-for participant in participant_folders:
-    participant_number = participant
-    heart_rate_folder = os.path.join(root_path, participant, "OuraRing", "HeartRate")
-    csv_files = [f for f in os.listdir(heart_rate_folder)
-                 if f.endswith(".csv") and "RAW" not in f]
-
-    for file in csv_files:
-        date_str = file[-14:-4]
-        try:
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            continue
-        if file_date.weekday() == 4:  # skip Fridays
-            continue
-
-        file_path = os.path.join(heart_rate_folder, file)
-        df = pd.read_csv(file_path)
-        df['class'] = df['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
-        df['participant'] = participant_number
-        all_data.append(df[[activity_column, heart_rate_column, 'participant']])
-
-if not all_data:
+# Cube cells of every participant, Fridays skipped: one quantile sketch per
+# participant and activity instead of every labeled row
+cube = load_cube(root_path, modality, skip_weekdays=(4,))
+
+if cube.empty:
     print("No labeled CSV files with activities found.")
     exit()
 
-combined_df = pd.concat(all_data, ignore_index=True)
+cube['class'] = cube['class'].replace('Homework Reinforcement/Study Hall', 'HW Reinfor')
+
+summaries = rollup(cube, ['participant', activity_column])
 
 # --- GRID OF VIOLIN PLOTS IN ONE PNG ---
-activities = sorted(combined_df[activity_column].unique())
-participants = sorted(combined_df['participant'].unique())
+activities = sorted(summaries[activity_column].unique())
+participants = sorted(summaries['participant'].unique())
 
 # Color palette for participants
 palette = sns.color_palette("Set2", len(participants))
@@ -65,18 +46,17 @@ fig, axes = plt.subplots(rows, cols, figsize=(cols * 5, rows * 5))
 axes = axes.flatten()
 
 # Compute global y-axis limits
-y_min = combined_df[heart_rate_column].min()
-y_max = combined_df[heart_rate_column].max()
+y_min = summaries['min'].min()
+y_max = summaries['max'].max()
 
 for i, activity in enumerate(activities):
     ax = axes[i]
-    subset = combined_df[combined_df[activity_column] == activity]
+    subset = summaries[summaries[activity_column] == activity]
 
-    sns.violinplot(
-        data=subset,
+    violin_plot(
+        ax,
+        subset,
         x="participant",
-        y=heart_rate_column,
-        ax=ax,
         palette=participant_palette,
         order=participants,
         inner="quartile",  # change to None if you want pure violin
@@ -85,7 +65,7 @@ for i, activity in enumerate(activities):
 
     ax.set_title(f"Activity: {activity}")
     ax.set_xlabel("Participant")
-    ax.set_ylabel("Heart Rate (bpm)")
+    ax.set_ylabel(value_label)
     ax.tick_params(axis='x', rotation=45)
     
     # Set consistent y-axis